@@ -1,7 +1,17 @@
+import base64
+import json
+import os
+from datetime import datetime
 from typing import Any, Optional
 
+from django.core.cache import cache
+from google.cloud import bigquery
+
+from breathecode.services.google_cloud.big_query import BigQuery
 from breathecode.utils.decorators.task import AbortTask
 
+ACTIVITY_CACHE_TIMEOUT = int(os.getenv('ACTIVITY_CACHE_TIMEOUT', '30'))
+
 ALLOWED_TYPES = {
     'auth.UserInvite': [
         'invite_created',
@@ -435,3 +445,94 @@ def get_activity_meta(kind: str,
         return FillActivityMeta.mentorship_session(*args)
 
     raise AbortTask(f'kind {kind} is not supported by {related_type} yet')
+
+
+def encode_cursor(timestamp: datetime | str, id: str) -> str:
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+
+    return base64.urlsafe_b64encode(json.dumps([timestamp, id]).encode('utf-8')).decode('utf-8')
+
+
+def decode_cursor(cursor: str) -> Optional[tuple[str, str]]:
+    """Get the timestamp and the id of the last activity of the previous page, or None if it's not valid."""
+
+    try:
+        timestamp, id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+        datetime.fromisoformat(timestamp)
+
+    except Exception:
+        return None
+
+    if not isinstance(id, str):
+        return None
+
+    return timestamp, id
+
+
+def get_activities(serializer,
+                   user_id: int,
+                   academy_id: Optional[int] = None,
+                   kind: Optional[str] = None,
+                   limit: int = 100,
+                   cursor: Optional[str] = None,
+                   offset: int = 0) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """
+    Get a page of activities of a user, from the newest to the oldest, and the cursor of the next page.
+
+    The pages are sorted by `(timestamp, id)` and every page starts where the previous one ended, so
+    BigQuery just reads the partitions older than the cursor. The results are cached for
+    `ACTIVITY_CACHE_TIMEOUT` seconds, so polling the same page does not launch a new job.
+    """
+
+    key = f'activity__{user_id}__{academy_id}__{kind}__{limit}__{cursor or offset}'
+    if (result := cache.get(key)) is not None:
+        return result
+
+    client, project_id, dataset = BigQuery.client()
+
+    query_parameters = [
+        bigquery.ScalarQueryParameter('user_id', 'INT64', user_id),
+        bigquery.ScalarQueryParameter('limit', 'INT64', limit),
+    ]
+
+    if academy_id:
+        query_parameters.append(bigquery.ScalarQueryParameter('academy_id', 'INT64', academy_id))
+
+    if kind:
+        query_parameters.append(bigquery.ScalarQueryParameter('kind', 'STRING', kind))
+
+    keyset = ''
+    if cursor:
+        timestamp, id = decode_cursor(cursor)
+        keyset = 'AND (timestamp < @cursor_timestamp OR (timestamp = @cursor_timestamp AND id < @cursor_id))'
+        query_parameters.append(bigquery.ScalarQueryParameter('cursor_timestamp', 'TIMESTAMP', timestamp))
+        query_parameters.append(bigquery.ScalarQueryParameter('cursor_id', 'STRING', id))
+
+    # the offset is kept for the clients that still paginate by page
+    elif offset:
+        query_parameters.append(bigquery.ScalarQueryParameter('offset', 'INT64', offset))
+
+    query = f"""
+            SELECT *
+            FROM `{project_id}.{dataset}.activity`
+            WHERE user_id = @user_id
+                {'AND meta.academy = @academy_id' if academy_id else ''}
+                {'AND kind = @kind' if kind else ''}
+                {keyset}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT @limit
+            {'OFFSET @offset' if offset and not cursor else ''}
+        """
+
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+
+    # Run the query
+    query_job = client.query(query, job_config=job_config)
+    rows = list(query_job.result())
+
+    data = serializer(rows, many=True).data
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if len(rows) == limit else None
+
+    cache.set(key, (data, next_cursor), ACTIVITY_CACHE_TIMEOUT)
+    return data, next_cursor
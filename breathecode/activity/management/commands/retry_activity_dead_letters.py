@@ -0,0 +1,23 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from ... import sink, tasks
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Push the activities of the dead letter store back to the buffer'
+
+    def handle(self, *args, **options):
+        pending = sink.dead_letters()
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('No activities in the dead letter store'))
+            return
+
+        logger.error(f'There are {pending} activities in the dead letter store, retrying them')
+        tasks.retry_activity_dead_letters.delay()
+
+        self.stdout.write(self.style.SUCCESS(f'Retrying {pending} activities of the dead letter store'))
@@ -0,0 +1,332 @@
+"""
+Buffered writer of the activities to BigQuery.
+
+Every activity is pushed to a buffer kept in the cache, and it is written along with others in a single
+streaming insert when the buffer reaches `BATCH_SIZE` activities, or `FLUSH_INTERVAL` seconds after the
+first activity of the batch was pushed. The batches that could not be written after `MAX_ATTEMPTS` attempts
+are moved to a dead letter store, from where they can be pushed again with `retry_dead_letters`, the command
+`retry_activity_dead_letters` must be scheduled to do it periodically.
+
+The buffer and the dead letter store are not persisted anywhere else, so the cache must not evict keys without
+a timeout, like a Redis instance with the `noeviction` or a `volatile-*` policy, otherwise the activities are
+lost.
+"""
+
+import logging
+import os
+from datetime import date, datetime
+from typing import Any, Optional
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+
+from breathecode.services.google_cloud.big_query import BigQuery
+
+__all__ = ['push', 'flush', 'retry_dead_letters', 'size', 'dead_letters']
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv('ACTIVITY_BATCH_SIZE', '500'))
+FLUSH_INTERVAL = int(os.getenv('ACTIVITY_FLUSH_INTERVAL', '30'))
+MAX_ATTEMPTS = 5
+LOCK_TIMEOUT = 60 * 5
+
+BUFFER = 'activity__buffer'
+DEAD_LETTER = 'activity__dead_letter'
+
+
+def _key(queue: str, name: str | int) -> str:
+    return f'{queue}__{name}'
+
+
+def _counter(queue: str, name: str) -> int:
+    return cache.get(_key(queue, name)) or 0
+
+
+def _incr(queue: str, name: str) -> int:
+    key = _key(queue, name)
+
+    try:
+        return cache.incr(key)
+
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+
+        return cache.incr(key)
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    return value
+
+
+def _get_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'BOOL'
+
+    if isinstance(value, int):
+        return 'INT64'
+
+    if isinstance(value, float):
+        return 'FLOAT64'
+
+    if isinstance(value, datetime):
+        return 'TIMESTAMP'
+
+    if isinstance(value, date):
+        return 'DATE'
+
+    return 'STRING'
+
+
+def build_row(user_id: int,
+              kind: str,
+              related_type: Optional[str] = None,
+              related_id: Optional[str | int] = None,
+              related_slug: Optional[str] = None,
+              meta: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    meta = meta or {}
+
+    return {
+        'id': uuid4().hex,
+        'user_id': user_id,
+        'kind': kind,
+        'timestamp': timezone.now().isoformat(),
+        'related': {
+            'type': related_type,
+            'id': int(related_id) if related_id else None,
+            'slug': related_slug,
+        },
+        'meta': {
+            key: _serialize(value)
+            for key, value in meta.items()
+        },
+        'types': {
+            key: _get_type(value)
+            for key, value in meta.items() if value is not None
+        },
+    }
+
+
+def get_meta_fields(rows: list[dict[str, Any]]) -> dict[str, str]:
+    """Get the fields of `meta` of a batch and its types, the first value that is not null sets the type."""
+
+    fields = {}
+    for row in rows:
+        for key in row['meta']:
+            if fields.get(key) is None:
+                fields[key] = row['types'].get(key)
+
+    return {key: t or 'STRING' for key, t in fields.items()}
+
+
+def _extend_schema(client: bigquery.Client, table_id: str, rows: list[dict[str, Any]]) -> None:
+    """Add to the table the fields of `meta` that it does not have yet."""
+
+    fields = get_meta_fields(rows)
+    known = cache.get(_key(BUFFER, 'meta_fields')) or set()
+
+    if not set(fields) - known:
+        return
+
+    table = client.get_table(table_id)
+    schema = list(table.schema)
+    index = next((i for i, x in enumerate(schema) if x.name == 'meta'), None)
+
+    if index is None:
+        schema.append(bigquery.SchemaField('meta', 'RECORD', mode='NULLABLE', fields=[]))
+        index = len(schema) - 1
+
+    meta = schema[index]
+    current = list(meta.fields)
+    names = {x.name for x in current}
+
+    new_fields = [
+        bigquery.SchemaField(key, t, mode='NULLABLE') for key, t in fields.items() if key not in names
+    ]
+    if new_fields:
+        schema[index] = bigquery.SchemaField('meta', 'RECORD', mode=meta.mode, fields=current + new_fields)
+        table.schema = schema
+        client.update_table(table, ['schema'])
+
+    cache.set(_key(BUFFER, 'meta_fields'), names | set(fields), timeout=None)
+
+
+def create_table(client: bigquery.Client, table_id: str) -> None:
+    """
+    Create the activity table.
+
+    It's partitioned by day and clustered by user and kind, so the queries of the activities of a user, that
+    are paginated by timestamp, just read the blocks of that user in the partitions of the page.
+    """
+
+    schema = [
+        bigquery.SchemaField('id', 'STRING', mode='REQUIRED'),
+        bigquery.SchemaField('user_id', 'INT64', mode='REQUIRED'),
+        bigquery.SchemaField('kind', 'STRING', mode='REQUIRED'),
+        bigquery.SchemaField('timestamp', 'TIMESTAMP', mode='REQUIRED'),
+        bigquery.SchemaField('related',
+                             'RECORD',
+                             mode='NULLABLE',
+                             fields=[
+                                 bigquery.SchemaField('type', 'STRING', mode='NULLABLE'),
+                                 bigquery.SchemaField('id', 'INT64', mode='NULLABLE'),
+                                 bigquery.SchemaField('slug', 'STRING', mode='NULLABLE'),
+                             ]),
+        bigquery.SchemaField('meta',
+                             'RECORD',
+                             mode='NULLABLE',
+                             fields=[bigquery.SchemaField('academy', 'INT64', mode='NULLABLE')]),
+    ]
+
+    table = bigquery.Table(table_id, schema=schema)
+    table.time_partitioning = bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.DAY,
+                                                        field='timestamp')
+    table.clustering_fields = ['user_id', 'kind']
+
+    client.create_table(table, exists_ok=True)
+    cache.delete(_key(BUFFER, 'meta_fields'))
+
+
+def write(rows: list[dict[str, Any]]) -> None:
+    """Write a batch of activities with a single streaming insert."""
+
+    client, project_id, dataset = BigQuery.client()
+    table_id = f'{project_id}.{dataset}.activity'
+
+    data = [{key: value for key, value in row.items() if key != 'types'} for row in rows]
+
+    # the row ids let BigQuery discard the rows that were already inserted by a failed attempt
+    row_ids = [row['id'] for row in rows]
+
+    try:
+        _extend_schema(client, table_id, rows)
+        errors = client.insert_rows_json(table_id, data, row_ids=row_ids)
+
+    except NotFound:
+        create_table(client, table_id)
+        _extend_schema(client, table_id, rows)
+        errors = client.insert_rows_json(table_id, data, row_ids=row_ids)
+
+    if errors:
+        raise Exception(f'BigQuery rejected {len(errors)} activities: {str(errors[:5])[:200]}')
+
+
+def _push(queue: str, rows: list[dict[str, Any]]) -> int:
+    for row in rows:
+        slot = _incr(queue, 'tail')
+        cache.set(_key(queue, slot), row, timeout=None)
+
+    return _counter(queue, 'tail') - _counter(queue, 'head')
+
+
+def _read(queue: str, limit: int) -> tuple[list[dict[str, Any]], int]:
+    """Get the oldest rows of a queue and the slot where they end."""
+
+    head = _counter(queue, 'head')
+    tail = min(_counter(queue, 'tail'), head + limit)
+
+    keys = [_key(queue, slot) for slot in range(head + 1, tail + 1)]
+    values = cache.get_many(keys)
+
+    rows = []
+    last = head
+    gap = cache.get(_key(queue, 'gap'))
+
+    for slot, key in zip(range(head + 1, tail + 1), keys):
+        if key in values:
+            rows.append(values[key])
+            last = slot
+            continue
+
+        # a slot that was missing in the previous flush too belongs to a push that never finished
+        if gap == slot:
+            last = slot
+            continue
+
+        cache.set(_key(queue, 'gap'), slot, timeout=None)
+        break
+
+    return rows, last
+
+
+def _ack(queue: str, head: int, last: int) -> None:
+    cache.delete_many([_key(queue, slot) for slot in range(head + 1, last + 1)])
+    cache.set(_key(queue, 'head'), last, timeout=None)
+
+
+def size() -> int:
+    return _counter(BUFFER, 'tail') - _counter(BUFFER, 'head')
+
+
+def dead_letters() -> int:
+    return _counter(DEAD_LETTER, 'tail') - _counter(DEAD_LETTER, 'head')
+
+
+def push(row: dict[str, Any]) -> None:
+    """Add an activity to the buffer, and schedule its flush."""
+
+    from .tasks import flush_activities
+
+    pending = _push(BUFFER, [row])
+
+    # while the buffer is full, a single flush is enqueued until one of them writes its batch, otherwise an
+    # outage of BigQuery would enqueue a flush per activity
+    if pending >= BATCH_SIZE:
+        if cache.add(_key(BUFFER, 'flushing'), 1, timeout=LOCK_TIMEOUT):
+            flush_activities.delay()
+
+    # just the first activity of the batch schedules the time based flush
+    elif cache.add(_key(BUFFER, 'scheduled'), 1, timeout=FLUSH_INTERVAL):
+        flush_activities.apply_async(countdown=FLUSH_INTERVAL)
+
+
+def flush(limit: int = BATCH_SIZE) -> int:
+    """Write a batch of the buffer, it returns the number of activities that are still pending."""
+
+    lock = _key(BUFFER, 'lock')
+    if not cache.add(lock, 1, timeout=LOCK_TIMEOUT):
+        return size()
+
+    try:
+        head = _counter(BUFFER, 'head')
+        rows, last = _read(BUFFER, limit)
+
+        if rows:
+            try:
+                write(rows)
+
+            except Exception as e:
+                attempts = _incr(BUFFER, 'attempts')
+                if attempts < MAX_ATTEMPTS:
+                    raise e
+
+                logger.exception(f'Moving {len(rows)} activities to the dead letter store after '
+                                 f'{attempts} attempts')
+                _push(DEAD_LETTER, rows)
+
+        cache.delete_many([_key(BUFFER, 'attempts'), _key(BUFFER, 'flushing')])
+        _ack(BUFFER, head, last)
+
+    finally:
+        cache.delete(lock)
+
+    return size()
+
+
+def retry_dead_letters(limit: int = BATCH_SIZE) -> int:
+    """Move the activities of the dead letter store back to the buffer, it returns the number moved."""
+
+    head = _counter(DEAD_LETTER, 'head')
+    rows, last = _read(DEAD_LETTER, limit)
+
+    _push(BUFFER, rows)
+    _ack(DEAD_LETTER, head, last)
+
+    return len(rows)
@@ -1,17 +1,12 @@
-from datetime import date, datetime
 import logging, os
 from typing import Optional
-from uuid import uuid4
 from celery import shared_task, Task
-from breathecode.activity import actions
+from breathecode.activity import actions, sink
 from breathecode.admissions.models import Cohort, CohortUser
 from breathecode.admissions.utils.cohort_log import CohortDayLog
-from breathecode.services.google_cloud.big_query import BigQuery
 from breathecode.utils.decorators import task, AbortTask
 from .models import StudentActivity
 from breathecode.utils import NDB
-from django.utils import timezone
-from google.cloud import bigquery
 
 API_URL = os.getenv('API_URL', '')
 
@@ -141,7 +136,7 @@ def get_attendancy_log_per_cohort_user(cohort_user_id: int):
     logger.info('History log saved')
 
 
-@task()
+@task(bookkeeping='on_failure')
 def add_activity(user_id: int,
                  kind: str,
                  related_type: Optional[str] = None,
@@ -158,61 +153,33 @@ def add_activity(user_id: int,
         raise AbortTask(
             'If related_type is not provided, both related_id and related_slug must also be absent.')
 
-    client, project_id, dataset = BigQuery.client()
-
-    job_config = bigquery.QueryJobConfig(
-        destination=f'{project_id}.{dataset}.activity',
-        schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
-        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-        query_parameters=[
-            bigquery.ScalarQueryParameter('x__id', 'STRING',
-                                          uuid4().hex),
-            bigquery.ScalarQueryParameter('x__user_id', 'INT64', user_id),
-            bigquery.ScalarQueryParameter('x__kind', 'STRING', kind),
-            bigquery.ScalarQueryParameter('x__timestamp', 'TIMESTAMP',
-                                          timezone.now().isoformat()),
-            bigquery.ScalarQueryParameter('x__related_type', 'STRING', related_type),
-            bigquery.ScalarQueryParameter('x__related_id', 'INT64', related_id),
-            bigquery.ScalarQueryParameter('x__related_slug', 'STRING', related_slug),
-        ])
-
     meta = actions.get_activity_meta(kind, related_type, related_id, related_slug)
+    row = sink.build_row(user_id, kind, related_type, related_id, related_slug, meta)
+
+    sink.push(row)
+
+
+@shared_task(bind=False, base=BaseTaskWithRetry)
+def flush_activities():
+    logger.info('Executing flush_activities')
+
+    pending = sink.flush()
+
+    if pending >= sink.BATCH_SIZE:
+        flush_activities.delay()
+
+    elif pending:
+        flush_activities.apply_async(countdown=sink.FLUSH_INTERVAL)
+
+
+@shared_task(bind=False, base=BaseTaskWithRetry)
+def retry_activity_dead_letters():
+    logger.info('Executing retry_activity_dead_letters')
+
+    moved = sink.retry_dead_letters()
+
+    if moved:
+        flush_activities.delay()
 
-    meta_struct = ''
-
-    for key in meta:
-        t = 'STRING'
-        if isinstance(meta[key], str):
-            pass
-        elif isinstance(meta[key], int):
-            t = 'INT64'
-        elif isinstance(meta[key], float):
-            t = 'FLOAT64'
-        elif isinstance(meta[key], bool):
-            t = 'BOOL'
-        elif isinstance(meta[key], datetime):
-            t = 'TIMESTAMP'
-        elif isinstance(meta[key], date):
-            t = 'DATE'
-
-        job_config.query_parameters += [bigquery.ScalarQueryParameter(key, t, meta[key])]
-        meta_struct += f'@{key} as {key}, '
-
-    if meta_struct:
-        meta_struct = meta_struct[:-2]
-
-    query = f"""
-        SELECT
-            @x__id as id,
-            @x__user_id as user_id,
-            @x__kind as kind,
-            @x__timestamp as timestamp,
-            STRUCT(
-                @x__related_type as type,
-                @x__related_id as id,
-                @x__related_slug as slug) as related,
-            STRUCT({meta_struct}) as meta
-    """
-
-    query_job = client.query(query, job_config=job_config)
-    query_job.result()
+    if sink.dead_letters():
+        retry_activity_dead_letters.delay()
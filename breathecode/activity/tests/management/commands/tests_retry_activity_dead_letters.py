@@ -0,0 +1,50 @@
+from logging import Logger
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from breathecode.activity import sink, tasks
+from breathecode.activity.management.commands.retry_activity_dead_letters import Command
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch):
+    monkeypatch.setattr('breathecode.activity.tasks.retry_activity_dead_letters.delay', MagicMock())
+    monkeypatch.setattr('logging.Logger.error', MagicMock())
+
+    yield
+
+
+# When: the dead letter store is empty
+# Then: nothing happens
+def test_with_0(capsys):
+    command = Command()
+    res = command.handle()
+
+    assert res == None
+    assert tasks.retry_activity_dead_letters.delay.call_args_list == []
+    assert Logger.error.call_args_list == []
+
+    captured = capsys.readouterr()
+    assert captured.out == 'No activities in the dead letter store\n'
+    assert captured.err == ''
+
+
+# When: 2 activities in the dead letter store
+# Then: it logs an error and retries them
+def test_with_2(capsys):
+    rows = [sink.build_row(user_id, 'login') for user_id in range(1, 3)]
+    sink._push(sink.DEAD_LETTER, rows)
+
+    command = Command()
+    res = command.handle()
+
+    assert res == None
+    assert tasks.retry_activity_dead_letters.delay.call_args_list == [call()]
+    assert Logger.error.call_args_list == [
+        call('There are 2 activities in the dead letter store, retrying them'),
+    ]
+
+    captured = capsys.readouterr()
+    assert captured.out == 'Retrying 2 activities of the dead letter store\n'
+    assert captured.err == ''
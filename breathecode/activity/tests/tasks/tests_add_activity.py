@@ -1,92 +1,62 @@
 """
 Test /answer
 """
-from datetime import date, datetime
 import logging
 from unittest.mock import MagicMock, call, patch
-from uuid import uuid4
 
 from django.utils import timezone
 from breathecode.services.google_cloud.big_query import BigQuery
 
-from breathecode.activity.tasks import add_activity
-from breathecode.activity import actions
-from google.cloud import bigquery
+from breathecode.activity.tasks import add_activity, flush_activities
+from breathecode.activity import actions, sink
 
 from ..mixins import MediaTestCase
 
 UTC_NOW = timezone.now()
 
 
-def bigquery_client_mock(user_id=1,
-                         kind=None,
-                         meta={},
-                         related_type=None,
-                         related_id=None,
-                         related_slug=None):
-
-    result_mock = MagicMock()
-    result_mock.result.return_value = []
-
+def bigquery_client_mock():
     client_mock = MagicMock()
-    client_mock.query.return_value = result_mock
+    client_mock.insert_rows_json.return_value = []
+    client_mock.get_table.return_value = MagicMock(schema=[])
 
     project_id = 'test'
     dataset = '4geeks'
 
-    meta_struct = ''
-
-    job_config = bigquery.QueryJobConfig(
-        destination=f'{project_id}.{dataset}.activity',
-        schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
-        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-        query_parameters=[
-            bigquery.ScalarQueryParameter('x__id', 'STRING',
-                                          uuid4().hex),
-            bigquery.ScalarQueryParameter('x__user_id', 'INT64', user_id),
-            bigquery.ScalarQueryParameter('x__kind', 'STRING', kind),
-            bigquery.ScalarQueryParameter('x__timestamp', 'TIMESTAMP',
-                                          timezone.now().isoformat()),
-            bigquery.ScalarQueryParameter('x__related_type', 'STRING', related_type),
-            bigquery.ScalarQueryParameter('x__related_id', 'INT64', related_id),
-            bigquery.ScalarQueryParameter('x__related_slug', 'STRING', related_slug),
-        ])
+    return (client_mock, project_id, dataset)
+
+
+def buffered_row(user_id=1, kind=None, meta={}, related_type=None, related_id=None, related_slug=None):
+    return {
+        'user_id': user_id,
+        'kind': kind,
+        'timestamp': UTC_NOW.isoformat(),
+        'related': {
+            'type': related_type,
+            'id': related_id,
+            'slug': related_slug,
+        },
+        'meta': meta,
+        'types': {
+            key: 'STRING'
+            for key in meta
+        },
+    }
+
+
+def buffered_rows():
+    head = sink._counter(sink.BUFFER, 'head')
+    rows, _ = sink._read(sink.BUFFER, sink.size())
+
+    assert head == sink._counter(sink.BUFFER, 'head')
 
-    for key in meta:
-        t = 'STRING'
-        if isinstance(meta[key], str):
-            pass
-        elif isinstance(meta[key], int):
-            t = 'INT64'
-        elif isinstance(meta[key], float):
-            t = 'FLOAT64'
-        elif isinstance(meta[key], bool):
-            t = 'BOOL'
-        elif isinstance(meta[key], datetime):
-            t = 'TIMESTAMP'
-        elif isinstance(meta[key], date):
-            t = 'DATE'
-
-        job_config.query_parameters.append(bigquery.ScalarQueryParameter(key, t, meta[key]))
-        meta_struct += f'@{key} as {key}, '
-
-    if meta_struct:
-        meta_struct = meta_struct[:-2]
-
-    query = f"""
-        SELECT
-            @x__id as id,
-            @x__user_id as user_id,
-            @x__kind as kind,
-            @x__timestamp as timestamp,
-            STRUCT(
-                @x__related_type as type,
-                @x__related_id as id,
-                @x__related_slug as slug) as related,
-            STRUCT({meta_struct}) as meta
-    """
-
-    return (client_mock, result_mock, query, project_id, dataset)
+    result = []
+    for row in rows:
+        row = row.copy()
+        assert len(row.pop('id')) == 32
+        result.append(row)
+
+    return result
 
 
 class MediaTestSuite(MediaTestCase):
@@ -95,18 +65,18 @@ class MediaTestSuite(MediaTestCase):
     @patch('logging.Logger.error', MagicMock())
     @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
     @patch('breathecode.activity.actions.get_activity_meta', MagicMock(return_value={}))
+    @patch('breathecode.activity.tasks.flush_activities.apply_async', MagicMock())
     def test_type_and_no_id_or_slug(self):
         kind = self.bc.fake.slug()
 
-        val = bigquery_client_mock(user_id=1, kind=kind)
-        (client_mock, result_mock, _, project_id, dataset) = val
+        (client_mock, project_id, dataset) = bigquery_client_mock()
 
         with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
             mock.return_value = (client_mock, project_id, dataset)
             add_activity.delay(1, kind, related_type='auth.User')
 
             self.bc.check.calls(BigQuery.client.call_args_list, [])
-            self.bc.check.calls(result_mock.result.call_args_list, [])
+            self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [])
 
         self.bc.check.calls(logging.Logger.info.call_args_list, [call('Executing add_activity')])
         self.bc.check.calls(logging.Logger.error.call_args_list, [
@@ -116,23 +86,25 @@ class MediaTestSuite(MediaTestCase):
                 exc_info=True),
         ])
         self.bc.check.calls(actions.get_activity_meta.call_args_list, [])
+        self.bc.check.calls(flush_activities.apply_async.call_args_list, [])
+        self.assertEqual(buffered_rows(), [])
 
     @patch('logging.Logger.info', MagicMock())
     @patch('logging.Logger.error', MagicMock())
     @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
     @patch('breathecode.activity.actions.get_activity_meta', MagicMock(return_value={}))
+    @patch('breathecode.activity.tasks.flush_activities.apply_async', MagicMock())
     def test_type_with_id_and_slug(self):
         kind = self.bc.fake.slug()
 
-        val = bigquery_client_mock(user_id=1, kind=kind)
-        (client_mock, result_mock, _, project_id, dataset) = val
+        (client_mock, project_id, dataset) = bigquery_client_mock()
 
         with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
             mock.return_value = (client_mock, project_id, dataset)
             add_activity.delay(1, kind, related_id=1, related_slug='slug')
 
             self.bc.check.calls(BigQuery.client.call_args_list, [])
-            self.bc.check.calls(result_mock.result.call_args_list, [])
+            self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [])
 
         self.bc.check.calls(logging.Logger.info.call_args_list, [call('Executing add_activity')])
         self.bc.check.calls(logging.Logger.error.call_args_list, [
@@ -140,16 +112,19 @@ class MediaTestSuite(MediaTestCase):
                  exc_info=True),
         ])
         self.bc.check.calls(actions.get_activity_meta.call_args_list, [])
+        self.bc.check.calls(flush_activities.apply_async.call_args_list, [])
+        self.assertEqual(buffered_rows(), [])
 
     @patch('logging.Logger.info', MagicMock())
     @patch('logging.Logger.error', MagicMock())
     @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
     @patch('breathecode.activity.actions.get_activity_meta', MagicMock(return_value={}))
+    @patch('breathecode.activity.tasks.flush_activities.apply_async', MagicMock())
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
     def test_adding_the_resource_with_id_and_no_meta(self):
         kind = self.bc.fake.slug()
 
-        val = bigquery_client_mock(user_id=1, kind=kind, meta={})
-        (client_mock, result_mock, query, project_id, dataset) = val
+        (client_mock, project_id, dataset) = bigquery_client_mock()
 
         logging.Logger.info.call_args_list = []
 
@@ -157,24 +132,29 @@ class MediaTestSuite(MediaTestCase):
             mock.return_value = (client_mock, project_id, dataset)
             add_activity.delay(1, kind, related_type='auth.User', related_id=1)
 
-            self.bc.check.calls(BigQuery.client.call_args_list, [call()])
-            assert client_mock.query.call_args[0][0] == query
-            self.bc.check.calls(result_mock.result.call_args_list, [call()])
+            self.bc.check.calls(BigQuery.client.call_args_list, [])
+            self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [])
 
         self.bc.check.calls(logging.Logger.info.call_args_list, [call('Executing add_activity')])
         self.bc.check.calls(logging.Logger.error.call_args_list, [])
 
         self.bc.check.calls(actions.get_activity_meta.call_args_list, [call(kind, 'auth.User', 1, None)])
+        self.bc.check.calls(flush_activities.apply_async.call_args_list,
+                            [call(countdown=sink.FLUSH_INTERVAL)])
+        self.assertEqual(buffered_rows(), [
+            buffered_row(kind=kind, related_type='auth.User', related_id=1),
+        ])
 
     @patch('logging.Logger.info', MagicMock())
     @patch('logging.Logger.error', MagicMock())
     @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
     @patch('breathecode.activity.actions.get_activity_meta', MagicMock(return_value={}))
+    @patch('breathecode.activity.tasks.flush_activities.apply_async', MagicMock())
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
     def test_adding_the_resource_with_slug_and_no_meta(self):
         kind = self.bc.fake.slug()
 
-        val = bigquery_client_mock(user_id=1, kind=kind, meta={})
-        (client_mock, result_mock, query, project_id, dataset) = val
+        (client_mock, project_id, dataset) = bigquery_client_mock()
 
         logging.Logger.info.call_args_list = []
 
@@ -184,19 +164,25 @@ class MediaTestSuite(MediaTestCase):
             mock.return_value = (client_mock, project_id, dataset)
             add_activity.delay(1, kind, related_type='auth.User', related_slug=related_slug)
 
-            self.bc.check.calls(BigQuery.client.call_args_list, [call()])
-            assert client_mock.query.call_args[0][0] == query
-            self.bc.check.calls(result_mock.result.call_args_list, [call()])
+            self.bc.check.calls(BigQuery.client.call_args_list, [])
+            self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [])
 
         self.bc.check.calls(logging.Logger.info.call_args_list, [call('Executing add_activity')])
         self.bc.check.calls(logging.Logger.error.call_args_list, [])
 
         self.bc.check.calls(actions.get_activity_meta.call_args_list,
                             [call(kind, 'auth.User', None, related_slug)])
+        self.bc.check.calls(flush_activities.apply_async.call_args_list,
+                            [call(countdown=sink.FLUSH_INTERVAL)])
+        self.assertEqual(buffered_rows(), [
+            buffered_row(kind=kind, related_type='auth.User', related_slug=related_slug),
+        ])
 
     @patch('logging.Logger.info', MagicMock())
     @patch('logging.Logger.error', MagicMock())
     @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    @patch('breathecode.activity.tasks.flush_activities.apply_async', MagicMock())
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
     def test_adding_the_resource_with_meta(self):
         kind = self.bc.fake.slug()
 
@@ -206,8 +192,7 @@ class MediaTestSuite(MediaTestCase):
             self.bc.fake.slug().replace('-', '_'): self.bc.fake.slug(),
         }
 
-        val = bigquery_client_mock(user_id=1, kind=kind, meta=meta, related_type='auth.User', related_id=1)
-        (client_mock, result_mock, query, project_id, dataset) = val
+        (client_mock, project_id, dataset) = bigquery_client_mock()
 
         logging.Logger.info.call_args_list = []
 
@@ -216,12 +201,52 @@ class MediaTestSuite(MediaTestCase):
                 mock.return_value = (client_mock, project_id, dataset)
                 add_activity.delay(1, kind, related_type='auth.User', related_id=1)
 
-                self.bc.check.calls(BigQuery.client.call_args_list, [call()])
-                assert client_mock.query.call_args[0][0] == query
-                self.bc.check.calls(result_mock.result.call_args_list, [call()])
+                self.bc.check.calls(BigQuery.client.call_args_list, [])
+                self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [])
                 self.bc.check.calls(actions.get_activity_meta.call_args_list, [
                     call(kind, 'auth.User', 1, None),
                 ])
 
         self.bc.check.calls(logging.Logger.info.call_args_list, [call('Executing add_activity')])
         self.bc.check.calls(logging.Logger.error.call_args_list, [])
+        self.bc.check.calls(flush_activities.apply_async.call_args_list,
+                            [call(countdown=sink.FLUSH_INTERVAL)])
+        self.assertEqual(buffered_rows(), [
+            buffered_row(kind=kind, meta=meta, related_type='auth.User', related_id=1),
+        ])
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.error', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    @patch('breathecode.activity.actions.get_activity_meta', MagicMock(return_value={}))
+    @patch('breathecode.activity.tasks.flush_activities.apply_async', MagicMock())
+    @patch('breathecode.activity.tasks.flush_activities.delay', MagicMock())
+    @patch('breathecode.activity.sink.BATCH_SIZE', 3)
+    def test_batch_is_full__flush_it_right_now(self):
+        kind = self.bc.fake.slug()
+
+        for n in range(3):
+            add_activity.delay(1, kind, related_type='auth.User', related_id=1)
+
+        self.bc.check.calls(flush_activities.apply_async.call_args_list,
+                            [call(countdown=sink.FLUSH_INTERVAL)])
+        self.bc.check.calls(flush_activities.delay.call_args_list, [call()])
+        self.assertEqual(len(buffered_rows()), 3)
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.error', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    @patch('breathecode.activity.actions.get_activity_meta', MagicMock(return_value={}))
+    @patch('breathecode.activity.tasks.flush_activities.apply_async', MagicMock())
+    @patch('breathecode.activity.tasks.flush_activities.delay', MagicMock())
+    @patch('breathecode.activity.sink.BATCH_SIZE', 3)
+    def test_batch_is_still_full__flush_it_once(self):
+        kind = self.bc.fake.slug()
+
+        for n in range(6):
+            add_activity.delay(1, kind, related_type='auth.User', related_id=1)
+
+        self.bc.check.calls(flush_activities.apply_async.call_args_list,
+                            [call(countdown=sink.FLUSH_INTERVAL)])
+        self.bc.check.calls(flush_activities.delay.call_args_list, [call()])
+        self.assertEqual(len(buffered_rows()), 6)
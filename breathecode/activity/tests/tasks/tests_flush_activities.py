@@ -0,0 +1,188 @@
+"""
+Test flush_activities
+"""
+import logging
+from unittest.mock import MagicMock, call, patch
+
+from django.utils import timezone
+from google.cloud import bigquery
+
+from breathecode.activity.tasks import flush_activities, retry_activity_dead_letters
+from breathecode.activity import sink
+
+from ..mixins import MediaTestCase
+
+UTC_NOW = timezone.now()
+
+
+def bigquery_client_mock(errors=[], schema=[]):
+    client_mock = MagicMock()
+    client_mock.insert_rows_json.return_value = errors
+    client_mock.get_table.return_value = MagicMock(schema=schema)
+
+    project_id = 'test'
+    dataset = '4geeks'
+
+    return (client_mock, project_id, dataset)
+
+
+def build_rows(n, meta={}):
+    return [
+        sink.build_row(user_id, 'login', related_type='auth.User', related_id=user_id, meta=meta)
+        for user_id in range(1, n + 1)
+    ]
+
+
+def serialize(rows):
+    return [{key: value for key, value in row.items() if key != 'types'} for row in rows]
+
+
+class MediaTestSuite(MediaTestCase):
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    def test_nothing_to_flush(self):
+        (client_mock, project_id, dataset) = bigquery_client_mock()
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+            flush_activities.delay()
+
+        self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [])
+        self.bc.check.calls(logging.Logger.info.call_args_list, [call('Executing flush_activities')])
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    def test_one_insert_per_batch(self):
+        (client_mock, project_id, dataset) = bigquery_client_mock()
+        rows = build_rows(3)
+
+        sink._push(sink.BUFFER, rows)
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+            flush_activities.delay()
+
+        self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [
+            call(f'{project_id}.{dataset}.activity', serialize(rows), row_ids=[row['id'] for row in rows]),
+        ])
+        self.bc.check.calls(client_mock.update_table.call_args_list, [])
+        self.assertEqual(sink.size(), 0)
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    def test_meta_fields_are_added_to_the_schema_once(self):
+        (client_mock, project_id, dataset) = bigquery_client_mock(schema=[
+            bigquery.SchemaField('id', 'STRING', mode='REQUIRED'),
+        ])
+
+        rows = build_rows(2, meta={'email': 'a@a.com', 'id': 1, 'is_active': True})
+
+        for row in rows:
+            sink._push(sink.BUFFER, [row])
+
+            with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+                mock.return_value = (client_mock, project_id, dataset)
+                flush_activities.delay()
+
+        table = client_mock.get_table.return_value
+
+        self.bc.check.calls(client_mock.get_table.call_args_list, [call(f'{project_id}.{dataset}.activity')])
+        self.bc.check.calls(client_mock.update_table.call_args_list, [call(table, ['schema'])])
+        self.assertEqual(table.schema, [
+            bigquery.SchemaField('id', 'STRING', mode='REQUIRED'),
+            bigquery.SchemaField('meta',
+                                 'RECORD',
+                                 mode='NULLABLE',
+                                 fields=[
+                                     bigquery.SchemaField('email', 'STRING', mode='NULLABLE'),
+                                     bigquery.SchemaField('id', 'INT64', mode='NULLABLE'),
+                                     bigquery.SchemaField('is_active', 'BOOL', mode='NULLABLE'),
+                                 ]),
+        ])
+        self.assertEqual(len(client_mock.insert_rows_json.call_args_list), 2)
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    def test_batch_size(self):
+        (client_mock, project_id, dataset) = bigquery_client_mock()
+        rows = build_rows(3)
+
+        sink._push(sink.BUFFER, rows)
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+            pending = sink.flush(2)
+
+        self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [
+            call(f'{project_id}.{dataset}.activity',
+                 serialize(rows[:2]),
+                 row_ids=[row['id'] for row in rows[:2]]),
+        ])
+        self.assertEqual(pending, 1)
+        self.assertEqual(sink.size(), 1)
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.exception', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    def test_rejected_rows__retried_and_then_moved_to_the_dead_letter_store(self):
+        (client_mock, project_id, dataset) = bigquery_client_mock(errors=[{'index': 0, 'errors': []}])
+        rows = build_rows(2)
+
+        sink._push(sink.BUFFER, rows)
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+
+            for _ in range(sink.MAX_ATTEMPTS - 1):
+                with self.assertRaises(Exception):
+                    sink.flush()
+
+                self.assertEqual(sink.size(), 2)
+                self.assertEqual(sink.dead_letters(), 0)
+
+            sink.flush()
+
+        self.assertEqual(len(client_mock.insert_rows_json.call_args_list), sink.MAX_ATTEMPTS)
+        self.assertEqual(sink.size(), 0)
+        self.assertEqual(sink.dead_letters(), 2)
+        self.bc.check.calls(logging.Logger.exception.call_args_list, [
+            call(f'Moving 2 activities to the dead letter store after {sink.MAX_ATTEMPTS} attempts'),
+        ])
+
+        (client_mock, project_id, dataset) = bigquery_client_mock()
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+            retry_activity_dead_letters.delay()
+
+        self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [
+            call(f'{project_id}.{dataset}.activity', serialize(rows), row_ids=[row['id'] for row in rows]),
+        ])
+        self.assertEqual(sink.size(), 0)
+        self.assertEqual(sink.dead_letters(), 0)
+
+    @patch('logging.Logger.info', MagicMock())
+    @patch('breathecode.services.google_cloud.credentials.resolve_credentials', MagicMock())
+    def test_push_that_did_not_finish_does_not_stop_the_buffer(self):
+        (client_mock, project_id, dataset) = bigquery_client_mock()
+        rows = build_rows(2)
+
+        sink._push(sink.BUFFER, rows[:1])
+        sink._incr(sink.BUFFER, 'tail')
+        sink._push(sink.BUFFER, rows[1:])
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+            sink.flush()
+
+            # the missing slot could be being written yet
+            self.assertEqual(sink.size(), 2)
+
+            sink.flush()
+
+        self.bc.check.calls(client_mock.insert_rows_json.call_args_list, [
+            call(f'{project_id}.{dataset}.activity', serialize(rows[:1]), row_ids=[rows[0]['id']]),
+            call(f'{project_id}.{dataset}.activity', serialize(rows[1:]), row_ids=[rows[1]['id']]),
+        ])
+        self.assertEqual(sink.size(), 0)
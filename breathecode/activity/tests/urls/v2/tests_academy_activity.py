@@ -18,7 +18,23 @@ from ...mixins import MediaTestCase
 UTC_NOW = timezone.now()
 
 
-def bigquery_client_mock(self, n=1, user_id=1, kind=None):
+def get_query(project_id, dataset, kind=None, cursor=False):
+    keyset = 'AND (timestamp < @cursor_timestamp OR (timestamp = @cursor_timestamp AND id < @cursor_id))'
+
+    return f"""
+            SELECT *
+            FROM `{project_id}.{dataset}.activity`
+            WHERE user_id = @user_id
+                {'AND meta.academy = @academy_id'}
+                {'AND kind = @kind' if kind else ''}
+                {keyset if cursor else ''}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT @limit
+            {''}
+        """
+
+
+def bigquery_client_mock(self, n=1, user_id=1, kind=None, cursor=False):
     rows_to_insert = [{
         'id': uuid4().hex,
         'user_id': user_id,
@@ -45,16 +61,7 @@ def bigquery_client_mock(self, n=1, user_id=1, kind=None):
     project_id = 'test'
     dataset = '4geeks'
 
-    query = f"""
-            SELECT *
-            FROM `{project_id}.{dataset}.activity`
-            WHERE user_id = @user_id
-                AND meta.academy = @academy_id
-                {'AND meta.kind = @kind' if kind else ''}
-            ORDER BY id DESC
-            LIMIT @limit
-            OFFSET @offset
-        """
+    query = get_query(project_id, dataset, kind=kind, cursor=cursor)
 
     return (client_mock, result_mock, query, project_id, dataset, rows_to_insert)
 
@@ -90,7 +97,7 @@ class MediaTestSuite(MediaTestCase):
 
             self.bc.check.calls(BigQuery.client.call_args_list, [call()])
             assert client_mock.query.call_args[0][0] == query
-            assert 'AND meta.kind = @kind' not in query
+            assert 'AND kind = @kind' not in query
             self.bc.check.calls(result_mock.result.call_args_list, [call()])
 
         self.assertEqual(json, expected)
@@ -121,7 +128,7 @@ class MediaTestSuite(MediaTestCase):
 
             self.bc.check.calls(BigQuery.client.call_args_list, [call()])
             assert client_mock.query.call_args[0][0] == query
-            assert 'AND meta.kind = @kind' in query
+            assert 'AND kind = @kind' in query
             self.bc.check.calls(result_mock.result.call_args_list, [call()])
 
         self.assertEqual(json, expected)
@@ -9,6 +9,7 @@ from unittest.mock import MagicMock, call, patch
 from django.urls.base import reverse_lazy
 from rest_framework import status
 
+from breathecode.activity import actions
 from breathecode.services.google_cloud.big_query import BigQuery
 
 from breathecode.utils.attr_dict import AttrDict
@@ -18,7 +19,23 @@ from ...mixins import MediaTestCase
 UTC_NOW = timezone.now()
 
 
-def bigquery_client_mock(self, n=1, user_id=1, kind=None):
+def get_query(project_id, dataset, kind=None, cursor=False):
+    keyset = 'AND (timestamp < @cursor_timestamp OR (timestamp = @cursor_timestamp AND id < @cursor_id))'
+
+    return f"""
+            SELECT *
+            FROM `{project_id}.{dataset}.activity`
+            WHERE user_id = @user_id
+                {''}
+                {'AND kind = @kind' if kind else ''}
+                {keyset if cursor else ''}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT @limit
+            {''}
+        """
+
+
+def bigquery_client_mock(self, n=1, user_id=1, kind=None, cursor=False):
     rows_to_insert = [{
         'id': uuid4().hex,
         'user_id': user_id,
@@ -45,15 +62,7 @@ def bigquery_client_mock(self, n=1, user_id=1, kind=None):
     project_id = 'test'
     dataset = '4geeks'
 
-    query = f"""
-            SELECT *
-            FROM `{project_id}.{dataset}.activity`
-            WHERE user_id = @user_id
-                {'AND meta.kind = @kind' if kind else ''}
-            ORDER BY id DESC
-            LIMIT @limit
-            OFFSET @offset
-        """
+    query = get_query(project_id, dataset, kind=kind, cursor=cursor)
 
     return (client_mock, result_mock, query, project_id, dataset, rows_to_insert)
 
@@ -105,8 +114,110 @@ class MediaTestSuite(MediaTestCase):
 
             self.bc.check.calls(BigQuery.client.call_args_list, [call()])
             assert client_mock.query.call_args[0][0] == query
-            assert 'AND meta.kind = @kind' in query
+            assert 'AND kind = @kind' in query
             self.bc.check.calls(result_mock.result.call_args_list, [call()])
 
         self.assertEqual(json, expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    def test_full_page__link_to_the_next_one(self):
+        model = self.bc.database.create(user=1)
+
+        self.bc.request.authenticate(model.user)
+
+        url = reverse_lazy('v2:activity:me_activity') + '?limit=2'
+
+        val = bigquery_client_mock(self, n=2, user_id=1)
+        (client_mock, result_mock, query, project_id, dataset, expected) = val
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+            response = self.client.get(url)
+            json = response.json()
+
+            assert client_mock.query.call_args[0][0] == query
+
+        cursor = actions.encode_cursor(expected[-1]['timestamp'], expected[-1]['id'])
+
+        self.assertEqual(json, expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['Link'], f'<http://testserver/v2/activity/me/activity?cursor={cursor}&limit=2>; '
+            'rel="next"')
+
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    def test_with_cursor(self):
+        model = self.bc.database.create(user=1)
+
+        self.bc.request.authenticate(model.user)
+
+        timestamp = UTC_NOW.isoformat()
+        activity_id = uuid4().hex
+        cursor = actions.encode_cursor(timestamp, activity_id)
+
+        url = reverse_lazy('v2:activity:me_activity') + f'?limit=2&cursor={cursor}'
+
+        val = bigquery_client_mock(self, n=1, user_id=1, cursor=True)
+        (client_mock, result_mock, query, project_id, dataset, expected) = val
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+            response = self.client.get(url)
+            json = response.json()
+
+            assert client_mock.query.call_args[0][0] == query
+
+            job_config = client_mock.query.call_args[1]['job_config']
+            params = {x.name: x.value for x in job_config.query_parameters}
+
+            self.assertEqual(params, {
+                'user_id': 1,
+                'limit': 2,
+                'cursor_timestamp': UTC_NOW,
+                'cursor_id': activity_id,
+            })
+
+        self.assertEqual(json, expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Link'))
+
+    def test_with_invalid_cursor(self):
+        model = self.bc.database.create(user=1)
+
+        self.bc.request.authenticate(model.user)
+
+        url = reverse_lazy('v2:activity:me_activity') + '?cursor=abc'
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            response = self.client.get(url)
+            json = response.json()
+
+            self.bc.check.calls(BigQuery.client.call_args_list, [])
+
+        self.assertEqual(json, {'detail': 'invalid-cursor', 'status_code': 400})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    def test_polling_the_same_page__just_one_query(self):
+        model = self.bc.database.create(user=1)
+
+        self.bc.request.authenticate(model.user)
+
+        url = reverse_lazy('v2:activity:me_activity')
+
+        val = bigquery_client_mock(self, n=2, user_id=1)
+        (client_mock, result_mock, query, project_id, dataset, expected) = val
+
+        with patch('breathecode.services.google_cloud.big_query.BigQuery.client') as mock:
+            mock.return_value = (client_mock, project_id, dataset)
+
+            for _ in range(3):
+                response = self.client.get(url)
+                json = response.json()
+
+                self.assertEqual(json, expected)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            self.bc.check.calls(BigQuery.client.call_args_list, [call()])
+            self.bc.check.calls(result_mock.result.call_args_list, [call()])
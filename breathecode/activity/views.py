@@ -3,9 +3,11 @@ from django.db.models import Q
 from google.cloud.ndb.query import OR
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.views import APIView
 from google.cloud import bigquery
 
+from breathecode.activity.actions import decode_cursor, get_activities
 from breathecode.activity.models import StudentActivity
 from breathecode.activity.serializers import ActivitySerializer
 from breathecode.admissions.models import Cohort, CohortUser
@@ -514,13 +516,43 @@ class StudentActivityView(APIView, HeaderLimitOffsetPagination):
         return Response(new_activities, status=status.HTTP_201_CREATED)
 
 
+def get_activities_response(request, lang, user_id, academy_id=None):
+    limit = int(request.GET.get('limit', 100))
+    offset = (int(request.GET.get('page', 1)) - 1) * limit
+    kind = request.GET.get('kind', None)
+    cursor = request.GET.get('cursor', None)
+
+    if cursor and not decode_cursor(cursor):
+        raise ValidationException(translation(lang,
+                                              en='Invalid cursor',
+                                              es='Cursor inválido',
+                                              slug='invalid-cursor'),
+                                  code=400)
+
+    data, next_cursor = get_activities(ActivitySerializer,
+                                       user_id,
+                                       academy_id=academy_id,
+                                       kind=kind,
+                                       limit=limit,
+                                       cursor=cursor,
+                                       offset=offset)
+
+    headers = {}
+    if next_cursor:
+        url = remove_query_param(request.build_absolute_uri(), 'page')
+        headers['Link'] = '<{}>; rel="next"'.format(replace_query_param(url, 'cursor', next_cursor))
+
+    return Response(data, headers=headers)
+
+
 class V2MeActivityView(APIView):
 
     def get(self, request, activity_id=None):
         lang = get_user_language(request)
-        client, project_id, dataset = BigQuery.client()
 
         if activity_id:
+            client, project_id, dataset = BigQuery.client()
+
             # Define a query
             query = f"""
                 SELECT *
@@ -551,32 +583,7 @@ class V2MeActivityView(APIView):
             serializer = ActivitySerializer(result, many=False)
             return Response(serializer.data)
 
-        limit = int(request.GET.get('limit', 100))
-        offset = (int(request.GET.get('page', 1)) - 1) * limit
-        kind = request.GET.get('kind', None)
-
-        query = f"""
-            SELECT *
-            FROM `{project_id}.{dataset}.activity`
-            WHERE user_id = @user_id
-                {'AND meta.kind = @kind' if kind else ''}
-            ORDER BY id DESC
-            LIMIT @limit
-            OFFSET @offset
-        """
-
-        job_config = bigquery.QueryJobConfig(query_parameters=[
-            bigquery.ScalarQueryParameter('user_id', 'INT64', request.user.id),
-            bigquery.ScalarQueryParameter('limit', 'INT64', limit),
-            bigquery.ScalarQueryParameter('offset', 'INT64', offset),
-        ])
-
-        # Run the query
-        query_job = client.query(query, job_config=job_config)
-        results = query_job.result()
-
-        serializer = ActivitySerializer(results, many=True)
-        return Response(serializer.data)
+        return get_activities_response(request, lang, request.user.id)
 
 
 class V2AcademyActivityView(APIView):
@@ -584,9 +591,10 @@ class V2AcademyActivityView(APIView):
     @capable_of('read_activity')
     def get(self, request, activity_id=None, academy_id=None):
         lang = get_user_language(request)
-        client, project_id, dataset = BigQuery.client()
 
         if activity_id:
+            client, project_id, dataset = BigQuery.client()
+
             # Define a query
             query = f"""
                 SELECT *
@@ -619,34 +627,4 @@ class V2AcademyActivityView(APIView):
             serializer = ActivitySerializer(result, many=False)
             return Response(serializer.data)
 
-        limit = int(request.GET.get('limit', 100))
-        offset = (int(request.GET.get('page', 1)) - 1) * limit
-        kind = request.GET.get('kind', None)
-
-        query = f"""
-            SELECT *
-            FROM `{project_id}.{dataset}.activity`
-            WHERE user_id = @user_id
-                AND meta.academy = @academy_id
-                {'AND meta.kind = @kind' if kind else ''}
-            ORDER BY id DESC
-            LIMIT @limit
-            OFFSET @offset
-        """
-
-        job_config = bigquery.QueryJobConfig(query_parameters=[
-            bigquery.ScalarQueryParameter('academy_id', 'INT64', academy_id),
-            bigquery.ScalarQueryParameter('user_id', 'INT64', request.user.id),
-            bigquery.ScalarQueryParameter('limit', 'INT64', limit),
-            bigquery.ScalarQueryParameter('offset', 'INT64', offset),
-        ])
-
-        if kind:
-            job_config.query_parameters.append(bigquery.ScalarQueryParameter('kind', 'STRING', kind))
-
-        # Run the query
-        query_job = client.query(query, job_config=job_config)
-        results = query_job.result()
-
-        serializer = ActivitySerializer(results, many=True)
-        return Response(serializer.data)
+        return get_activities_response(request, lang, request.user.id, academy_id=academy_id)
@@ -1,11 +1,16 @@
 import logging, json
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
 from django.db.models.query_utils import Q
 from .models import Cohort, SyllabusScheduleTimeSlot, SyllabusVersion
 from breathecode.services.google_cloud import Storage
 from .signals import syllabus_asset_slug_updated
-from math import radians, cos, sin, asin, sqrt
+from math import radians, cos, sin, asin, sqrt, pi
 
 BUCKET_NAME = 'admissions-breathecode'
+
+# kilometers in a degree of latitude
+KM_PER_DEGREE = 6371 * pi / 180
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +32,31 @@ def haversine(lon1, lat1, lon2, lat2):
     return c * r
 
 
+def haversine_expression(lon1, lat1, lon2, lat2):
+    """
+    Build an expression that calculates `haversine` in the database, the coordinates are numbers or the names
+    of the fields.
+
+    It's the same formula in the same order, so the result is the same one calculated by `haversine`.
+    """
+
+    def to_radians(x):
+        if isinstance(x, str):
+            return Radians(Cast(F(x), output_field=FloatField()))
+
+        return Radians(Value(float(x), output_field=FloatField()))
+
+    lon1, lat1, lon2, lat2 = map(to_radians, [lon1, lat1, lon2, lat2])
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = Power(Sin(dlat / 2), 2) + Cos(lat1) * Cos(lat2) * Power(Sin(dlon / 2), 2)
+    c = 2 * ASin(Sqrt(a))
+    r = 6371
+
+    return ExpressionWrapper(c * r, output_field=FloatField())
+
+
 def get_bucket_object(file_name):
     if not file_name:
         return False
@@ -12,6 +12,8 @@ class CohortCache(Cache):
         'CohortUser', 'Task', 'UserInvite', 'UserSpecialty', 'Survey', 'SlackChannel', 'CohortTimeSlot',
         'FinalProject', 'GitpodUser', 'Answer', 'Review'
     ]
+    stale_timeout = 60 * 10
+    lookups = {'academy_id': ['academy_id']}
 
 
 class TeacherCache(Cache):
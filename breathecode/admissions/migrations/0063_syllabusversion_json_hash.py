@@ -0,0 +1,40 @@
+# Generated by Django 3.2.21 on 2026-10-18 07:56
+
+import base64
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def hash_json(apps, schema_editor):
+    SyllabusVersion = apps.get_model('admissions', 'SyllabusVersion')
+
+    for syllabus_version in SyllabusVersion.objects.only('id', 'json').iterator():
+        if syllabus_version.json is None:
+            continue
+
+        encoded = base64.b64encode(json.dumps(syllabus_version.json, sort_keys=True).encode('utf-8'))
+        json_hash = hashlib.sha256(encoded).hexdigest()
+
+        SyllabusVersion.objects.filter(id=syllabus_version.id).update(json_hash=json_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0062_syllabus_is_documentation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syllabusversion',
+            name='json_hash',
+            field=models.CharField(blank=True,
+                                   default='',
+                                   editable=False,
+                                   help_text='Hash of the json, it is used to detect when it changes',
+                                   max_length=64),
+        ),
+        migrations.RunPython(hash_json, reverse_code=migrations.RunPython.noop),
+    ]
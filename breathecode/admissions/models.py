@@ -219,6 +219,11 @@ INTEGRITY_STATUS = (
 
 class SyllabusVersion(models.Model):
     json = models.JSONField()
+    json_hash = models.CharField(max_length=64,
+                                 blank=True,
+                                 default='',
+                                 editable=False,
+                                 help_text='Hash of the json, it is used to detect when it changes')
 
     version = models.PositiveSmallIntegerField()
     syllabus = models.ForeignKey(Syllabus, on_delete=models.CASCADE)
@@ -232,10 +237,6 @@ class SyllabusVersion(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True, editable=False)
 
-    def __init__(self, *args, **kwargs):
-        super(SyllabusVersion, self).__init__(*args, **kwargs)
-        self.__json_hash = self.hashed_json()
-
     def __str__(self):
         return f'{self.syllabus.slug}.v{self.version}'
 
@@ -247,11 +248,18 @@ class SyllabusVersion(models.Model):
         return hashlib.sha256(encoded).hexdigest()
 
     def save(self, *args, **kwargs):
-
         json_modified = False
 
-        if self.__json_hash != self.hashed_json():
-            json_modified = True
+        # the json is just hashed if it was loaded, a listing usually defers it
+        if 'json' not in self.get_deferred_fields():
+            json_hash = self.hashed_json()
+
+            if self.json_hash != json_hash:
+                json_modified = not self._state.adding
+                self.json_hash = json_hash
+
+                if kwargs.get('update_fields') is not None and 'json_hash' not in kwargs['update_fields']:
+                    kwargs['update_fields'] = [*kwargs['update_fields'], 'json_hash']
 
         super().save(*args, **kwargs)
 
@@ -12,7 +12,7 @@ from django.contrib.auth.models import User
 from breathecode.authenticate.models import CredentialsGithub, ProfileAcademy
 from breathecode.assignments.serializers import TaskGETSmallSerializer
 from breathecode.assignments.models import Task
-from .actions import test_syllabus, haversine
+from .actions import test_syllabus
 from .models import (Academy, SyllabusScheduleTimeSlot, Cohort, SyllabusSchedule, CohortTimeSlot, CohortUser,
                      Syllabus, SyllabusVersion, COHORT_STAGE)
 
@@ -346,10 +346,8 @@ class PublicCohortSerializer(serpy.Serializer):
     timeslots = serpy.ManyToManyField(SmallCohortTimeSlotSerializer(attr='cohorttimeslot_set', many=True))
 
     def get_distance(self, obj):
-        if not obj.latitude or not obj.longitude or not obj.academy.latitude or not obj.academy.longitude:
-            return None
-
-        return haversine(obj.longitude, obj.latitude, obj.academy.longitude, obj.academy.latitude)
+        # it's calculated by the database
+        return getattr(obj, 'distance', None)
 
 
 class GetSmallCohortSerializer(serpy.Serializer):
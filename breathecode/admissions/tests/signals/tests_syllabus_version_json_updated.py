@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock, call, patch
+
+from breathecode.admissions import signals
+from breathecode.admissions.models import SyllabusVersion
+from breathecode.tests.mixins.legacy import LegacyAPITestCase
+
+
+class TestSyllabusVersion(LegacyAPITestCase):
+
+    @patch('breathecode.admissions.signals.syllabus_version_json_updated.send', MagicMock())
+    def test_created(self):
+        model = self.bc.database.create(syllabus_version={'json': {'days': []}})
+
+        self.assertEqual(model.syllabus_version.json_hash, model.syllabus_version.hashed_json())
+        self.assertEqual(signals.syllabus_version_json_updated.send.call_args_list, [])
+
+    @patch('breathecode.admissions.signals.syllabus_version_json_updated.send', MagicMock())
+    def test_json_not_changed(self):
+        model = self.bc.database.create(syllabus_version={'json': {'days': []}})
+
+        syllabus_version = SyllabusVersion.objects.get(id=model.syllabus_version.id)
+        syllabus_version.status = 'DRAFT'
+        syllabus_version.save()
+
+        self.assertEqual(signals.syllabus_version_json_updated.send.call_args_list, [])
+
+    @patch('breathecode.admissions.signals.syllabus_version_json_updated.send', MagicMock())
+    def test_json_changed(self):
+        model = self.bc.database.create(syllabus_version={'json': {'days': []}})
+
+        syllabus_version = SyllabusVersion.objects.get(id=model.syllabus_version.id)
+        syllabus_version.json = {'days': [{'id': 1}]}
+        syllabus_version.save()
+
+        self.assertEqual(
+            self.bc.database.get('admissions.SyllabusVersion', 1, dict=False).json_hash,
+            syllabus_version.hashed_json())
+        self.assertEqual(signals.syllabus_version_json_updated.send.call_args_list, [
+            call(instance=syllabus_version, sender=SyllabusVersion),
+        ])
+
+    @patch('breathecode.admissions.signals.syllabus_version_json_updated.send', MagicMock())
+    def test_json_deferred(self, django_assert_num_queries):
+        model = self.bc.database.create(syllabus_version={'json': {'days': []}})
+
+        syllabus_version = SyllabusVersion.objects.defer('json').get(id=model.syllabus_version.id)
+        syllabus_version.status = 'DRAFT'
+
+        # the json is not loaded to be hashed
+        with django_assert_num_queries(1):
+            syllabus_version.save()
+
+        self.assertEqual(signals.syllabus_version_json_updated.send.call_args_list, [])
@@ -603,6 +603,107 @@ class CohortAllTestSuite(AdmissionsTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(self.bc.database.list_of('admissions.Cohort'), self.bc.format.to_dict(model.cohort))
 
+    def test_with_data__good_coordinates__sorting_the_distances_before_paginating(self):
+        """Test /cohort/all without auth"""
+        distance1 = 5081.175052677738
+        distance2 = 11318.400937786448
+        academies = [
+            {
+                'latitude': 90,
+                'longitude': -33,
+            },
+            {
+                'latitude': 43,
+                'longitude': -165,
+            },
+            {
+                'latitude': None,
+                'longitude': None,
+            },
+            {
+                'latitude': -60,
+                'longitude': -99,
+            },
+        ]
+        cohorts = [{'academy_id': n} for n in range(1, 5)]
+        model = self.generate_models(academy=academies, cohort=cohorts, syllabus_version=True)
+
+        url = reverse_lazy('admissions:cohort_all') + '?coordinates=-56,167&limit=2&envelope=false'
+        response = self.client.get(url)
+        json = response.json()
+        expected = [
+            get_serializer(model.cohort[3],
+                           model.syllabus,
+                           model.syllabus_version,
+                           data={'distance': distance1}),
+            get_serializer(model.cohort[1],
+                           model.syllabus,
+                           model.syllabus_version,
+                           data={'distance': distance2}),
+        ]
+
+        self.assertEqual(json, expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.bc.database.list_of('admissions.Cohort'), self.bc.format.to_dict(model.cohort))
+
+    def test_with_data__good_coordinates__max_distance(self):
+        """Test /cohort/all without auth"""
+        distance1 = 5081.175052677738
+        distance2 = 11318.400937786448
+        academies = [
+            {
+                'latitude': -60,
+                'longitude': -99,
+            },
+            {
+                'latitude': 76,
+                'longitude': 130,
+            },
+            {
+                'latitude': 43,
+                'longitude': -165,
+            },
+            {
+                'latitude': None,
+                'longitude': None,
+            },
+        ]
+        cohorts = [{'academy_id': n} for n in range(1, 5)]
+        model = self.generate_models(academy=academies, cohort=cohorts, syllabus_version=True)
+
+        url = reverse_lazy('admissions:cohort_all') + '?coordinates=-56,167&max_distance=12000'
+        response = self.client.get(url)
+        json = response.json()
+        expected = [
+            get_serializer(model.cohort[0],
+                           model.syllabus,
+                           model.syllabus_version,
+                           data={'distance': distance1}),
+            get_serializer(model.cohort[2],
+                           model.syllabus,
+                           model.syllabus_version,
+                           data={'distance': distance2}),
+        ]
+
+        self.assertEqual(json, expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.bc.database.list_of('admissions.Cohort'), self.bc.format.to_dict(model.cohort))
+
+    def test_with_data__good_coordinates__bad_max_distance(self):
+        """Test /cohort/all without auth"""
+        model = self.generate_models(cohort=True, syllabus_version=True)
+
+        url = reverse_lazy('admissions:cohort_all') + '?coordinates=-56,167&max_distance=a'
+        response = self.client.get(url)
+        json = response.json()
+        expected = {'detail': 'bad-max-distance', 'status_code': 400}
+
+        self.assertEqual(json, expected)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.bc.database.list_of('admissions.Cohort'), [{
+            **self.model_to_dict(model, 'cohort')
+        }])
+
     """
     🔽🔽🔽 saas in querystring
     """
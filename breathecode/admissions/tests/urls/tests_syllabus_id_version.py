@@ -6,6 +6,7 @@ from unittest.mock import patch, MagicMock
 from breathecode.services import datetime_to_iso_format
 from django.urls.base import reverse_lazy
 from rest_framework import status
+from breathecode.admissions.models import SyllabusVersion
 
 from django.utils import timezone
 from ..mixins import AdmissionsTestCase
@@ -226,18 +227,20 @@ class CertificateTestSuite(AdmissionsTestCase):
 
         self.assertEqual(json, expected)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(self.all_syllabus_version_dict(), [{
-            'id': 1,
-            'integrity_check_at': None,
-            'integrity_report': None,
-            'integrity_status': 'PENDING',
-            'json': {},
-            'change_log_details': None,
-            'status': 'PUBLISHED',
-            'syllabus_id': 1,
-            'version': 1,
-            **data,
-        }])
+        self.assertEqual(self.all_syllabus_version_dict(),
+                         [{
+                             'id': 1,
+                             'integrity_check_at': None,
+                             'integrity_report': None,
+                             'integrity_status': 'PENDING',
+                             'json': {},
+                             'json_hash': SyllabusVersion(json=data['json']).hashed_json(),
+                             'change_log_details': None,
+                             'status': 'PUBLISHED',
+                             'syllabus_id': 1,
+                             'version': 1,
+                             **data,
+                         }])
 
     def test_syllabus_id_version__post__autoincrement_version(self):
         """Test /certificate without auth"""
@@ -268,17 +271,19 @@ class CertificateTestSuite(AdmissionsTestCase):
 
         self.assertEqual(json, expected)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(self.all_syllabus_version_dict(), [{
-            **self.model_to_dict(model, 'syllabus_version')
-        }, {
-            'id': 2,
-            'integrity_check_at': None,
-            'integrity_report': None,
-            'integrity_status': 'PENDING',
-            'change_log_details': None,
-            'status': 'PUBLISHED',
-            'json': {},
-            'syllabus_id': 1,
-            'version': model.syllabus_version.version + 1,
-            **data,
-        }])
+        self.assertEqual(self.all_syllabus_version_dict(),
+                         [{
+                             **self.model_to_dict(model, 'syllabus_version')
+                         }, {
+                             'id': 2,
+                             'integrity_check_at': None,
+                             'integrity_report': None,
+                             'integrity_status': 'PENDING',
+                             'change_log_details': None,
+                             'status': 'PUBLISHED',
+                             'json': {},
+                             'json_hash': SyllabusVersion(json=data['json']).hashed_json(),
+                             'syllabus_id': 1,
+                             'version': model.syllabus_version.version + 1,
+                             **data,
+                         }])
@@ -3,7 +3,7 @@ import os
 
 import pytz
 from django.contrib.auth.models import AnonymousUser, User
-from django.db.models import FloatField, Max, Q, Value
+from django.db.models import F, FloatField, Max, Q, Value
 from django.http import HttpResponseRedirect
 from django.utils import timezone
 from rest_framework import status
@@ -24,7 +24,8 @@ from breathecode.utils import (APIViewExtensions, DatetimeInteger, GenerateLooku
 from breathecode.utils.decorators import has_permission
 from breathecode.utils.find_by_full_name import query_like_by_full_name
 
-from .actions import find_asset_on_json, test_syllabus, update_asset_on_json
+from .actions import (KM_PER_DEGREE, find_asset_on_json, haversine_expression, test_syllabus,
+                      update_asset_on_json)
 from .models import (ACTIVE, DELETED, STUDENT, Academy, Cohort, CohortTimeSlot, CohortUser, Syllabus,
                      SyllabusSchedule, SyllabusScheduleTimeSlot, SyllabusVersion)
 from .serializers import (
@@ -90,7 +91,7 @@ class AcademyTeacherView(APIView, GenerateLookupsMixin):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = ProfileAcademy.objects.filter(academy__id=academy_id,
                                               role__slug__in=['teacher', 'assistant'
@@ -170,12 +171,11 @@ class PublicCohortView(APIView):
 
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
-        items = Cohort.objects.filter(private=False).select_related('syllabus_version__syllabus')
-
-        items = items.annotate(longitude=Value(None, output_field=FloatField()),
-                               latitude=Value(None, output_field=FloatField()))
+        # the syllabus json is not serialized in the listing
+        items = Cohort.objects.filter(
+            private=False).select_related('syllabus_version__syllabus').defer('syllabus_version__json')
 
         upcoming = request.GET.get('upcoming', None)
         if upcoming == 'true':
@@ -223,8 +223,27 @@ class PublicCohortView(APIView):
             if longitude > 180 or longitude < -180:
                 raise ValidationException('Bad longitude', slug='bad-longitude')
 
-            items = items.annotate(longitude=Value(longitude, FloatField()),
-                                   latitude=Value(latitude, FloatField()))
+            # the cohorts are sorted by distance before being paginated
+            items = items.annotate(
+                distance=haversine_expression(longitude, latitude, 'academy__longitude', 'academy__latitude'))
+            handler.sort.prepend(F('distance').asc(nulls_last=True))
+
+            if max_distance := request.GET.get('max_distance', ''):
+                try:
+                    max_distance = float(max_distance)
+                except ValueError:
+                    raise ValidationException('Bad max distance, it must be a number of kilometers',
+                                              slug='bad-max-distance')
+
+                # a degree of latitude is always the same distance, so the academies out of this range are
+                # discarded without calculating their distance
+                degrees = max_distance / KM_PER_DEGREE
+                items = items.filter(academy__latitude__gte=max(latitude - degrees, -90),
+                                     academy__latitude__lte=min(latitude + degrees, 90),
+                                     distance__lte=max_distance)
+
+        else:
+            items = items.annotate(distance=Value(None, output_field=FloatField()))
 
         saas = request.GET.get('saas', '').lower()
         if saas == 'true':
@@ -256,10 +275,8 @@ class PublicCohortView(APIView):
 
         items = handler.queryset(items)
         serializer = PublicCohortSerializer(items, many=True)
-        data = sorted(serializer.data,
-                      key=lambda x: x['distance'] or float('inf')) if coordinates else serializer.data
 
-        return handler.response(data)
+        return handler.response(serializer.data)
 
 
 class AcademyReportView(APIView):
@@ -358,7 +375,7 @@ class CohortUserView(APIView, GenerateLookupsMixin):
 
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = CohortUser.objects.all()
 
@@ -1081,7 +1098,7 @@ class CohortMeView(APIView, GenerateLookupsMixin):
 
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         if cohort_id is not None:
             if cohort_id.isnumeric():
@@ -1136,7 +1153,7 @@ class AcademyCohortView(APIView, GenerateLookupsMixin):
 
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         if cohort_id is not None:
             item = None
@@ -1151,7 +1168,8 @@ class AcademyCohortView(APIView, GenerateLookupsMixin):
             serializer = GetCohortSerializer(item, many=False)
             return handler.response(serializer.data)
 
-        items = Cohort.objects.filter(academy__id=academy_id)
+        items = Cohort.objects.filter(academy__id=academy_id).select_related(
+            'syllabus_version__syllabus').defer('syllabus_version__json')
 
         upcoming = request.GET.get('upcoming', None)
         if upcoming == 'true':
@@ -1738,7 +1756,7 @@ class PublicCohortUserView(APIView, GenerateLookupsMixin):
 
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = CohortUser.objects.all()
 
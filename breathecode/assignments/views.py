@@ -1,4 +1,4 @@
-from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.http import HttpResponseRedirect
 from breathecode.authenticate.actions import get_user_language
 from breathecode.authenticate.models import ProfileAcademy
 import logging, hashlib, os
@@ -17,7 +17,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from breathecode.utils import APIException
-from breathecode.utils.service import Service
+from breathecode.utils.views import proxy
 from .models import Task, FinalProject, UserAttachment
 from .actions import deliver_task
 from .caches import TaskCache
@@ -335,7 +335,7 @@ class CohortTaskView(APIView, GenerateLookupsMixin):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = Task.objects.all()
         lookup = {}
@@ -530,7 +530,7 @@ class TaskMeView(APIView):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         if not user_id:
             user_id = request.user.id
@@ -855,23 +855,7 @@ class MeCodeRevisionView(APIView):
 
         params['github_username'] = request.user.credentialsgithub.username
 
-        s = Service('rigobot', request.user.id)
-        response = s.get('/v1/finetuning/me/coderevision', params=params, stream=True)
-        resource = StreamingHttpResponse(
-            response.raw,
-            status=response.status_code,
-            reason=response.reason,
-        )
-
-        header_keys = [
-            x for x in response.headers.keys() if x != 'Transfer-Encoding' and x != 'Content-Encoding'
-            and x != 'Keep-Alive' and x != 'Connection'
-        ]
-
-        for header in header_keys:
-            resource[header] = response.headers[header]
-
-        return resource
+        return proxy('rigobot', request.user.id, 'get', '/v1/finetuning/me/coderevision', params=params)
 
     def post(self, request, task_id):
         lang = get_user_language(request)
@@ -893,23 +877,12 @@ class MeCodeRevisionView(APIView):
         params['github_username'] = request.user.credentialsgithub.username
         params['repo'] = item.github_url
 
-        s = Service('rigobot', request.user.id)
-        response = s.post('/v1/finetuning/coderevision/', data=request.data, stream=True, params=params)
-        resource = StreamingHttpResponse(
-            response.raw,
-            status=response.status_code,
-            reason=response.reason,
-        )
-
-        header_keys = [
-            x for x in response.headers.keys() if x != 'Transfer-Encoding' and x != 'Content-Encoding'
-            and x != 'Keep-Alive' and x != 'Connection'
-        ]
-
-        for header in header_keys:
-            resource[header] = response.headers[header]
-
-        return resource
+        return proxy('rigobot',
+                     request.user.id,
+                     'post',
+                     '/v1/finetuning/coderevision/',
+                     data=request.data,
+                     params=params)
 
 
 class AcademyTaskCodeRevisionView(APIView):
@@ -926,47 +899,17 @@ class AcademyTaskCodeRevisionView(APIView):
         if task_id:
             params['repo'] = task.github_url
 
-        s = Service('rigobot')
-        response = s.get('/v1/finetuning/coderevision', params=params, stream=True)
-        resource = StreamingHttpResponse(
-            response.raw,
-            status=response.status_code,
-            reason=response.reason,
-        )
-
-        header_keys = [
-            x for x in response.headers.keys() if x != 'Transfer-Encoding' and x != 'Content-Encoding'
-            and x != 'Keep-Alive' and x != 'Connection'
-        ]
-
-        for header in header_keys:
-            resource[header] = response.headers[header]
-
-        return resource
+        return proxy('rigobot', None, 'get', '/v1/finetuning/coderevision', params=params)
 
 
 class MeCodeRevisionRateView(APIView):
 
     def post(self, request, coderevision_id):
-        s = Service('rigobot', request.user.id)
-        response = s.post(f'/v1/finetuning/rate/coderevision/{coderevision_id}',
-                          data=request.data,
-                          stream=True)
-        resource = StreamingHttpResponse(
-            response.raw,
-            status=response.status_code,
-            reason=response.reason,
-        )
-
-        header_keys = [
-            x for x in response.headers.keys() if x != 'Transfer-Encoding' and x != 'Content-Encoding'
-            and x != 'Keep-Alive' and x != 'Connection'
-        ]
-
-        for header in header_keys:
-            resource[header] = response.headers[header]
-
-        return resource
+        return proxy('rigobot',
+                     request.user.id,
+                     'post',
+                     f'/v1/finetuning/rate/coderevision/{coderevision_id}',
+                     data=request.data)
 
 
 class MeCommitFileView(APIView):
@@ -977,7 +920,6 @@ class MeCommitFileView(APIView):
         for key in request.GET.keys():
             params[key] = request.GET.get(key)
 
-        s = Service('rigobot', request.user.id)
         url = '/v1/finetuning/commitfile'
         task = None
         if commitfile_id is not None:
@@ -1001,19 +943,4 @@ class MeCommitFileView(APIView):
             params['repo'] = task.github_url
             params['watcher'] = task.user.credentialsgithub.username
 
-        response = s.get(url, params=params, stream=True)
-        resource = StreamingHttpResponse(
-            response.raw,
-            status=response.status_code,
-            reason=response.reason,
-        )
-
-        header_keys = [
-            x for x in response.headers.keys() if x != 'Transfer-Encoding' and x != 'Content-Encoding'
-            and x != 'Keep-Alive' and x != 'Connection'
-        ]
-
-        for header in header_keys:
-            resource[header] = response.headers[header]
-
-        return resource
+        return proxy('rigobot', request.user.id, 'get', url, params=params)
@@ -7,15 +7,16 @@ import random
 import re
 import secrets
 import string
+import time
 from typing import Any, Optional
 import urllib.parse
 from random import randint
 from django.core.handlers.wsgi import WSGIRequest
 import jwt
 import breathecode.notify.actions as notify_actions
-from functools import lru_cache
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 from django.db.models import Q
 from breathecode.admissions.models import Academy, CohortUser
@@ -23,7 +24,8 @@ from breathecode.utils import ValidationException
 from breathecode.utils.i18n import translation
 from breathecode.services.github import Github
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
-from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat, PublicFormat
+from cryptography.hazmat.primitives.serialization import (Encoding, NoEncryption, PrivateFormat, PublicFormat,
+                                                          load_pem_private_key, load_pem_public_key)
 
 from .models import (App, CredentialsGithub, DeviceId, GitpodUser, ProfileAcademy, Role, Token, UserSetting,
                      AcademyAuthSettings, GithubAcademyUser, UserInvite)
@@ -60,17 +62,21 @@ def create_user(github_id=None, email=None):
     return user
 
 
-def delete_tokens(users=None, status='expired'):
+def delete_tokens(users=None, status='expired', batch_size=1000):
     now = timezone.now()
 
     tokens = Token.objects.all()
     if users is not None:
-        tokens = tokens.filter(user__id__in=[users])
+        tokens = tokens.filter(user__id__in=users)
     if status == 'expired':
-        tokens = Token.objects.filter(expires_at__lt=now)
+        tokens = tokens.filter(expires_at__lt=now)
+
+    # in batches, to avoid lock the whole table while they are deleted
+    count = 0
+    while ids := list(tokens.values_list('id', flat=True)[:batch_size]):
+        Token.objects.filter(id__in=ids).delete()
+        count += len(ids)
 
-    count = len(tokens)
-    tokens.delete()
     return count
 
 
@@ -787,7 +793,37 @@ def generate_auth_keys(algorithm) -> tuple[bytes, bytes]:
     return public_key, private_key
 
 
-@lru_cache(maxsize=100)
+APP_CACHE_VERSION_KEY = 'app_keys__version'
+APP_CACHE_TIMEOUT = 60 * 60 * 24
+
+# parsed keys and apps of the current process, they are discarded when the version changes
+_app_memo: dict[str, tuple[int, Any]] = {}
+
+
+def _get_app_cache_version() -> int:
+    version = cache.get(APP_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(APP_CACHE_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(APP_CACHE_VERSION_KEY)
+
+    return version
+
+
+def _memoize(key: str, version: int, value: Any) -> Any:
+    if len(_app_memo) >= 100:
+        _app_memo.clear()
+
+    _app_memo[key] = (version, value)
+    return value
+
+
+def _get_memoized(key: str, version: int) -> Any:
+    if (memo := _app_memo.get(key)) and memo[0] == version:
+        return memo[1]
+
+    return None
+
+
 def get_optional_scopes_set(scope_set_id):
     from .models import OptionalScopeSet
 
@@ -796,7 +832,7 @@ def get_optional_scopes_set(scope_set_id):
         raise Exception(f'Invalid scope set id: {scope_set_id}')
 
     # use structure that use lower memory
-    return tuple(sorted(x for x in scope_set.optional_scopes.all()))
+    return tuple(sorted(x.slug for x in scope_set.optional_scopes.all()))
 
 
 def get_user_scopes(app_slug, user_id):
@@ -806,8 +842,18 @@ def get_user_scopes(app_slug, user_id):
     (_, _, _, _, require_an_agreement, required_scopes, optional_scopes, _, _, _) = info
 
     if user_id and require_an_agreement:
-        agreement = AppUserAgreement.objects.filter(app__slug=app_slug, user__id=user_id).first()
-        if not agreement:
+        key = f'app_agreement__{_get_app_cache_version()}__{app_slug}__{user_id}'
+
+        # False means that the user has not accepted the agreement
+        if (agreement_scopes := cache.get(key)) is None:
+            agreement = AppUserAgreement.objects.filter(app__slug=app_slug, user__id=user_id).first()
+            agreement_scopes = False
+            if agreement:
+                agreement_scopes = get_optional_scopes_set(agreement.optional_scope_set.id)
+
+            cache.set(key, agreement_scopes, APP_CACHE_TIMEOUT)
+
+        if agreement_scopes is False:
             raise ValidationException('User has not accepted the agreement',
                                       slug='agreement-not-accepted',
                                       silent=True,
@@ -816,14 +862,13 @@ def get_user_scopes(app_slug, user_id):
                                           'user_id': user_id
                                       })
 
-        optional_scopes = get_optional_scopes_set(agreement.optional_scope_set.id)
+        optional_scopes = agreement_scopes
 
     # use structure that use lower memory
     return required_scopes, optional_scopes
 
 
-@lru_cache(maxsize=100)
-def get_app_keys(app_slug):
+def _load_app_keys(app_slug):
     from .models import App, Scope
 
     app = App.objects.filter(slug=app_slug).first()
@@ -875,18 +920,62 @@ def get_app_keys(app_slug):
     return info, key, legacy_key
 
 
+def _parse_keys(alg, key):
+    # the PEM keys are parsed once, the HMAC secrets are used as they are
+    if alg != 'EdDSA' or key is None:
+        return key
+
+    public_key, private_key = key
+    return (
+        load_pem_public_key(public_key) if public_key else None,
+        load_pem_private_key(private_key, password=None),
+    )
+
+
+def get_app_keys(app_slug):
+    """
+    Get the info and the keys of an app, the keys of an ED25519 app are returned already parsed.
+
+    They are shared between the processes through the cache, and kept parsed in the current process until
+    `reset_app_cache` is called.
+    """
+
+    version = _get_app_cache_version()
+    if (keys := _get_memoized(f'keys__{app_slug}', version)) is not None:
+        return keys
+
+    cache_key = f'app_keys__{version}__{app_slug}'
+    if (keys := cache.get(cache_key)) is None:
+        keys = _load_app_keys(app_slug)
+        cache.set(cache_key, keys, APP_CACHE_TIMEOUT)
+
+    info, key, legacy_key = keys
+    alg = info[1]
+
+    return _memoize(f'keys__{app_slug}', version, (info, _parse_keys(alg, key), _parse_keys(alg, legacy_key)))
+
+
 def reset_app_cache():
-    get_app.cache_clear()
-    get_app_keys.cache_clear()
-    get_optional_scopes_set.cache_clear()
+    try:
+        cache.incr(APP_CACHE_VERSION_KEY)
+
+    except ValueError:
+        cache.add(APP_CACHE_VERSION_KEY, time.time_ns() // 1000, timeout=None)
 
 
-def reset_app_user_cache():
-    get_optional_scopes_set.cache_clear()
+def reset_app_user_cache(app_slug: Optional[str] = None, user_id: Optional[int] = None):
+    if app_slug and user_id:
+        cache.delete(f'app_agreement__{_get_app_cache_version()}__{app_slug}__{user_id}')
+        return
+
+    reset_app_cache()
 
 
-@lru_cache(maxsize=100)
 def get_app(pk: str | int) -> App:
+    version = _get_app_cache_version()
+    if (app := _get_memoized(f'app__{pk}', version)) is not None:
+        return app
+
     kwargs = {}
 
     if isinstance(pk, int):
@@ -901,4 +990,4 @@ def get_app(pk: str | int) -> App:
     if not (app := App.objects.filter(**kwargs).first()):
         raise Exception('App not found')
 
-    return app
+    return _memoize(f'app__{pk}', version, app)
@@ -1,31 +1,81 @@
 # authentication.py
 
+import hashlib
+import os
+from datetime import datetime
+from typing import Optional
+
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 
+__all__ = ['ExpiringTokenAuthentication', 'revoke_tokens']
+
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', '300'))
+
+
+def _key(token: str) -> str:
+    # the keys are credentials, so they are not written raw in the cache
+    return 'token__' + hashlib.sha256(token.encode()).hexdigest()
+
+
+def revoke_tokens(*tokens: str) -> None:
+    """Forget the validated tokens, it must be called when a token is deleted or changed."""
+
+    cache.delete_many([_key(x) for x in tokens if x])
+
+
+def _timeout(expires_at: Optional[datetime], now: datetime) -> int:
+    if expires_at is None:
+        return TOKEN_CACHE_TIMEOUT
+
+    return min(TOKEN_CACHE_TIMEOUT, int((expires_at - now).total_seconds()))
+
 
 class ExpiringTokenAuthentication(TokenAuthentication):
     '''
     Expiring token for mobile and desktop clients.
     It expires every 24hrs requiring client to supply valid username
     and password for new one to be created.
+
+    The validated tokens are kept in the cache until they expire or `TOKEN_CACHE_TIMEOUT` seconds, the user is
+    always loaded again, so a deactivated user is rejected at once.
     '''
 
     def authenticate_credentials(self, key, request=None):
         from .models import Token
 
-        token = Token.objects.select_related('user').filter(key=key).first()
-        if token is None:
+        now = timezone.now()
+        cache_key = _key(key)
+
+        if (data := cache.get(cache_key)) is None:
+            data = Token.objects.filter(key=key).values('id', 'user_id', 'token_type', 'expires_at').first()
+            if data is None:
+                raise AuthenticationFailed({'error': 'Invalid or Inactive Token', 'is_authenticated': False})
+
+            if (timeout := _timeout(data['expires_at'], now)) > 0:
+                cache.set(cache_key, data, timeout)
+
+        user = User.objects.filter(id=data['user_id']).first()
+        if user is None:
+            revoke_tokens(key)
             raise AuthenticationFailed({'error': 'Invalid or Inactive Token', 'is_authenticated': False})
 
-        if not token.user.is_active:
+        if not user.is_active:
             raise AuthenticationFailed({'error': 'Invalid or inactive user', 'is_authenticated': False})
 
-        now = timezone.now()
-        if token.expires_at is not None and token.expires_at < now:
+        if data['expires_at'] is not None and data['expires_at'] < now:
             raise AuthenticationFailed({
-                'error': 'Token expired at ' + str(token.expires_at),
+                'error': 'Token expired at ' + str(data['expires_at']),
                 'is_authenticated': False
             })
-        return token.user, token
+
+        # it behaves like a token loaded from the database, so it can be deleted at logout
+        fields = {**data, 'key': key}
+        attnames = [x.attname for x in Token._meta.concrete_fields if x.attname in fields]
+        token = Token.from_db('default', attnames, [fields[x] for x in attnames])
+        token.user = user
+
+        return user, token
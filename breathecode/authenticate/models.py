@@ -1,6 +1,6 @@
 from datetime import datetime
 import re
-from typing import Any
+from typing import Any, Optional
 from django.contrib.auth.models import User, Group, Permission
 from django.core.exceptions import MultipleObjectsReturned
 from django.conf import settings
@@ -328,13 +328,10 @@ class AppUserAgreement(models.Model):
     def save(self, *args, **kwargs):
         from .actions import reset_app_user_cache
 
-        had_pk = self.pk
-
         self.full_clean()
         super().save(*args, **kwargs)
 
-        if had_pk:
-            reset_app_user_cache()
+        reset_app_user_cache(self.app.slug, self.user.id)
 
 
 LEGACY_KEY_LIFETIME = timezone.timedelta(minutes=2)
@@ -783,17 +780,23 @@ class Token(rest_framework.authtoken.models.Token):
         super().save(*args, **kwargs)
 
     @staticmethod
-    def delete_expired_tokens(utc_now: datetime = timezone.now()) -> None:
-        """Delete expired tokens"""
-        utc_now = timezone.now()
-        Token.objects.filter(expires_at__lt=utc_now).delete()
+    def delete_expired_tokens(utc_now: Optional[datetime] = None, batch_size: int = 1000) -> None:
+        """Delete expired tokens in batches, it's meant to be run periodically."""
+
+        if utc_now is None:
+            utc_now = timezone.now()
+
+        expired = Token.objects.filter(expires_at__lt=utc_now)
+        while ids := list(expired.values_list('id', flat=True)[:batch_size]):
+            Token.objects.filter(id__in=ids).delete()
 
     @classmethod
     def get_or_create(cls, user, token_type: str, **kwargs: Any):
         utc_now = timezone.now()
         kwargs['token_type'] = token_type
 
-        cls.delete_expired_tokens(utc_now)
+        # just the tokens of this user, the others are deleted by clean_expired_tokens
+        Token.objects.filter(user=user, expires_at__lt=utc_now).delete()
 
         if token_type not in TOKEN_TYPE:
             raise InvalidTokenType(f'Invalid token_type, correct values are {", ".join(TOKEN_TYPE)}')
@@ -833,7 +836,6 @@ class Token(rest_framework.authtoken.models.Token):
     @classmethod
     def get_valid(cls, token: str):
         utc_now = timezone.now()
-        cls.delete_expired_tokens(utc_now)
 
         # find among any non-expired token
         return Token.objects.filter(key=token).filter(Q(expires_at__gt=utc_now)
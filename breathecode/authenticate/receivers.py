@@ -1,15 +1,20 @@
 import logging
 from typing import Type
 
-from django.contrib.auth.models import Group, User
+from django.contrib.auth.models import Group, Permission, User
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models.signals import post_delete, post_save, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
 from breathecode.admissions.signals import student_edu_status_updated
-from breathecode.admissions.models import CohortUser
+from breathecode.admissions.models import Academy, CohortUser
 from django.dispatch import receiver
 from .tasks import async_remove_from_organization, async_add_to_organization
-from breathecode.authenticate.models import App, AppOptionalScope, AppRequiredScope, AppUserAgreement, ProfileAcademy
+from .actions import reset_app_cache, reset_app_user_cache
+from breathecode.authenticate.models import (App, AppOptionalScope, AppRequiredScope, AppUserAgreement,
+                                             Capability, LegacyKey, OptionalScopeSet, ProfileAcademy, Role,
+                                             Scope, Token)
 from breathecode.mentorship.models import MentorProfile
+from breathecode.authenticate.authentication import revoke_tokens
+from breathecode.utils.permission_resolver import clear_permissions, clear_user_permissions
 from django.db.models import Q
 from django.utils import timezone
 
@@ -140,3 +145,94 @@ def increment_on_delete_optional_scope(sender: Type[AppOptionalScope], instance:
                                        agreement_version=instance.app.agreement_version).exists():
         instance.app.agreement_version += 1
         instance.app.save()
+
+
+@receiver(post_save, sender=ProfileAcademy)
+@receiver(post_delete, sender=ProfileAcademy)
+def clear_permissions_of_profile_academy(sender: Type[ProfileAcademy], instance: ProfileAcademy, **kwargs):
+    if instance.user_id:
+        clear_user_permissions(instance.user_id)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Capability)
+@receiver(post_delete, sender=Capability)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Academy)
+def clear_permissions_of_everyone(sender, **kwargs):
+    clear_permissions()
+
+
+@receiver(post_init, sender=Academy)
+def keep_status_of_academy(sender: Type[Academy], instance: Academy, **kwargs):
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Academy)
+def clear_permissions_of_academy(sender: Type[Academy], instance: Academy, created: bool, **kwargs):
+    status = instance._loaded_status
+    instance._loaded_status = instance.status
+
+    # the permissions just keep the status of the academies, and a new academy does not have members yet
+    if not created and status != instance.status:
+        clear_permissions()
+
+
+@receiver(m2m_changed, sender=Role.capabilities.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def clear_permissions_on_m2m_changed(sender, action: str, **kwargs):
+    if action in ['post_add', 'post_remove', 'post_clear']:
+        clear_permissions()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def clear_permissions_of_user_on_m2m_changed(sender, instance, action: str, reverse: bool, pk_set: set,
+                                             **kwargs):
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    if not reverse:
+        clear_user_permissions(instance.id)
+
+    # the users of a group or a permission were changed, pk_set is None when all of them were removed
+    elif pk_set is None:
+        clear_permissions()
+
+    else:
+        for user_id in pk_set:
+            clear_user_permissions(user_id)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def revoke_cached_token(sender: Type[Token], instance: Token, **kwargs):
+    revoke_tokens(instance.key)
+
+
+@receiver(post_delete, sender=App)
+@receiver(post_save, sender=LegacyKey)
+@receiver(post_delete, sender=LegacyKey)
+@receiver(post_save, sender=Scope)
+@receiver(post_delete, sender=Scope)
+@receiver(post_save, sender=AppRequiredScope)
+@receiver(post_delete, sender=AppRequiredScope)
+@receiver(post_save, sender=AppOptionalScope)
+@receiver(post_delete, sender=AppOptionalScope)
+def reset_app_cache_of_everyone(sender, **kwargs):
+    reset_app_cache()
+
+
+@receiver(m2m_changed, sender=OptionalScopeSet.optional_scopes.through)
+def reset_app_cache_on_m2m_changed(sender, action: str, **kwargs):
+    if action in ['post_add', 'post_remove', 'post_clear']:
+        reset_app_cache()
+
+
+@receiver(post_delete, sender=AppUserAgreement)
+def reset_app_user_cache_on_delete(sender: Type[AppUserAgreement], instance: AppUserAgreement, **kwargs):
+    reset_app_user_cache(instance.app.slug, instance.user_id)
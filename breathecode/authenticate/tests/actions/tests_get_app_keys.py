@@ -0,0 +1,111 @@
+"""
+Test get_app_keys and get_user_scopes
+"""
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+from breathecode.authenticate.actions import get_app_keys, get_user_scopes
+from breathecode.authenticate.models import App, AppRequiredScope
+from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
+from breathecode.utils.validation_exception import ValidationException
+
+
+@pytest.fixture(autouse=True)
+def setup(db):
+    yield
+
+
+def test_app_not_found(bc: Breathecode):
+    with pytest.raises(ValidationException) as e:
+        get_app_keys('my-app')
+
+    assert e.value.slug == 'app-not-found'
+
+
+def test_keys_are_cached(bc: Breathecode, django_assert_num_queries):
+    model = bc.database.create(app={'algorithm': 'HMAC_SHA512', 'require_an_agreement': False})
+
+    with django_assert_num_queries(4):
+        info, key, legacy_key = get_app_keys(model.app.slug)
+
+    assert info[0] == model.app.id
+    assert info[1] == 'HS512'
+    assert key == (None, bytes.fromhex(model.app.private_key))
+    assert legacy_key is None
+
+    with django_assert_num_queries(0):
+        assert get_app_keys(model.app.slug) == (info, key, legacy_key)
+
+
+def test_ed25519_keys_are_parsed(bc: Breathecode):
+    model = bc.database.create(app={'algorithm': 'ED25519', 'public_key': None, 'private_key': ''})
+
+    info, key, _ = get_app_keys(model.app.slug)
+
+    assert info[1] == 'EdDSA'
+    assert isinstance(key[0], Ed25519PublicKey)
+    assert isinstance(key[1], Ed25519PrivateKey)
+
+
+def test_keys_rotated(bc: Breathecode):
+    model = bc.database.create(app={'algorithm': 'HMAC_SHA512', 'require_an_agreement': False})
+    _, key, _ = get_app_keys(model.app.slug)
+
+    model.app.private_key = ''
+    model.app.save()
+
+    app = App.objects.get(id=model.app.id)
+    _, new_key, _ = get_app_keys(model.app.slug)
+
+    assert new_key != key
+    assert new_key == (None, bytes.fromhex(app.private_key))
+
+
+def test_scopes_changed(bc: Breathecode, enable_signals):
+    enable_signals()
+
+    model = bc.database.create(app={'require_an_agreement': False},
+                               scope=[{
+                                   'slug': 'read:repo'
+                               }, {
+                                   'slug': 'write:repo'
+                               }],
+                               app_required_scope={'scope_id': 1})
+    info, _, _ = get_app_keys(model.app.slug)
+
+    assert info[5] == (model.scope[0].slug, )
+
+    AppRequiredScope.objects.create(app=model.app, scope=model.scope[1])
+    info, _, _ = get_app_keys(model.app.slug)
+
+    assert info[5] == tuple(sorted([model.scope[0].slug, model.scope[1].slug]))
+
+
+def test_agreement_not_accepted(bc: Breathecode, django_assert_num_queries):
+    model = bc.database.create(user=1, app={'require_an_agreement': True})
+    get_app_keys(model.app.slug)
+
+    for n in [1, 0]:
+        with django_assert_num_queries(n):
+            with pytest.raises(ValidationException) as e:
+                get_user_scopes(model.app.slug, model.user.id)
+
+        assert e.value.slug == 'agreement-not-accepted'
+
+
+def test_agreement_accepted(bc: Breathecode, django_assert_num_queries):
+    model = bc.database.create(user=1, app={'require_an_agreement': True})
+
+    with pytest.raises(ValidationException):
+        get_user_scopes(model.app.slug, model.user.id)
+
+    model = bc.database.create(user=model.user,
+                               app=model.app,
+                               scope={'slug': 'read:repo'},
+                               optional_scope_set={'optional_scopes': [1]},
+                               app_user_agreement=1)
+
+    assert get_user_scopes(model.app.slug, model.user.id) == ((), (model.scope.slug, ))
+
+    with django_assert_num_queries(0):
+        assert get_user_scopes(model.app.slug, model.user.id) == ((), (model.scope.slug, ))
@@ -0,0 +1,125 @@
+"""
+Test ExpiringTokenAuthentication
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from breathecode.authenticate.authentication import ExpiringTokenAuthentication, revoke_tokens
+from breathecode.authenticate.models import Token
+from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
+
+
+@pytest.fixture(autouse=True)
+def setup(db):
+    yield
+
+
+def authenticate(key):
+    return ExpiringTokenAuthentication().authenticate_credentials(key)
+
+
+def test_invalid_token(bc: Breathecode):
+    with pytest.raises(AuthenticationFailed) as e:
+        authenticate('abc')
+
+    assert e.value.detail == {'error': 'Invalid or Inactive Token', 'is_authenticated': 'False'}
+
+
+def test_token_cached(bc: Breathecode, django_assert_num_queries):
+    model = bc.database.create(user=1, token={'token_type': 'login'})
+
+    with django_assert_num_queries(2):
+        user, token = authenticate(model.token.key)
+
+    assert user == model.user
+    assert token == model.token
+    assert token.user == model.user
+
+    # just the user is loaded again
+    with django_assert_num_queries(1):
+        user, token = authenticate(model.token.key)
+
+    assert user == model.user
+    assert token == model.token
+
+
+def test_token_deleted(bc: Breathecode, enable_signals):
+    enable_signals()
+
+    model = bc.database.create(user=1, token={'token_type': 'login'})
+    authenticate(model.token.key)
+
+    model.token.delete()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(model.token.key)
+
+
+def test_token_revoked(bc: Breathecode):
+    model = bc.database.create(user=1, token={'token_type': 'login'})
+    authenticate(model.token.key)
+
+    Token.objects.filter(id=model.token.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    # it's still cached
+    authenticate(model.token.key)
+
+    revoke_tokens(model.token.key)
+
+    with pytest.raises(AuthenticationFailed) as e:
+        authenticate(model.token.key)
+
+    assert e.value.detail['error'].startswith('Token expired at')
+
+
+def test_user_deactivated(bc: Breathecode):
+    model = bc.database.create(user=1, token={'token_type': 'login'})
+    authenticate(model.token.key)
+
+    model.user.is_active = False
+    model.user.save()
+
+    with pytest.raises(AuthenticationFailed) as e:
+        authenticate(model.token.key)
+
+    assert e.value.detail == {'error': 'Invalid or inactive user', 'is_authenticated': 'False'}
+
+
+def test_expired_token_is_not_cached(bc: Breathecode, django_assert_num_queries):
+    model = bc.database.create(user=1,
+                               token={
+                                   'token_type': 'login',
+                                   'expires_at': timezone.now() - timedelta(seconds=1),
+                               })
+
+    for _ in range(2):
+        with django_assert_num_queries(2):
+            with pytest.raises(AuthenticationFailed):
+                authenticate(model.token.key)
+
+
+def test_token_deleted_at_logout(bc: Breathecode):
+    model = bc.database.create(user=1, token={'token_type': 'login'})
+    _, token = authenticate(model.token.key)
+
+    token.delete()
+    revoke_tokens(token.key)
+
+    assert bc.database.list_of('authenticate.Token') == []
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(model.token.key)
+
+
+def test_delete_expired_tokens(bc: Breathecode):
+    utc_now = timezone.now()
+    tokens = [{'token_type': 'login', 'expires_at': utc_now - timedelta(seconds=1)} for _ in range(3)]
+    tokens += [{'token_type': 'login', 'expires_at': utc_now + timedelta(days=1)}]
+    model = bc.database.create(user=1, token=tokens)
+
+    Token.delete_expired_tokens(batch_size=2)
+
+    assert bc.database.list_of('authenticate.Token') == [bc.format.to_dict(model.token[3])]
@@ -47,7 +47,7 @@ from breathecode.utils.views import (private_view, render_message, set_query_par
 from .actions import (generate_academy_token, get_app, get_user_language, resend_invite, reset_password,
                       set_gitpod_user_expiration, update_gitpod_users, sync_organization_members,
                       get_github_scopes, accept_invite)
-from .authentication import ExpiringTokenAuthentication
+from .authentication import ExpiringTokenAuthentication, revoke_tokens
 from .forms import (InviteForm, LoginForm, PasswordChangeCustomForm, PickPasswordForm, ResetPasswordForm,
                     SyncGithubUsersForm)
 from .models import (App, AppOptionalScope, AppRequiredScope, AppUserAgreement, CredentialsFacebook,
@@ -155,6 +155,7 @@ class LogoutView(APIView):
     def get(self, request):
         Token.objects.filter(token_type='login').delete()
         request.auth.delete()
+        revoke_tokens(request.auth.key)
         return Response({
             'message': 'User tokens successfully deleted',
         })
@@ -1,9 +1,20 @@
+from typing import Optional
 from breathecode.utils import CACHE_DESCRIPTORS
 
 __all__ = ['clean_cache']
 
 
-def clean_cache(key):
+def clean_cache(key, instance: Optional[object] = None):
     if key in CACHE_DESCRIPTORS:
         cache = CACHE_DESCRIPTORS[key]
-        cache.clear()
+
+        if instance is None or not cache.lookups:
+            cache.clear()
+            return
+
+        lookups = cache.get_lookups(instance, getattr(instance, '_cache_lookups', None))
+
+        # the next save of the instance starts from the values that it has now
+        instance._cache_lookups = cache.get_loaded_lookups(instance)
+
+        cache.invalidate(**lookups)
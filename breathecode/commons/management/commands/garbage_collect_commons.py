@@ -1,18 +1,26 @@
+import os
 from django.core.management.base import BaseCommand, CommandError
 from ...models import TaskManager
 from datetime import datetime
 from datetime import timedelta
 from django.utils import timezone
 
+BATCH_SIZE = 1000
+
 
 class Command(BaseCommand):
     help = 'Delete logs and other garbage'
 
     def handle(self, *args, **options):
-        date_limit = timezone.now() - timedelta(days=2)
+        ttl = int(os.getenv('TASK_MANAGER_TTL', '2'))
+        date_limit = timezone.now() - timedelta(days=ttl)
 
         webhooks = TaskManager.objects.filter(created_at__lt=date_limit)
-        count = webhooks.count()
-        webhooks.delete()
+        count = 0
+
+        # delete them in batches to avoid to lock the table for a long time
+        while ids := list(webhooks.values_list('id', flat=True)[:BATCH_SIZE]):
+            TaskManager.objects.filter(id__in=ids).delete()
+            count += len(ids)
 
         self.stdout.write(self.style.SUCCESS(f"Successfully deleted {str(count)} TaskManager's"))
@@ -9,12 +9,12 @@ logger = logging.getLogger(__name__)
 
 
 @receiver(post_save)
-def clean_cache_after_save(sender, **kwargs):
+def clean_cache_after_save(sender, instance, **kwargs):
     key = hash(sender)
-    actions.clean_cache(key)
+    actions.clean_cache(key, instance)
 
 
 @receiver(post_delete)
-def clean_cache_after_delete(sender, **kwargs):
+def clean_cache_after_delete(sender, instance, **kwargs):
     key = hash(sender)
-    actions.clean_cache(key)
+    actions.clean_cache(key, instance)
@@ -34,20 +34,18 @@ class TestLead(LegacyAPITestCase):
 
                 x = self.bc.database.create(**lookups)
 
-                cache.set(
-                    f'{model}__keys', f'["{model}__", "{model}__sort=slug&slug=100%2C101%2C110%2C111", '
-                    f'"{model}__id=1", "{model}__id=2"]')
+                version = CACHE[model].__generate_version__()
 
-                cache.set(f'{model}__', json_data)
-                cache.set(f'{model}__sort=slug&slug=100%2C101%2C110%2C111', json_data)
-                cache.set(f'{model}__id=1', json_data)
-                cache.set(f'{model}__id=2', json_data)
+                cache.set(f'{model}__{version}__', json_data)
+                cache.set(f'{model}__{version}__sort=slug&slug=100%2C101%2C110%2C111', json_data)
+                cache.set(f'{model}__{version}__id=1', json_data)
+                cache.set(f'{model}__{version}__id=2', json_data)
 
                 getattr(x, attr).delete()
 
-                self.assertEqual(CACHE[model].keys(), [])
+                assert CACHE[model].__generate_version__() != version
 
-                self.assertEqual(cache.get(f'{model}__'), None)
-                self.assertEqual(cache.get(f'{model}__sort=slug&slug=100%2C101%2C110%2C111'), None)
-                self.assertEqual(cache.get(f'{model}__id=1'), None)
-                self.assertEqual(cache.get(f'{model}__id=2'), None)
+                self.assertEqual(CACHE[model].get(), None)
+                self.assertEqual(CACHE[model].get(sort='slug', slug='100,101,110,111'), None)
+                self.assertEqual(CACHE[model].get(id=1), None)
+                self.assertEqual(CACHE[model].get(id=2), None)
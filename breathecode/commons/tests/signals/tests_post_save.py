@@ -2,11 +2,14 @@ import re
 import json
 from django.core.cache import cache
 from breathecode.admissions.caches import CohortCache
+from breathecode.admissions.models import Cohort
+from breathecode.registry.caches import AssetCache
 from breathecode.events.caches import EventCache
 from breathecode.tests.mixins.legacy import LegacyAPITestCase
 
 cohort_cache = CohortCache()
 event_cache = EventCache()
+asset_cache = AssetCache()
 
 CACHE = {'Cohort': CohortCache(), 'Event': EventCache()}
 
@@ -32,20 +35,107 @@ class TestLeadTestSuite(LegacyAPITestCase):
             for expected in cases:
 
                 json_data = json.dumps(expected)
-                cache.set(
-                    f'{model}__keys', f'["{model}__", "{model}__sort=slug&slug=100%2C101%2C110%2C111", '
-                    f'"{model}__id=1", "{model}__id=2"]')
+                version = CACHE[model].__generate_version__()
 
-                cache.set(f'{model}__', json_data)
-                cache.set(f'{model}__sort=slug&slug=100%2C101%2C110%2C111', json_data)
-                cache.set(f'{model}__id=1', json_data)
-                cache.set(f'{model}__id=2', json_data)
+                cache.set(f'{model}__{version}__', json_data)
+                cache.set(f'{model}__{version}__sort=slug&slug=100%2C101%2C110%2C111', json_data)
+                cache.set(f'{model}__{version}__id=1', json_data)
+                cache.set(f'{model}__{version}__id=2', json_data)
 
                 self.bc.database.create(**lookups)
 
-                self.assertEqual(CACHE[model].keys(), [])
+                assert CACHE[model].__generate_version__() != version
 
-                self.assertEqual(cache.get(f'{model}__'), None)
-                self.assertEqual(cache.get(f'{model}__sort=slug&slug=100%2C101%2C110%2C111'), None)
-                self.assertEqual(cache.get(f'{model}__id=1'), None)
-                self.assertEqual(cache.get(f'{model}__id=2'), None)
+                self.assertEqual(CACHE[model].get(), None)
+                self.assertEqual(CACHE[model].get(sort='slug', slug='100,101,110,111'), None)
+                self.assertEqual(CACHE[model].get(id=1), None)
+                self.assertEqual(CACHE[model].get(id=2), None)
+
+    def test_post_save__cohort__scoped_by_academy(self, enable_signals):
+        enable_signals()
+
+        cache.clear()
+
+        model = self.bc.database.create(academy=2)
+
+        cohort_cache.set([{'x': 1}], academy_id=1)
+        cohort_cache.set([{'x': 2}], academy_id=2)
+        cohort_cache.set([{'x': 3}])
+
+        self.bc.database.create(cohort={'academy': model.academy[0]})
+
+        self.assertEqual(cohort_cache.get(academy_id=1), None)
+        self.assertEqual(cohort_cache.get(academy_id=2), [{'x': 2}])
+        self.assertEqual(cohort_cache.get(), None)
+
+    def test_post_save__cohort__moved_to_other_academy(self, enable_signals):
+        enable_signals()
+
+        cache.clear()
+
+        model = self.bc.database.create(academy=3, cohort={'academy_id': 1})
+
+        cohort_cache.set([{'x': 1}], academy_id=1)
+        cohort_cache.set([{'x': 2}], academy_id=2)
+        cohort_cache.set([{'x': 3}], academy_id=3)
+
+        model.cohort.academy = model.academy[1]
+        model.cohort.save()
+
+        self.assertEqual(cohort_cache.get(academy_id=1), None)
+        self.assertEqual(cohort_cache.get(academy_id=2), None)
+        self.assertEqual(cohort_cache.get(academy_id=3), [{'x': 3}])
+
+    def test_post_save__cohort__loaded_and_moved_to_other_academy(self, enable_signals):
+        enable_signals()
+
+        cache.clear()
+
+        model = self.bc.database.create(academy=3, cohort={'academy_id': 1})
+
+        cohort_cache.set([{'x': 1}], academy_id=1)
+        cohort_cache.set([{'x': 2}], academy_id=2)
+        cohort_cache.set([{'x': 3}], academy_id=3)
+
+        # the previous academy is kept when the cohort is loaded, so it is not fetched again on save
+        cohort = Cohort.objects.get(id=model.cohort.id)
+        assert cohort._cache_lookups == {'academy_id': 1}
+
+        cohort.academy = model.academy[1]
+        cohort.save()
+
+        self.assertEqual(cohort_cache.get(academy_id=1), None)
+        self.assertEqual(cohort_cache.get(academy_id=2), None)
+        self.assertEqual(cohort_cache.get(academy_id=3), [{'x': 3}])
+
+    def test_invalidate_queryset__cohort(self):
+        cache.clear()
+
+        model = self.bc.database.create(academy=2, cohort={'academy_id': 1})
+
+        cohort_cache.set([{'x': 1}], academy_id=1)
+        cohort_cache.set([{'x': 2}], academy_id=2)
+
+        cohort_cache.invalidate_queryset(Cohort.objects.filter(id=model.cohort.id))
+
+        self.assertEqual(cohort_cache.get(academy_id=1), None)
+        self.assertEqual(cohort_cache.get(academy_id=2), [{'x': 2}])
+
+    def test_post_save__asset__scoped_by_slug_and_aliases(self, enable_signals):
+        enable_signals()
+
+        cache.clear()
+
+        model = self.bc.database.create(asset={'slug': 'first-asset'},
+                                        asset_alias={'slug': 'old-first-asset'})
+
+        asset_cache.set({'x': 1}, asset_slug='first-asset')
+        asset_cache.set({'x': 2}, asset_slug='old-first-asset')
+        asset_cache.set({'x': 3}, asset_slug='second-asset')
+
+        model.asset.title = 'New title'
+        model.asset.save()
+
+        self.assertEqual(asset_cache.get(asset_slug='first-asset'), None)
+        self.assertEqual(asset_cache.get(asset_slug='old-first-asset'), None)
+        self.assertEqual(asset_cache.get(asset_slug='second-asset'), {'x': 3})
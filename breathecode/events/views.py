@@ -414,7 +414,7 @@ class AcademyEventView(APIView, GenerateLookupsMixin):
 
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         if event_id is not None:
             single_event = Event.objects.filter(id=event_id, academy__id=academy_id).first()
@@ -1,17 +1,20 @@
-import os, re, requests, json
+import os, re, requests, json, time
 from typing import Optional
 from itertools import chain
+from urllib import parse
+from django.core.cache import cache
+from django.db.models import F
 from django.utils import timezone
 
 from breathecode.utils.i18n import translation
-from .models import FormEntry, Tag, Automation, ActiveCampaignAcademy, AcademyAlias
+from .models import FormEntry, Tag, Automation, ActiveCampaignAcademy, AcademyAlias, ShortLink
 from rest_framework.exceptions import APIException
 from breathecode.notify.actions import send_email_message
 from breathecode.authenticate.models import CredentialsFacebook
 from breathecode.services.activecampaign import AC_Old_Client, ActiveCampaign, ActiveCampaignClient
 from breathecode.utils.validation_exception import ValidationException
 from breathecode.marketing.models import Tag
-from breathecode.utils import getLogger
+from breathecode.utils import getLogger, BufferedCounter
 import numpy as np
 
 logger = getLogger(__name__)
@@ -673,3 +676,96 @@ def convert_data_frame(item):
         if isinstance(item[key], np.ndarray):
             item[key] = item[key].tolist()
     return item
+
+
+SHORT_LINKS_VERSION_KEY = 'short_links__version'
+SHORT_LINK_TIMEOUT = 60 * 60
+
+CLICKS_QUEUE = 'short_links__clicks'
+CLICKS_BATCH_SIZE = 500
+CLICKS_FLUSH_INTERVAL = int(os.getenv('SHORT_LINK_FLUSH_INTERVAL', '60'))
+
+# the destination of a clicked link is tested at most once in this interval
+DESTINATION_CHECK_INTERVAL = int(os.getenv('SHORT_LINK_CHECK_INTERVAL', str(60 * 60 * 24)))
+
+
+def clear_short_links_cache():
+    try:
+        cache.incr(SHORT_LINKS_VERSION_KEY)
+
+    except ValueError:
+        cache.add(SHORT_LINKS_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def get_short_link_url(slug: str) -> Optional[str]:
+    """Get the url where a short link redirects to, or None if it does not exist or it is not active."""
+
+    if (version := cache.get(SHORT_LINKS_VERSION_KEY)) is None:
+        cache.add(SHORT_LINKS_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(SHORT_LINKS_VERSION_KEY)
+
+    key = f'short_links__{version}__{slug}'
+    if (url := cache.get(key)) is not None:
+        return url or None
+
+    short_link = ShortLink.objects.filter(slug=slug, active=True).first()
+    if short_link is None:
+        # the misses are cached too, the version changes when a link is created
+        cache.set(key, '', SHORT_LINK_TIMEOUT)
+        return None
+
+    params = {}
+    if short_link.utm_source is not None:
+        params['utm_source'] = short_link.utm_source
+    if short_link.utm_content is not None:
+        params['utm_content'] = short_link.utm_content
+    if short_link.utm_medium is not None:
+        params['utm_medium'] = short_link.utm_medium
+    if short_link.utm_campaign is not None:
+        params['utm_campaign'] = short_link.utm_campaign
+
+    destination_params = {}
+    url_parts = short_link.destination.split('?')
+    if len(url_parts) > 1:
+        destination_params = dict(parse.parse_qsl(url_parts[1]))
+
+    params = {**destination_params, **params}
+    url = url_parts[0] + '?' + parse.urlencode(params)
+
+    cache.set(key, url, SHORT_LINK_TIMEOUT)
+    return url
+
+
+def _save_clicks(clicks: dict[str, int]) -> None:
+    groups = {}
+    for slug, hits in clicks.items():
+        groups.setdefault(hits, []).append(slug)
+
+    now = timezone.now()
+    for hits, group in groups.items():
+        ShortLink.objects.filter(slug__in=group).update(hits=F('hits') + hits, lastclick_at=now)
+
+
+short_link_clicks = BufferedCounter(CLICKS_QUEUE,
+                                    _save_clicks,
+                                    batch_size=CLICKS_BATCH_SIZE,
+                                    flush_interval=CLICKS_FLUSH_INTERVAL)
+
+
+def add_short_link_click(slug: str) -> None:
+    """Count a click of a short link, the clicks are saved in batches by `flush_short_link_clicks`."""
+
+    from .tasks import flush_short_link_clicks
+
+    if short_link_clicks.add(slug):
+        flush_short_link_clicks.apply_async(countdown=CLICKS_FLUSH_INTERVAL)
+
+
+def save_short_link_clicks(limit: int = CLICKS_BATCH_SIZE) -> list[str]:
+    """Save the clicks of a batch of links, it returns the slugs of the links that were updated."""
+
+    return list(short_link_clicks.flush(limit))
+
+
+def pending_short_link_clicks() -> int:
+    return short_link_clicks.pending()
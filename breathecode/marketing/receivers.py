@@ -1,4 +1,5 @@
 import logging
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from breathecode.authenticate.signals import academy_invite_accepted
 from breathecode.events.signals import event_saved
@@ -8,7 +9,8 @@ from breathecode.events.models import Event
 from breathecode.admissions.signals import student_edu_status_updated, cohort_saved, academy_saved
 from .models import FormEntry, ActiveCampaignAcademy
 import breathecode.marketing.tasks as tasks
-from .models import Downloadable, AcademyAlias
+import breathecode.marketing.actions as actions
+from .models import Downloadable, AcademyAlias, ShortLink
 from .signals import downloadable_saved
 from .tasks import add_downloadable_slug_as_acp_tag
 
@@ -68,3 +70,9 @@ def downloadable_post_save(sender, instance, created, *args, **kwargs):
         ac_academy = ActiveCampaignAcademy.objects.filter(academy__id=instance.academy.id).first()
         if ac_academy is not None:
             add_downloadable_slug_as_acp_tag.delay(instance.id, instance.academy.id)
+
+
+@receiver(post_save, sender=ShortLink)
+@receiver(post_delete, sender=ShortLink)
+def clear_short_links_cache(sender, **kwargs):
+    actions.clear_short_links_cache()
@@ -2,6 +2,7 @@ import re
 import os
 from typing import Optional
 from celery import shared_task, Task
+from django.core.cache import cache
 from django.utils import timezone
 from django.contrib.auth.models import User
 from breathecode.admissions.models import Academy, Cohort
@@ -13,7 +14,9 @@ from breathecode.utils.validation_exception import ValidationException
 from .models import AcademyAlias, FormEntry, ShortLink, ActiveCampaignWebhook, ActiveCampaignAcademy, Tag, Downloadable
 from breathecode.monitoring.models import CSVUpload
 from .serializers import (PostFormEntrySerializer)
-from .actions import register_new_lead, save_get_geolocal, acp_ids, bind_formentry_with_webhook
+from .actions import (register_new_lead, save_get_geolocal, acp_ids, bind_formentry_with_webhook,
+                      save_short_link_clicks, pending_short_link_clicks, CLICKS_BATCH_SIZE,
+                      CLICKS_FLUSH_INTERVAL, DESTINATION_CHECK_INTERVAL)
 
 logger = getLogger(__name__)
 is_test_env = os.getenv('ENV') == 'test'
@@ -72,27 +75,40 @@ def persist_single_lead(self, form_data):
 
 
 @shared_task(bind=True, base=BaseTaskWithRetry)
-def update_link_viewcount(self, slug):
-    logger.debug('Starting update_link_viewcount')
+def flush_short_link_clicks(self):
+    logger.debug('Starting flush_short_link_clicks')
+
+    for slug in save_short_link_clicks():
+        if cache.add(f'short_links__checked__{slug}', 1, timeout=DESTINATION_CHECK_INTERVAL):
+            check_short_link_destination.delay(slug)
+
+    pending = pending_short_link_clicks()
+
+    if pending >= CLICKS_BATCH_SIZE:
+        flush_short_link_clicks.delay()
+
+    elif pending:
+        flush_short_link_clicks.apply_async(countdown=CLICKS_FLUSH_INTERVAL)
+
+
+@shared_task(bind=True, base=BaseTaskWithRetry)
+def check_short_link_destination(self, slug):
+    logger.debug('Starting check_short_link_destination')
 
     sl = ShortLink.objects.filter(slug=slug).first()
     if sl is None:
         logger.debug(f'ShortLink with slug {slug} not found')
         return False
 
-    sl.hits = sl.hits + 1
-    sl.lastclick_at = timezone.now()
-    sl.save()
-
     result = test_link(url=sl.destination)
     if result['status_code'] < 200 or result['status_code'] > 299:
-        sl.destination_status_text = result['status_text']
-        sl.destination_status = 'ERROR'
-        sl.save()
+        destination_status = 'ERROR'
     else:
-        sl.destination_status = 'ACTIVE'
-        sl.destination_status_text = result['status_text']
-        sl.save()
+        destination_status = 'ACTIVE'
+
+    # the hits are updated by flush_short_link_clicks, so just the status is saved
+    ShortLink.objects.filter(id=sl.id).update(destination_status=destination_status,
+                                              destination_status_text=result['status_text'])
 
 
 @shared_task(bind=True, base=BaseTaskWithRetry)
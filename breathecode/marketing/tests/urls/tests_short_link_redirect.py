@@ -0,0 +1,90 @@
+"""
+Test /s/<slug>
+"""
+from unittest.mock import MagicMock, call
+
+import pytest
+from django.urls.base import reverse_lazy
+
+from breathecode.marketing import tasks
+from breathecode.tests.mixins.breathecode_mixin import Breathecode
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch):
+    monkeypatch.setattr('breathecode.marketing.tasks.flush_short_link_clicks.apply_async', MagicMock())
+    monkeypatch.setattr('breathecode.marketing.tasks.check_short_link_destination.delay', MagicMock())
+
+    yield
+
+
+def short_link(data={}):
+    return {
+        'slug': 'my-link',
+        'destination': 'https://4geeks.com/?lang=en',
+        'hits': 0,
+        'active': True,
+        'utm_source': 'ig',
+        'utm_content': None,
+        'utm_medium': None,
+        'utm_campaign': None,
+        **data,
+    }
+
+
+def test_not_found(bc: Breathecode, client):
+    url = reverse_lazy('marketing_shortner:slug', kwargs={'link_slug': 'my-link'})
+    response = client.get(url)
+
+    assert response.status_code == 404
+    assert tasks.flush_short_link_clicks.apply_async.call_args_list == []
+
+
+def test_clicks_are_saved_in_batches(bc: Breathecode, client):
+    bc.database.create(short_link=short_link())
+
+    url = reverse_lazy('marketing_shortner:slug', kwargs={'link_slug': 'my-link'})
+    responses = [client.get(url) for _ in range(3)]
+
+    for response in responses:
+        assert response.status_code == 302
+        assert response.url == 'https://4geeks.com/?lang=en&utm_source=ig'
+
+    assert [x['hits'] for x in bc.database.list_of('marketing.ShortLink')] == [0]
+    assert tasks.flush_short_link_clicks.apply_async.call_args_list == [call(countdown=60)]
+
+    tasks.flush_short_link_clicks()
+
+    links = bc.database.list_of('marketing.ShortLink')
+    assert [x['hits'] for x in links] == [3]
+    assert links[0]['lastclick_at'] is not None
+    assert tasks.check_short_link_destination.delay.call_args_list == [call('my-link')]
+
+    client.get(url)
+    tasks.flush_short_link_clicks()
+
+    assert [x['hits'] for x in bc.database.list_of('marketing.ShortLink')] == [4]
+
+    # the destination was checked recently
+    assert tasks.check_short_link_destination.delay.call_args_list == [call('my-link')]
+
+
+def test_cache_is_cleared_when_the_link_changes(bc: Breathecode, client, enable_signals):
+    model = bc.database.create(short_link=short_link())
+    enable_signals()
+
+    url = reverse_lazy('marketing_shortner:slug', kwargs={'link_slug': 'my-link'})
+    response = client.get(url)
+    assert response.url == 'https://4geeks.com/?lang=en&utm_source=ig'
+
+    model.short_link.destination = 'https://4geeks.com/es/'
+    model.short_link.save()
+
+    response = client.get(url)
+    assert response.url == 'https://4geeks.com/es/?utm_source=ig'
+
+    model.short_link.active = False
+    model.short_link.save()
+
+    response = client.get(url)
+    assert response.status_code == 404
@@ -45,8 +45,9 @@ from .serializers import (
     FormEntryHookSerializer,
 )
 from breathecode.services.activecampaign import ActiveCampaign
-from .actions import convert_data_frame, sync_tags, sync_automations, validate_email
-from .tasks import persist_single_lead, update_link_viewcount, async_activecampaign_webhook
+from .actions import (convert_data_frame, sync_tags, sync_automations, validate_email, get_short_link_url,
+                      add_short_link_click)
+from .tasks import persist_single_lead, async_activecampaign_webhook
 from .models import Course, ShortLink, ActiveCampaignAcademy, FormEntry, Tag, Automation, Downloadable, LeadGenerationApp, UTMField, AcademyAlias
 from breathecode.admissions.models import Academy
 from breathecode.utils.find_by_full_name import query_like_by_full_name
@@ -370,29 +371,13 @@ def sync_automations_with_active_campaign(request, academy_id):
 
 
 def redirect_link(request, link_slug):
-    short_link = ShortLink.objects.filter(slug=link_slug, active=True).first()
-    if short_link is None:
+    url = get_short_link_url(link_slug)
+    if url is None:
         return HttpResponseNotFound('URL not found')
 
-    update_link_viewcount.delay(short_link.slug)
-
-    params = {}
-    if short_link.utm_source is not None:
-        params['utm_source'] = short_link.utm_source
-    if short_link.utm_content is not None:
-        params['utm_content'] = short_link.utm_content
-    if short_link.utm_medium is not None:
-        params['utm_medium'] = short_link.utm_medium
-    if short_link.utm_campaign is not None:
-        params['utm_campaign'] = short_link.utm_campaign
-
-    destination_params = {}
-    url_parts = short_link.destination.split('?')
-    if len(url_parts) > 1:
-        destination_params = dict(parse.parse_qsl(url_parts[1]))
-
-    params = {**destination_params, **params}
-    return HttpResponseRedirect(redirect_to=url_parts[0] + '?' + parse.urlencode(params))
+    add_short_link_click(link_slug)
+
+    return HttpResponseRedirect(redirect_to=url)
 
 
 @api_view(['GET'])
@@ -0,0 +1,144 @@
+import logging
+import os
+import time
+from typing import Optional
+
+from django.core.cache import cache
+from django.db.models import F, Q
+
+from breathecode.utils import BufferedCounter
+
+from .models import Media, MediaResolution
+
+logger = logging.getLogger(__name__)
+
+MEDIA_VERSION_KEY = 'media__version'
+MEDIA_TIMEOUT = 60 * 60
+
+HITS_QUEUE = 'media__hits'
+HITS_BATCH_SIZE = 500
+HITS_FLUSH_INTERVAL = int(os.getenv('MEDIA_HITS_FLUSH_INTERVAL', '60'))
+
+# the cloud function takes a few seconds, the concurrent requests of the same resolution are asked to retry
+RESIZE_LOCK_TIMEOUT = 60
+RESIZE_RETRY_AFTER = int(os.getenv('MEDIA_RESIZE_RETRY_AFTER', '5'))
+
+# seconds that a request waits for the resolution made by another request before it gives up
+RESIZE_WAIT = float(os.getenv('MEDIA_RESIZE_WAIT', '5'))
+RESIZE_POLL_INTERVAL = 0.25
+
+# the masked files are streamed by the worker, it's released if the bucket does not answer in time
+MASK_TIMEOUT = float(os.getenv('MEDIA_MASK_TIMEOUT', '10'))
+
+HIT_MODELS = {
+    'media': Media,
+    'resolution': MediaResolution,
+}
+
+
+def clear_media_cache():
+    try:
+        cache.incr(MEDIA_VERSION_KEY)
+
+    except ValueError:
+        cache.add(MEDIA_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def _get_version() -> int:
+    if (version := cache.get(MEDIA_VERSION_KEY)) is None:
+        cache.add(MEDIA_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(MEDIA_VERSION_KEY)
+
+    return version
+
+
+def get_media(media_id: Optional[int] = None, media_slug: Optional[str] = None) -> Optional[dict]:
+    """Get the fields of a media that are needed to serve it, or None if it does not exist."""
+
+    lookup, value = ('id', media_id) if media_id else ('slug', media_slug)
+
+    key = f'media__{_get_version()}__{lookup}__{value}'
+    if (media := cache.get(key)) is not None:
+        return media or None
+
+    media = Media.objects.filter(**{lookup: value}).values('id', 'url', 'mime', 'hash').first()
+
+    # the misses are cached too, the version changes when a media is created
+    cache.set(key, media or {}, MEDIA_TIMEOUT)
+    return media
+
+
+def _resolution_key(hash: str, width: Optional[str], height: Optional[str]) -> str:
+    return f'media_resolution__{_get_version()}__{hash}__{width}__{height}'
+
+
+def get_media_resolution(hash: str, width: Optional[str], height: Optional[str]) -> Optional[dict]:
+    """Get the resolution of a media that matches the width or the height, or None if it was not made yet."""
+
+    key = _resolution_key(hash, width, height)
+    if (resolution := cache.get(key)) is not None:
+        return resolution
+
+    resolution = MediaResolution.objects.filter(Q(width=width) | Q(height=height),
+                                                hash=hash).values('id', 'width', 'height').first()
+
+    # the misses are not cached, the resolution is made by the request that receives them
+    if resolution:
+        cache.set(key, resolution, MEDIA_TIMEOUT)
+
+    return resolution
+
+
+def cache_media_resolution(hash: str, width: Optional[str], height: Optional[str],
+                           resolution: MediaResolution) -> dict:
+    fields = {'id': resolution.id, 'width': resolution.width, 'height': resolution.height}
+    cache.set(_resolution_key(hash, width, height), fields, MEDIA_TIMEOUT)
+    return fields
+
+
+def lock_media_resolution(hash: str, width: Optional[str], height: Optional[str]) -> bool:
+    """Return True if this request must make the resolution, just one request makes it at once."""
+
+    return cache.add(f'media_resolution__lock__{hash}__{width}__{height}', 1, timeout=RESIZE_LOCK_TIMEOUT)
+
+
+def unlock_media_resolution(hash: str, width: Optional[str], height: Optional[str]) -> None:
+    cache.delete(f'media_resolution__lock__{hash}__{width}__{height}')
+
+
+def _save_hits(hits: dict[tuple[str, int], int]) -> None:
+    groups = {}
+    for (model, pk), value in hits.items():
+        groups.setdefault((model, value), []).append(pk)
+
+    for (model, value), pks in groups.items():
+        HIT_MODELS[model].objects.filter(id__in=pks).update(hits=F('hits') + value)
+
+
+media_hits = BufferedCounter(HITS_QUEUE,
+                             _save_hits,
+                             batch_size=HITS_BATCH_SIZE,
+                             flush_interval=HITS_FLUSH_INTERVAL)
+
+
+def add_media_hits(media_id: int, resolution_id: Optional[int] = None) -> None:
+    """Count a hit of a media and its resolution, the hits are saved in batches by `flush_media_hits`."""
+
+    from .tasks import flush_media_hits
+
+    items = [('media', media_id)]
+    if resolution_id:
+        items.append(('resolution', resolution_id))
+
+    if media_hits.add(*items):
+        flush_media_hits.apply_async(countdown=HITS_FLUSH_INTERVAL)
+
+
+def save_media_hits(limit: int = HITS_BATCH_SIZE) -> int:
+    """Save the hits of a batch of media and resolutions, it returns the number of updated objects."""
+
+    return len(media_hits.flush(limit))
+
+
+def pending_media_hits() -> int:
+    return media_hits.pending()
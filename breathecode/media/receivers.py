@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import actions
+from .models import Media, MediaResolution
+
+
+@receiver(post_save, sender=Media)
+@receiver(post_delete, sender=Media)
+@receiver(post_delete, sender=MediaResolution)
+def clear_media_cache(sender, **kwargs):
+    actions.clear_media_cache()
+
+
+@receiver(post_save, sender=MediaResolution)
+def media_resolution_saved(sender, instance, created, **kwargs):
+    # the new resolutions are cached by the request that made them
+    if not created:
+        actions.clear_media_cache()
@@ -0,0 +1,29 @@
+import logging
+from celery import shared_task, Task
+
+from .actions import HITS_BATCH_SIZE, HITS_FLUSH_INTERVAL, pending_media_hits, save_media_hits
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTaskWithRetry(Task):
+    autoretry_for = (Exception, )
+    #                                           seconds
+    retry_kwargs = {'max_retries': 1, 'countdown': 60 * 5}
+    retry_backoff = True
+
+
+@shared_task(bind=True, base=BaseTaskWithRetry)
+def flush_media_hits(self):
+    logger.debug('Starting flush_media_hits')
+
+    saved = save_media_hits()
+    logger.debug(f'The hits of {saved} media and resolutions were saved')
+
+    pending = pending_media_hits()
+
+    if pending >= HITS_BATCH_SIZE:
+        flush_media_hits.delay()
+
+    elif pending:
+        flush_media_hits.apply_async(countdown=HITS_FLUSH_INTERVAL)
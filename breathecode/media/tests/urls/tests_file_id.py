@@ -9,6 +9,8 @@ from breathecode.tests.mocks import (
     REQUESTS_PATH,
     apply_requests_get_mock,
 )
+from breathecode.media import actions
+from breathecode.media.models import Media, MediaResolution
 from ..mixins import MediaTestCase
 
 RESIZE_IMAGE_URL = 'https://us-central1-labor-day-story.cloudfunctions.net/resize-image'
@@ -557,3 +559,114 @@ class MediaTestSuite(MediaTestCase):
                          }])
 
         self.assertEqual(self.all_media_resolution_dict(), [])
+
+    """
+    🔽🔽🔽 Cache and hits
+    """
+
+    @patch(
+        'os.getenv',
+        MagicMock(side_effect=apply_get_env({
+            'GOOGLE_PROJECT_ID': 'labor-day-story',
+            'MEDIA_GALLERY_BUCKET': 'bucket-name',
+        })))
+    @patch('breathecode.media.tasks.flush_media_hits.apply_async', MagicMock())
+    def test_file_id__cached__hits_are_buffered(self):
+        """Test /answer without auth"""
+        from breathecode.media.tasks import flush_media_hits
+
+        self.headers(academy=1)
+        model = self.generate_models(academy=True, media=True)
+        url = reverse_lazy('media:file_id', kwargs={'media_id': 1})
+
+        self.client.get(url)
+
+        # the update does not trigger the signals, so the url is served from the cache
+        Media.objects.filter(id=1).update(url='https://potato.io/other')
+        response = self.client.get(url)
+
+        self.assertEqual(response.url, model['media'].url)
+        self.assertEqual(response.status_code, status.HTTP_301_MOVED_PERMANENTLY)
+        self.assertEqual(flush_media_hits.apply_async.call_args_list, [call(countdown=60)])
+        self.assertEqual(self.all_media_dict()[0]['hits'], model['media'].hits)
+
+        self.assertEqual(actions.save_media_hits(), 1)
+        self.assertEqual(self.all_media_dict()[0]['hits'], model['media'].hits + 2)
+        self.assertEqual(actions.pending_media_hits(), 0)
+
+    @patch(
+        'os.getenv',
+        MagicMock(side_effect=apply_get_env({
+            'GOOGLE_PROJECT_ID': 'labor-day-story',
+            'MEDIA_GALLERY_BUCKET': 'bucket-name',
+        })))
+    @patch('breathecode.media.actions.RESIZE_WAIT', 0)
+    def test_file_id__with_width_in_querystring__resolution_being_made(self):
+        """Test /answer without auth"""
+        self.headers(academy=1)
+        media_kwargs = {'url': 'https://potato.io/harcoded', 'mime': 'image/png', 'hash': 'harcoded'}
+        model = self.generate_models(academy=True, media=True, media_kwargs=media_kwargs)
+
+        # another request is calling the cloud function
+        actions.lock_media_resolution('harcoded', '1000', None)
+
+        with patch(REQUESTS_PATH['request'], apply_requests_request_mock([resized_response()])) as mock:
+            url = reverse_lazy('media:file_id', kwargs={'media_id': 1}) + '?width=1000'
+            response = self.client.get(url)
+
+        json = response.json()
+        expected = {'detail': 'resizing-image', 'status_code': 503}
+
+        self.assertEqual(json, expected)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], str(actions.RESIZE_RETRY_AFTER))
+
+        self.assertEqual(mock.call_args_list, [])
+        self.assertEqual(self.all_media_dict(),
+                         [{
+                             **self.model_to_dict(model, 'media'),
+                             'hits': model['media'].hits + 1,
+                         }])
+
+        self.assertEqual(self.all_media_resolution_dict(), [])
+
+    @patch(
+        'os.getenv',
+        MagicMock(side_effect=apply_get_env({
+            'GOOGLE_PROJECT_ID': 'labor-day-story',
+            'MEDIA_GALLERY_BUCKET': 'bucket-name',
+        })))
+    def test_file_id__with_width_in_querystring__resolution_made_while_waiting(self):
+        """Test /answer without auth"""
+        self.headers(academy=1)
+        media_kwargs = {'url': 'https://potato.io/harcoded', 'mime': 'image/png', 'hash': 'harcoded'}
+        model = self.generate_models(academy=True, media=True, media_kwargs=media_kwargs)
+
+        # another request is calling the cloud function
+        actions.lock_media_resolution('harcoded', '1000', None)
+
+        def make_resolution(_):
+            MediaResolution.objects.create(width=1000, height=1000, hash='harcoded')
+
+        with patch(REQUESTS_PATH['request'], apply_requests_request_mock([resized_response()])) as mock:
+            with patch('time.sleep', MagicMock(side_effect=make_resolution)):
+                url = reverse_lazy('media:file_id', kwargs={'media_id': 1}) + '?width=1000'
+                response = self.client.get(url)
+
+        self.assertEqual(response.url, 'https://potato.io/harcoded-1000x1000')
+        self.assertEqual(response.status_code, status.HTTP_301_MOVED_PERMANENTLY)
+
+        self.assertEqual(mock.call_args_list, [])
+        self.assertEqual(self.all_media_dict(),
+                         [{
+                             **self.model_to_dict(model, 'media'),
+                             'hits': model['media'].hits + 1,
+                         }])
+
+        self.assertEqual(self.all_media_resolution_dict(), [{
+            'hash': 'harcoded',
+            'height': 1000,
+            'hits': 1,
+            'id': 1,
+            'width': 1000,
+        }])
@@ -1,8 +1,9 @@
 # from breathecode.media.schemas import MediaSchema
 from breathecode.media.schemas import FileSchema, MediaSchema
-import os, hashlib, requests, logging, datetime
+import os, hashlib, requests, logging, datetime, time
 from breathecode.services.google_cloud import FunctionV1
 from django.shortcuts import redirect
+from breathecode.media import actions
 from breathecode.media.models import Media, Category, MediaResolution
 from breathecode.utils import GenerateLookupsMixin, num_to_roman
 from rest_framework.views import APIView
@@ -497,45 +498,37 @@ class MaskingUrlView(APIView):
     permission_classes = [AllowAny]
     schema = FileSchema()
 
-    def get(self, request, media_id=None, media_slug=None):
-        lookups = {}
-        if media_id:
-            lookups['id'] = media_id
-        elif media_slug:
-            lookups['slug'] = media_slug.split('.')[0]  #ignore extension
+    def make_resolution(self, media, width, height):
+        """Resize the image, the concurrent requests of the same resolution wait for the first one."""
 
-        width = request.GET.get('width')
-        height = request.GET.get('height')
+        hash = media['hash']
 
-        media = Media.objects.filter(**lookups).first()
-        if not media:
-            raise ValidationException('Resource not found', code=404)
-
-        url = media.url
-
-        if width and height:
-            raise ValidationException(
-                'You need to pass either width or height, not both, in order to avoid losing aspect ratio',
-                code=400,
-                slug='width-and-height-in-querystring')
+        # the browsers ignore the Retry-After of the images, and the gevent workers are not blocked while the
+        # request waits, so it just is asked to retry later if the resize takes too long
+        deadline = time.monotonic() + actions.RESIZE_WAIT
+        while not actions.lock_media_resolution(hash, width, height):
+            if resolution := actions.get_media_resolution(hash, width, height):
+                return resolution
 
-        if (width or height) and not media.mime.startswith('image/'):
-            raise ValidationException('cannot resize this resource', code=400, slug='cannot-resize-media')
+            if time.monotonic() >= deadline:
+                raise ValidationException('The image is being resized, try again later',
+                                          code=503,
+                                          slug='resizing-image',
+                                          wait=actions.RESIZE_RETRY_AFTER)
 
-        # register click
-        media.hits = media.hits + 1
-        media.save()
+            time.sleep(actions.RESIZE_POLL_INTERVAL)
 
-        resolution = MediaResolution.objects.filter(Q(width=width)
-                                                    | Q(height=height), hash=media.hash).first()
+        try:
+            # it could have been made by another request after this one looked for it
+            if resolution := actions.get_media_resolution(hash, width, height):
+                return resolution
 
-        if (width or height) and not resolution:
             func = FunctionV1(region='us-central1', project_id=google_project_id(), name='resize-image')
 
             func_request = func.call({
                 'width': width,
                 'height': height,
-                'filename': media.hash,
+                'filename': hash,
                 'bucket': media_gallery_bucket(),
             })
 
@@ -549,23 +542,53 @@ class MaskingUrlView(APIView):
                                           code=500,
                                           slug='unhandled-cloud-function')
 
-            width = res['width']
-            height = res['height']
-            resolution = MediaResolution(width=width, height=height, hash=media.hash)
+            resolution = MediaResolution(width=res['width'], height=res['height'], hash=hash)
             resolution.save()
 
-        if (width or height):
-            width = resolution.width
-            height = resolution.height
+            return actions.cache_media_resolution(hash, width, height, resolution)
 
-            url = f'{url}-{width}x{height}'
-            resolution.hits = resolution.hits + 1
-            resolution.save()
+        finally:
+            actions.unlock_media_resolution(hash, width, height)
+
+    def get(self, request, media_id=None, media_slug=None):
+        if media_slug:
+            media_slug = media_slug.split('.')[0]  #ignore extension
+
+        width = request.GET.get('width')
+        height = request.GET.get('height')
+
+        media = actions.get_media(media_id=media_id, media_slug=media_slug)
+        if not media:
+            raise ValidationException('Resource not found', code=404)
+
+        url = media['url']
+
+        if width and height:
+            raise ValidationException(
+                'You need to pass either width or height, not both, in order to avoid losing aspect ratio',
+                code=400,
+                slug='width-and-height-in-querystring')
+
+        if (width or height) and not media['mime'].startswith('image/'):
+            raise ValidationException('cannot resize this resource', code=400, slug='cannot-resize-media')
+
+        resolution = None
+        try:
+            if width or height:
+                resolution = (actions.get_media_resolution(media['hash'], width, height)
+                              or self.make_resolution(media, width, height))
+
+        finally:
+            # register click, the hit of the media is counted even if its resolution could not be made
+            actions.add_media_hits(media['id'], resolution['id'] if resolution else None)
+
+        if resolution:
+            url = f'{url}-{resolution["width"]}x{resolution["height"]}'
 
         if request.GET.get('mask') != 'true':
             return redirect(url, permanent=True)
 
-        response = requests.get(url, stream=True)
+        response = requests.get(url, stream=True, timeout=actions.MASK_TIMEOUT)
         resource = StreamingHttpResponse(
             response.raw,
             status=response.status_code,
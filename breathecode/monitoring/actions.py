@@ -1,5 +1,7 @@
-import logging, time, datetime, hashlib, requests, csv
-from io import StringIO
+import logging, time, datetime, hashlib, requests, csv, codecs
+from concurrent.futures import ThreadPoolExecutor
+from gzip import GzipFile
+from io import StringIO, TextIOWrapper
 import json, re, os, subprocess, sys
 from django.utils import timezone
 from breathecode.utils import ScriptNotification
@@ -12,6 +14,19 @@ from breathecode.services.slack.actions.monitoring import render_snooze_text_end
 logger = logging.getLogger(__name__)
 
 USER_AGENT = 'BreathecodeMonitoring/1.0'
+
+# how many endpoints are tested at once, and how much of a body is read to diagnose it
+CONCURRENCY = int(os.getenv('MONITORING_CONCURRENCY', '20'))
+MAX_PAYLOAD_SIZE = int(os.getenv('MONITORING_MAX_PAYLOAD_SIZE', str(256 * 1024)))
+CHUNK_SIZE = 16 * 1024
+
+# how many rows of an export are fetched at once
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('DOWNLOADS_CHUNK_SIZE', '2000'))
+
+# fields written by `set_website_status`
+ENDPOINT_STATUS_FIELDS = [
+    'last_check', 'status', 'severity_level', 'status_text', 'response_text', 'status_code'
+]
 SCRIPT_HEADER = """
 # from django.conf import settings
 # import breathecode.settings as app_settings
@@ -23,6 +38,40 @@ SCRIPT_HEADER = """
 """
 
 
+def _read_payload(response, test_pattern=None):
+    """
+    Read the body of a streamed response, with a `test_pattern` it's read until the pattern matches.
+
+    The body is not read at all when it's not needed to diagnose the response, and it's never read beyond
+    `MAX_PAYLOAD_SIZE` bytes.
+    """
+
+    status_code = response.status_code
+    if test_pattern is None and status_code >= 200 and status_code <= 299:
+        return None
+
+    decoder = codecs.getincrementaldecoder(getattr(response, 'encoding', None) or 'utf-8')(errors='replace')
+    payload = ''
+    size = 0
+
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        size += len(chunk)
+        payload += decoder.decode(chunk)
+
+        if size >= MAX_PAYLOAD_SIZE:
+            break
+
+        # a match that ends before the end of the payload would not change with the next chunks
+        if test_pattern and status_code == 200 and (match := re.search(test_pattern, payload)) \
+                and match.end() < len(payload):
+            break
+
+    else:
+        payload += decoder.decode(b'', final=True)
+
+    return payload
+
+
 def test_link(url, test_pattern=None):
 
     headers = {'User-Agent': USER_AGENT}
@@ -35,15 +84,19 @@ def test_link(url, test_pattern=None):
     }
 
     try:
-        r = requests.get(url, headers=headers, timeout=2)
-        content_type = r.headers['content-type']
-        length = 0
-        if 'content-length' in r.headers:
-            length = r.headers['content-length']
-        result['status_code'] = r.status_code
+        r = requests.get(url, headers=headers, timeout=2, stream=True)
 
-        # if status is one error, we should need see the status text
-        result['payload'] = r.text
+        try:
+            length = 0
+            if 'content-length' in r.headers:
+                length = r.headers['content-length']
+            result['status_code'] = r.status_code
+
+            # if status is one error, we should need see the status text
+            result['payload'] = _read_payload(r, test_pattern)
+
+        finally:
+            r.close()
 
         if (test_pattern is None and not (result['status_code'] >= 200 and result['status_code'] <= 299)
                 and int(length) > 3000):
@@ -62,12 +115,10 @@ def test_link(url, test_pattern=None):
     return result
 
 
-def get_website_text(endp):
-    """Make a request to get the content of the given URL."""
+def set_website_status(endp, res):
+    """Apply the result of `test_link` to the endpoint, without saving it."""
 
-    res = test_link(endp.url, endp.test_pattern)
     status_code = res['status_code']
-    status_text = res['status_text']
     payload = res['payload']
 
     endp.last_check = timezone.now()
@@ -107,11 +158,83 @@ def get_website_text(endp):
         endp.response_text = None
 
     endp.status_code = status_code
+
+    return endp
+
+
+def get_website_text(endp):
+    """Make a request to get the content of the given URL."""
+
+    res = test_link(endp.url, endp.test_pattern)
+    set_website_status(endp, res)
     endp.save()
 
     return endp
 
 
+def get_due_endpoints(queryset=None):
+    """Get the endpoints that are not paused and whose frequency has been met."""
+
+    now = timezone.now()
+    if queryset is None:
+        queryset = Endpoint.objects.all()
+
+    queryset = queryset.exclude(paused_until__isnull=False,
+                                paused_until__gt=now).select_related('application')
+
+    return [
+        x for x in queryset
+        if x.last_check is None or x.last_check <= now - timezone.timedelta(minutes=x.frequency_in_minutes)
+    ]
+
+
+def get_endpoint_diagnostic(endpoint):
+    """Get the diagnostic of an endpoint that was tested already, like `run_endpoint_diagnostic` does."""
+
+    results = {'severity_level': 0, 'details': '', 'log': '', 'text': endpoint.response_text}
+
+    if endpoint.status != 'OPERATIONAL':
+        results['severity_level'] = endpoint.severity_level
+        if endpoint.special_status_text:
+            results['details'] += endpoint.special_status_text
+        results[endpoint.status] = [endpoint.url]
+
+    if results['severity_level'] == 0:
+        results['status'] = 'OPERATIONAL'
+    elif results['severity_level'] > 10:
+        results['status'] = 'CRITICAL'
+    else:
+        results['status'] = 'MINOR'
+
+    results['slack_payload'] = render_snooze_text_endpoint([endpoint])  # converting to json to send to slack
+
+    results['details'] = json.dumps(results, indent=4)
+    return results
+
+
+def run_endpoints_diagnostic(endpoints, max_workers=None):
+    """
+    Test many endpoints concurrently and save their results with a single query.
+
+    The requests are made by a bounded pool of threads, they don't touch the database, so the endpoints
+    must be fetched with their `application` before.
+    """
+
+    if not endpoints:
+        return []
+
+    def test(endpoint):
+        logger.debug(f'Testing endpoint: {endpoint.url}')
+        return set_website_status(endpoint, test_link(endpoint.url, endpoint.test_pattern))
+
+    with ThreadPoolExecutor(max_workers=min(max_workers or CONCURRENCY, len(endpoints))) as executor:
+        endpoints = list(executor.map(test, endpoints))
+
+    Endpoint.objects.bulk_update(endpoints, ENDPOINT_STATUS_FIELDS, batch_size=100)
+
+    return endpoints
+
+
 def run_app_diagnostic(app, report=False):
 
     failed_endpoints = []  # data to be send to slack
@@ -327,7 +450,13 @@ def run_script(script):
     return content is not None and script.status_code == 0
 
 
-def download_csv(module, model_name, ids_to_download, academy_id=None):
+def download_csv(module, model_name, ids_to_download, academy_id=None, compress=False):
+    """
+    Export the rows of a model to a CSV in the downloads bucket.
+
+    The rows are read from the database in chunks and uploaded while they are written, so the memory used
+    does not depend on the size of the export, the progress is saved in the `CSVDownload`.
+    """
 
     download = CSVDownload()
 
@@ -348,26 +477,47 @@ def download_csv(module, model_name, ids_to_download, academy_id=None):
         model = getattr(importlib.import_module(module), model_name)
 
         # finish the file name with <academy_slug>+<model_name>+<epoc_time>.csv
-        download.name = model_name + str(int(time.time())) + '.csv'
+        download.name = model_name + str(int(time.time())) + ('.csv.gz' if compress else '.csv')
+        download.total_rows = len(ids_to_download)
         download.save()
 
         meta = model._meta
         field_names = [field.name for field in meta.fields]
+
+        # the relations are exported as their string representation, they are fetched in the same query
+        relations = [field.name for field in meta.fields if field.is_relation]
+
         # rebuild query from the admin
-        queryset = model.objects.filter(pk__in=ids_to_download)
+        rows = model.objects.filter(pk__in=ids_to_download).select_related(*relations).iterator(
+            chunk_size=DOWNLOAD_CHUNK_SIZE)
+
+        # upload to google cloud bucket
+        from ..services.google_cloud import Storage
+        storage = Storage()
+        cloud_file = storage.file(downloads_bucket, download.name)
+
+        upload = cloud_file.writer(content_type='application/gzip' if compress else 'text/csv')
+        buffer = TextIOWrapper(GzipFile(fileobj=upload, mode='wb') if compress else upload,
+                               encoding='utf-8',
+                               newline='')
 
         #write csv
-        buffer = StringIO()
         writer = csv.writer(buffer)
         writer.writerow(field_names)
-        for obj in queryset:
-            writer.writerow((getattr(obj, field) for field in field_names))
 
-        # upload to google cloud bucket
-        from ..services.google_cloud import Storage
-        storage = Storage()
-        cloud_file = storage.file(os.getenv('DOWNLOADS_BUCKET', None), download.name)
-        cloud_file.upload(buffer.getvalue(), content_type='text/csv')
+        exported_rows = 0
+        for obj in rows:
+            writer.writerow(getattr(obj, field) for field in field_names)
+            exported_rows += 1
+
+            if exported_rows % DOWNLOAD_CHUNK_SIZE == 0:
+                CSVDownload.objects.filter(id=download.id).update(exported_rows=exported_rows)
+
+        # the gzip file does not close the upload
+        buffer.close()
+        upload.close()
+
+        download.exported_rows = exported_rows
         download.url = cloud_file.url()
         download.status = 'DONE'
         download.save()
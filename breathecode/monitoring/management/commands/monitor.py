@@ -5,7 +5,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import models as DM
 from django.db.models import Q, F
 from ...models import Application, MonitorScript
-from ...tasks import monitor_app, execute_scripts
+from ...tasks import monitor_endpoints, execute_scripts
 from ...actions import run_script
 
 
@@ -53,12 +53,13 @@ class Command(BaseCommand):
         func(options)
 
     def apps(self, options):
-        apps = Application.objects.all().values_list('id', flat=True)
+        apps = Application.objects.count()
 
-        for app_id in apps:
-            monitor_app.delay(app_id)
+        # the endpoints of all the apps are tested concurrently by a single task
+        if apps:
+            monitor_endpoints.delay()
 
-        self.stdout.write(self.style.SUCCESS(f'Enqueued {len(apps)} apps for diagnostic'))
+        self.stdout.write(self.style.SUCCESS(f'Enqueued {apps} apps for diagnostic'))
 
     def scripts(self, options):
         now = timezone.now()
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.19 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0018_auto_20230705_1635'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdownload',
+            name='exported_rows',
+            field=models.PositiveIntegerField(default=0, help_text='Rows written to the file so far'),
+        ),
+        migrations.AddField(
+            model_name='csvdownload',
+            name='total_rows',
+            field=models.PositiveIntegerField(default=0, help_text='Rows requested to be exported'),
+        ),
+    ]
@@ -146,6 +146,8 @@ class CSVDownload(models.Model):
     url = models.URLField()
     status = models.CharField(max_length=20, choices=DOWNLOAD_STATUS, default=LOADING)
     status_message = models.TextField(null=True, blank=True, default=None)
+    exported_rows = models.PositiveIntegerField(default=0, help_text='Rows written to the file so far')
+    total_rows = models.PositiveIntegerField(default=0, help_text='Rows requested to be exported')
 
     academy = models.ForeignKey(Academy, on_delete=models.CASCADE, null=True, blank=True, default=None)
 
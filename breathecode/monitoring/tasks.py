@@ -1,6 +1,7 @@
 from django.utils import timezone
 from celery import shared_task, Task
-from .actions import run_app_diagnostic, run_script, run_endpoint_diagnostic, download_csv
+from .actions import (run_app_diagnostic, run_script, run_endpoint_diagnostic, download_csv,
+                      get_due_endpoints, get_endpoint_diagnostic, run_endpoints_diagnostic)
 from .models import Application, MonitorScript, Endpoint, CSVDownload
 from breathecode.notify.actions import send_email_message, send_slack_raw
 import logging
@@ -32,31 +33,58 @@ def test_endpoint(self, endpoint_id):
         # the endpoint diagnostic did not run.
         return False
 
-    if result['status'] != 'OPERATIONAL':
-        if endpoint.application.notify_email:
-            send_email_message(
-                'diagnostic', endpoint.application.notify_email, {
-                    'subject': f'Errors found on app {endpoint.application.title} endpoint {endpoint.url}',
-                    'details': result['details']
-                })
-
-        if (endpoint.application.notify_slack_channel and endpoint.application.academy
-                and hasattr(endpoint.application.academy, 'slackteam')
-                and hasattr(endpoint.application.academy.slackteam.owner, 'credentialsslack')):
-            send_slack_raw(
-                'diagnostic', endpoint.application.academy.slackteam.owner.credentialsslack.token,
-                endpoint.application.notify_slack_channel.slack_id, {
-                    'subject': f'Errors found on app {endpoint.application.title} endpoint {endpoint.url}',
-                    **result,
-                })
+    notify_endpoint_status(endpoint, result)
+
+
+def notify_endpoint_status(endpoint, result):
+    if result['status'] == 'OPERATIONAL':
+        return
+
+    if endpoint.application.notify_email:
+        send_email_message(
+            'diagnostic', endpoint.application.notify_email, {
+                'subject': f'Errors found on app {endpoint.application.title} endpoint {endpoint.url}',
+                'details': result['details']
+            })
+
+    if (endpoint.application.notify_slack_channel and endpoint.application.academy
+            and hasattr(endpoint.application.academy, 'slackteam')
+            and hasattr(endpoint.application.academy.slackteam.owner, 'credentialsslack')):
+        send_slack_raw(
+            'diagnostic', endpoint.application.academy.slackteam.owner.credentialsslack.token,
+            endpoint.application.notify_slack_channel.slack_id, {
+                'subject': f'Errors found on app {endpoint.application.title} endpoint {endpoint.url}',
+                **result,
+            })
+
+
+def _monitor_endpoints(queryset=None):
+    endpoints = run_endpoints_diagnostic(get_due_endpoints(queryset))
+
+    # the results were saved already, so a notification that fails must not retry the task
+    for endpoint in endpoints:
+        try:
+            notify_endpoint_status(endpoint, get_endpoint_diagnostic(endpoint))
+
+        except Exception:
+            logger.exception(f'Error notifying the status of {endpoint.url}')
+
+    return len(endpoints)
 
 
 @shared_task(bind=True, base=BaseTaskWithRetry)
 def monitor_app(self, app_id):
     logger.debug('Starting monitor_app')
-    endpoints = Endpoint.objects.filter(application__id=app_id).values_list('id', flat=True)
-    for endpoint_id in endpoints:
-        test_endpoint.delay(endpoint_id)
+    _monitor_endpoints(Endpoint.objects.filter(application__id=app_id))
+
+
+@shared_task(bind=True, base=BaseTaskWithRetry)
+def monitor_endpoints(self):
+    """Test all the endpoints whose frequency has been met at once."""
+
+    logger.debug('Starting monitor_endpoints')
+    tested = _monitor_endpoints()
+    logger.debug(f'{tested} endpoints were tested')
 
 
 @shared_task(bind=True, base=BaseTaskWithRetry)
@@ -111,6 +139,6 @@ def execute_scripts(self, script_id):
 
 
 @shared_task(bind=True, base=BaseTaskWithRetry)
-def async_download_csv(self, module, model_name, ids_to_download):
+def async_download_csv(self, module, model_name, ids_to_download, compress=False):
     logger.debug('Starting to download csv for ')
-    return download_csv(module, model_name, ids_to_download)
+    return download_csv(module, model_name, ids_to_download, compress=compress)
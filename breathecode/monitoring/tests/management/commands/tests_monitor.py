@@ -328,9 +328,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
         import requests
         mock_breathecode = requests.get
 
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -375,9 +378,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -423,9 +429,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -469,9 +478,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -518,9 +530,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -567,9 +582,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -616,9 +634,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -665,9 +686,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -719,9 +743,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(len(mock_mailgun.call_args_list), 1)
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -775,9 +802,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -829,9 +859,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(mock_slack.call_args_list, [])
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     @patch(GOOGLE_CLOUD_PATH['client'], apply_google_cloud_client_mock())
     @patch(GOOGLE_CLOUD_PATH['bucket'], apply_google_cloud_bucket_mock())
@@ -885,9 +918,12 @@ class AcademyCohortTestSuite(MonitoringTestCase):
 
         self.assertEqual(mock_mailgun.call_args_list, [])
         self.assertEqual(len(mock_slack.call_args_list), 1)
-        self.assertEqual(
-            mock_breathecode.call_args_list,
-            [call('https://potato.io', headers={'User-Agent': 'BreathecodeMonitoring/1.0'}, timeout=2)])
+        self.assertEqual(mock_breathecode.call_args_list, [
+            call('https://potato.io',
+                 headers={'User-Agent': 'BreathecodeMonitoring/1.0'},
+                 timeout=2,
+                 stream=True)
+        ])
 
     """
     🔽🔽🔽 Scripts entity 🔽🔽🔽
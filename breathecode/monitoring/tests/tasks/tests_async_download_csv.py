@@ -0,0 +1,100 @@
+"""
+Test async_download_csv
+"""
+import csv
+import gzip
+from io import BytesIO, StringIO
+from unittest.mock import MagicMock
+
+import pytest
+
+from breathecode.monitoring import actions, tasks
+from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
+
+
+class Upload(BytesIO):
+
+    def __init__(self, files, name):
+        super().__init__()
+        self.files = files
+        self.name = name
+
+    def close(self):
+        if not self.closed:
+            self.files[self.name] = self.getvalue()
+
+        super().close()
+
+
+class File:
+
+    def __init__(self, files, name):
+        self.files = files
+        self.name = name
+        self.content_type = None
+
+    def writer(self, content_type='text/plain'):
+        self.content_type = content_type
+        return Upload(self.files, self.name)
+
+    def url(self):
+        return f'https://storage.cloud.google.com/downloads/{self.name}'
+
+
+@pytest.fixture
+def files(db, monkeypatch):
+    files = {}
+
+    storage = MagicMock()
+    storage.return_value.file.side_effect = lambda bucket, name: File(files, name)
+
+    monkeypatch.setenv('DOWNLOADS_BUCKET', 'downloads')
+    monkeypatch.setattr('breathecode.services.google_cloud.Storage', storage)
+    monkeypatch.setattr(actions, 'time', MagicMock(time=MagicMock(return_value=1000)))
+    yield files
+
+
+def test_export(bc: Breathecode, files, monkeypatch):
+    monkeypatch.setattr(actions, 'DOWNLOAD_CHUNK_SIZE', 2)
+
+    model = bc.database.create(application=3, academy=1)
+    tasks.async_download_csv.delay('breathecode.monitoring.models', 'Application', [1, 3])
+
+    downloads = bc.database.list_of('monitoring.CSVDownload')
+    assert [(x['name'], x['status'], x['status_message'], x['exported_rows'], x['total_rows'], x['url'])
+            for x in downloads] == [
+                ('Application1000.csv', 'DONE', None, 2, 2,
+                 'https://storage.cloud.google.com/downloads/Application1000.csv'),
+            ]
+
+    rows = list(csv.reader(StringIO(files['Application1000.csv'].decode())))
+    assert rows[0][:3] == ['id', 'title', 'academy']
+    assert [x[:3] for x in rows[1:]] == [
+        ['1', model.application[0].title, str(model.academy)],
+        ['3', model.application[2].title, str(model.academy)],
+    ]
+
+
+def test_export_compressed(bc: Breathecode, files):
+    bc.database.create(application=2)
+    tasks.async_download_csv.delay('breathecode.monitoring.models', 'Application', [1, 2], compress=True)
+
+    downloads = bc.database.list_of('monitoring.CSVDownload')
+    assert [(x['name'], x['status'], x['exported_rows']) for x in downloads] == [
+        ('Application1000.csv.gz', 'DONE', 2),
+    ]
+
+    rows = list(csv.reader(StringIO(gzip.decompress(files['Application1000.csv.gz']).decode())))
+    assert [x[0] for x in rows] == ['id', '1', '2']
+
+
+def test_export_without_bucket(bc: Breathecode, files, monkeypatch):
+    monkeypatch.delenv('DOWNLOADS_BUCKET')
+
+    tasks.async_download_csv.delay('breathecode.monitoring.models', 'Application', [1])
+
+    downloads = bc.database.list_of('monitoring.CSVDownload')
+    assert [(x['status'], x['status_message']) for x in downloads] == [
+        ('ERROR', 'Unknown DOWNLOADS_BUCKET configuration, please set env variable'),
+    ]
+    assert files == {}
@@ -0,0 +1,134 @@
+"""
+Test monitor_endpoints
+"""
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from django.utils import timezone
+
+from breathecode.monitoring import actions, tasks
+from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
+from breathecode.tests.mocks.requests import apply_requests_get_mock
+
+
+class StreamedResponse:
+
+    def __init__(self, status_code, chunks, delay=0):
+        self.status_code = status_code
+        self.headers = {'content-type': 'text/html'}
+        self.encoding = 'utf-8'
+        self.chunks = chunks
+        self.delay = delay
+        self.read = 0
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        time.sleep(self.delay)
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch):
+    monkeypatch.setattr('breathecode.monitoring.tasks.send_email_message', MagicMock())
+    monkeypatch.setattr('breathecode.monitoring.tasks.send_slack_raw', MagicMock())
+    yield
+
+
+def test_due_endpoints(bc: Breathecode, monkeypatch):
+    now = timezone.now()
+    endpoints = [
+        {
+            'url': 'https://potato.io/1',
+        },
+        {
+            'url': 'https://potato.io/2',
+            'last_check': now - timedelta(minutes=60),
+        },
+        {
+            'url': 'https://potato.io/3',
+            'last_check': now - timedelta(minutes=5),
+        },
+        {
+            'url': 'https://potato.io/4',
+            'paused_until': now + timedelta(minutes=5),
+        },
+    ]
+
+    model = bc.database.create(application={'notify_email': 'pokemon@potato.io'}, endpoint=endpoints)
+
+    monkeypatch.setattr(
+        'requests.get',
+        apply_requests_get_mock([
+            (200, 'https://potato.io/1', 'ok'),
+            (500, 'https://potato.io/2', 'ko'),
+        ]))
+
+    tasks.monitor_endpoints.delay()
+
+    urls = sorted(x[0][0] for x in requests.get.call_args_list)
+    assert urls == ['https://potato.io/1', 'https://potato.io/2']
+
+    db = bc.database.list_of('monitoring.Endpoint')
+    assert [(x['status'], x['status_code'], x['status_text'], x['response_text']) for x in db] == [
+        ('OPERATIONAL', 200, 'Status withing the 2xx range', None),
+        ('CRITICAL', 500, 'Status above 399', 'ko'),
+        *[(x.status, x.status_code, x.status_text, x.response_text) for x in model.endpoint[2:]],
+    ]
+
+    assert tasks.send_email_message.call_count == 1
+    assert tasks.send_email_message.call_args[0][1] == 'pokemon@potato.io'
+
+
+def test_endpoints_are_tested_concurrently(bc: Breathecode, monkeypatch):
+    bc.database.create(application=1, endpoint=[{'url': f'https://potato.io/{n}'} for n in range(10)])
+    monkeypatch.setattr('requests.get',
+                        MagicMock(side_effect=lambda *args, **kwargs: StreamedResponse(200, [], 0.3)))
+
+    start = time.monotonic()
+    tasks.monitor_endpoints.delay()
+
+    assert time.monotonic() - start < 1.5
+    assert requests.get.call_count == 10
+    assert [x['status'] for x in bc.database.list_of('monitoring.Endpoint')] == ['OPERATIONAL'] * 10
+
+
+def test_body_is_read_until_the_pattern_matches(monkeypatch):
+    response = StreamedResponse(200, [b'<html>', b'<h1>ok</h1>', b'<p>', b'</p></html>'])
+    monkeypatch.setattr('requests.get', MagicMock(return_value=response))
+
+    result = actions.test_link('https://potato.io', '<h1>ok</h1>')
+
+    assert result['status_code'] == 200
+    assert result['payload'] == '<html><h1>ok</h1><p>'
+    assert response.read == 3
+
+
+def test_body_is_not_read_without_pattern(monkeypatch):
+    response = StreamedResponse(200, [b'<html>', b'</html>'])
+    monkeypatch.setattr('requests.get', MagicMock(return_value=response))
+
+    result = actions.test_link('https://potato.io')
+
+    assert result['status_code'] == 200
+    assert result['payload'] is None
+    assert response.read == 0
+
+
+def test_body_is_not_read_beyond_the_limit(monkeypatch):
+    monkeypatch.setattr(actions, 'MAX_PAYLOAD_SIZE', 4)
+
+    response = StreamedResponse(500, [b'ab', b'cd', b'ef'])
+    monkeypatch.setattr('requests.get', MagicMock(return_value=response))
+
+    result = actions.test_link('https://potato.io')
+
+    assert result['status_code'] == 500
+    assert result['payload'] == 'abcd'
+    assert response.read == 2
@@ -54,10 +54,9 @@ def get_download(request, download_id=None):
             from ..services.google_cloud import Storage
             storage = Storage()
             cloud_file = storage.file(os.getenv('DOWNLOADS_BUCKET', None), download.name)
-            buffer = cloud_file.stream_download()
             return StreamingHttpResponse(
-                buffer.all(),
-                content_type='text/csv',
+                cloud_file.stream(),
+                content_type='application/gzip' if download.name.endswith('.gz') else 'text/csv',
                 headers={'Content-Disposition': f'attachment; filename={download.name}'},
             )
         else:
@@ -158,7 +158,8 @@ class HookForm(forms.ModelForm):
 
 class HookAdmin(admin.ModelAdmin):
     list_display = [
-        'user', 'target', 'event', 'service_id', 'total_calls', 'last_response_code', 'last_call_at'
+        'user', 'target', 'event', 'service_id', 'total_calls', 'total_failures', 'average_latency',
+        'last_response_code', 'last_call_at'
     ]
     search_fields = ['user__username', 'event', 'target', 'service_id']
     list_filter = ['event', 'last_response_code']
@@ -167,5 +168,11 @@ class HookAdmin(admin.ModelAdmin):
     ]
     form = HookForm
 
+    def average_latency(self, obj):
+        if not obj.total_calls:
+            return None
+
+        return f'{obj.total_latency / obj.total_calls:.3f}s'
+
 
 admin.site.register(HookModel, HookAdmin)
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.20 on 2026-10-18 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notify', '0010_auto_20220901_0323'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hook',
+            name='last_latency',
+            field=models.FloatField(blank=True, default=None, help_text='In seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='hook',
+            name='total_failures',
+            field=models.IntegerField(default=0,
+                                      help_text='Calls that failed because the target was not available'),
+        ),
+        migrations.AddField(
+            model_name='hook',
+            name='total_latency',
+            field=models.FloatField(default=0, help_text='Sum of the latency of all the calls, in seconds'),
+        ),
+    ]
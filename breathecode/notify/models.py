@@ -154,6 +154,10 @@ class AbstractHook(models.Model):
                                    help_text='Use this as an example on what you will be receiving')
 
     total_calls = models.IntegerField(default=0)
+    total_failures = models.IntegerField(default=0,
+                                         help_text='Calls that failed because the target was not available')
+    total_latency = models.FloatField(default=0, help_text='Sum of the latency of all the calls, in seconds')
+    last_latency = models.FloatField(null=True, blank=True, default=None, help_text='In seconds')
     last_call_at = models.DateTimeField(null=True, blank=True, default=None)
     last_response_code = models.IntegerField(null=True, blank=True, default=None)
 
@@ -1,4 +1,5 @@
 import logging
+from django.contrib.auth.models import User
 from django.dispatch import receiver
 from django.db.models import Avg
 from breathecode.authenticate.signals import invite_status_updated
@@ -21,7 +22,7 @@ from breathecode.admissions.signals import cohort_log_saved
 from breathecode.admissions.serializers import CohortUserHookSerializer
 from .tasks import send_mentorship_starting_notification
 from .utils.hook_manager import HookManager
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_init, post_save, post_delete
 
 logger = logging.getLogger(__name__)
 
@@ -145,3 +146,40 @@ def edu_status_updated(sender, instance, **kwargs):
                                     'edu_status_updated',
                                     payload_override=serializer.data,
                                     academy_override=academy)
+
+
+@receiver(post_save, sender=HookManager.get_hook_model())
+@receiver(post_delete, sender=HookManager.get_hook_model())
+def clear_hooks_cache(sender, **kwargs):
+    HookManager.clear_hooks_cache()
+
+
+@receiver(post_init, sender=User)
+def keep_superuser_of_user(sender, instance, **kwargs):
+    # deferred fields are missing in __dict__, so they are treated as unknown
+    instance._loaded_is_superuser = instance.__dict__.get('is_superuser')
+
+
+@receiver(post_save, sender=User)
+def clear_hooks_cache_of_superuser(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'is_superuser' not in update_fields:
+        return
+
+    was_superuser = getattr(instance, '_loaded_is_superuser', None)
+    if created:
+        changed = bool(instance.is_superuser)
+
+    else:
+        changed = was_superuser is None or was_superuser != instance.is_superuser
+
+    instance._loaded_is_superuser = instance.is_superuser
+
+    # the superusers receive the hooks of every academy
+    if changed:
+        HookManager.clear_hooks_cache()
+
+
+@receiver(post_delete, sender=User)
+def clear_hooks_cache_of_deleted_superuser(sender, instance, **kwargs):
+    if instance.is_superuser:
+        HookManager.clear_hooks_cache()
@@ -99,7 +99,32 @@ def async_slack_command(post_data):
         return False
 
 
-@task()
+def _deliver_hooks(target, deliveries, attempt):
+    from .utils.hook_delivery import deliver_hooks, is_circuit_open
+
+    if is_circuit_open(target):
+        logger.warning(f'The circuit of {target} is open, the hooks will be delivered later')
+        _schedule_retry(target, deliveries, attempt)
+        return
+
+    if failed := deliver_hooks(target, deliveries):
+        _schedule_retry(target, failed, attempt)
+
+
+def _schedule_retry(target, deliveries, attempt):
+    from .utils.hook_delivery import MAX_ATTEMPTS, get_retry_delay, is_circuit_open
+
+    if attempt + 1 >= MAX_ATTEMPTS:
+        logger.error(f'{len(deliveries)} hooks could not be delivered to {target}')
+        return
+
+    countdown = is_circuit_open(target) or get_retry_delay(attempt)
+    async_deliver_hooks.apply_async(args=(target, deliveries),
+                                    kwargs={'attempt': attempt + 1},
+                                    countdown=countdown)
+
+
+@task(bookkeeping='on_failure')
 def async_deliver_hook(target, payload, hook_id=None, **kwargs):
     """
     target:     the url to receive the payload.
@@ -108,78 +133,18 @@ def async_deliver_hook(target, payload, hook_id=None, **kwargs):
     hook:       the defining Hook object (useful for removing)
     """
 
-    from .utils.hook_manager import HookManager
+    _deliver_hooks(target, [(hook_id, payload)], attempt=0)
 
-    def parse_payload(payload: dict):
-        if not isinstance(payload, dict):
-            return payload
 
-        for key in payload.keys():
-            # TypeError("string indices must be integers, not 'str'")
-            if isinstance(payload[key], datetime):
-                payload[key] = payload[key].isoformat().replace('+00:00', 'Z')
-
-            elif isinstance(payload[key], Decimal):
-                payload[key] = str(payload[key])
-
-            elif isinstance(payload[key], list) or isinstance(payload[key], tuple) or isinstance(
-                    payload[key], set):
-                l = []
-                for item in payload[key]:
-                    l.append(parse_payload(item))
-
-                payload[key] = l
-
-            elif isinstance(payload[key], dict):
-                payload[key] = parse_payload(payload[key])
-
-        return payload
+@task(bookkeeping='on_failure')
+def async_deliver_hooks(target, deliveries, attempt=0, **kwargs):
+    """
+    Deliver many hooks to the same target.
 
-    logger.info('Starting async_deliver_hook')
+    target:     the url to receive the payloads.
+    deliveries: list of (hook_id, payload).
+    attempt:    number of previous attempts of these deliveries.
+    """
 
-    try:
-        if isinstance(payload, dict):
-            payload = parse_payload(payload)
-
-        elif isinstance(payload, list):
-            l = []
-            for item in payload:
-                l.append(parse_payload(item))
-
-            payload = l
-
-        encoded_payload = json.dumps(payload, cls=DjangoJSONEncoder)
-        response = requests.post(url=target,
-                                 data=encoded_payload,
-                                 headers={'Content-Type': 'application/json'},
-                                 timeout=2)
-
-        if hook_id:
-            HookModel = HookManager.get_hook_model()
-            hook = HookModel.objects.get(id=hook_id)
-            if response.status_code == 410:
-                hook.delete()
-
-            else:
-
-                data = hook.sample_data
-                if not isinstance(data, list):
-                    data = []
-
-                if 'data' in payload and isinstance(payload['data'], dict):
-                    data.append(payload['data'])
-                elif isinstance(payload, dict):
-                    data.append(json.loads(encoded_payload))
-
-                if len(data) > 10:
-                    data = data[1:10]
-
-                hook.last_response_code = response.status_code
-                hook.last_call_at = timezone.now()
-                hook.sample_data = data
-                hook.total_calls = hook.total_calls + 1
-                hook.save()
-
-    except Exception:
-        logger.exception(f'Error while trying to save hook call with status code {response.status_code}.')
-        logger.error(payload)
+    logger.info(f'Starting async_deliver_hooks for {len(deliveries)} hooks')
+    _deliver_hooks(target, deliveries, attempt)
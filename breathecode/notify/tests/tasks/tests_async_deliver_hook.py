@@ -35,7 +35,7 @@ class TestAsyncDeliverHook(LegacyAPITestCase):
         }
 
         url = fake.url()
-        with patch('requests.post', apply_requests_post_mock([(201, url, {})])):
+        with patch('requests.Session.post', apply_requests_post_mock([(201, url, {})])):
             res = async_deliver_hook(url, data)
 
         assert res == None
@@ -54,10 +54,10 @@ class TestAsyncDeliverHook(LegacyAPITestCase):
         }
 
         url = fake.url()
-        with patch('requests.post', apply_requests_post_mock([(201, url, {})])):
-            with self.assertRaisesMessage(Hook.DoesNotExist, 'Hook matching query does not exist.'):
-                async_deliver_hook(url, data, hook_id=1)
+        with patch('requests.Session.post', apply_requests_post_mock([(201, url, {})])):
+            res = async_deliver_hook(url, data, hook_id=1)
 
+        assert res == None
         assert self.bc.database.list_of('notify.Hook') == []
 
     @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
@@ -76,8 +76,10 @@ class TestAsyncDeliverHook(LegacyAPITestCase):
         model = self.bc.database.create(hook=1)
 
         url = fake.url()
-        with patch('requests.post', apply_requests_post_mock([(201, url, {})])):
-            res = async_deliver_hook(url, data, hook_id=1)
+        with patch('requests.Session.post', apply_requests_post_mock([(201, url, {})])):
+            with patch('breathecode.notify.utils.hook_delivery.perf_counter',
+                       MagicMock(side_effect=[1, 1.25])):
+                res = async_deliver_hook(url, data, hook_id=1)
 
         assert res == None
         assert self.bc.database.list_of('notify.Hook') == [
@@ -85,6 +87,10 @@ class TestAsyncDeliverHook(LegacyAPITestCase):
                 **self.bc.format.to_dict(model.hook),
                 'total_calls':
                 model.hook.total_calls + 1,
+                'total_latency':
+                model.hook.total_latency + 0.25,
+                'last_latency':
+                0.25,
                 'last_call_at':
                 UTC_NOW,
                 'last_response_code':
@@ -114,7 +120,7 @@ class TestAsyncDeliverHook(LegacyAPITestCase):
         model = self.bc.database.create(hook=1)
 
         url = fake.url()
-        with patch('requests.post', apply_requests_post_mock([(410, url, {})])):
+        with patch('requests.Session.post', apply_requests_post_mock([(410, url, {})])):
             res = async_deliver_hook(url, data, hook_id=1)
 
         assert res == None
@@ -0,0 +1,180 @@
+"""
+Test async_deliver_hooks
+"""
+from unittest.mock import MagicMock, call
+
+import pytest
+import requests
+from django.core.cache import cache
+
+from breathecode.notify import tasks
+from breathecode.notify.utils import hook_delivery
+from breathecode.notify.utils.hook_manager import HookManager
+from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
+from breathecode.tests.mocks.requests import apply_requests_post_mock
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch):
+    monkeypatch.setattr('breathecode.notify.tasks.async_deliver_hooks.apply_async', MagicMock())
+    yield
+
+
+def test_batch_with_stats(bc: Breathecode, fake, monkeypatch):
+    url = fake.url()
+    model = bc.database.create(hook=(2, {'target': url}))
+
+    monkeypatch.setattr('requests.Session.post', apply_requests_post_mock([(201, url, {})]))
+    tasks.async_deliver_hooks(url, [(1, {
+        'data': {
+            'a': 1
+        }
+    }), (2, {
+        'data': {
+            'b': 2
+        }
+    }), (1, {
+        'data': {
+            'c': 3
+        }
+    })])
+
+    assert requests.Session.post.call_count == 3
+    assert [(x['id'], x['total_calls'], x['total_failures'], x['last_response_code'], x['sample_data'])
+            for x in bc.database.list_of('notify.Hook')] == [
+                (1, model.hook[0].total_calls + 2, 0, 201, [{
+                    'a': 1
+                }, {
+                    'c': 3
+                }]),
+                (2, model.hook[1].total_calls + 1, 0, 201, [{
+                    'b': 2
+                }]),
+            ]
+    assert tasks.async_deliver_hooks.apply_async.call_args_list == []
+
+
+def test_failures_are_retried(bc: Breathecode, fake, monkeypatch):
+    url = fake.url()
+    model = bc.database.create(hook={'target': url})
+
+    monkeypatch.setattr('requests.Session.post', apply_requests_post_mock([(503, url, {})]))
+    tasks.async_deliver_hooks(url, [(1, {'data': {'a': 1}})])
+
+    hook = bc.database.get('notify.Hook', 1, dict=False)
+    assert hook.total_calls == model.hook.total_calls + 1
+    assert hook.total_failures == 1
+    assert hook.last_response_code == 503
+
+    assert tasks.async_deliver_hooks.apply_async.call_args_list == [
+        call(args=(url, [(1, {
+            'data': {
+                'a': 1
+            }
+        })]),
+             kwargs={'attempt': 1},
+             countdown=hook_delivery.get_retry_delay(0)),
+    ]
+
+
+def test_circuit_opened(bc: Breathecode, fake, monkeypatch):
+    url = fake.url()
+    bc.database.create(hook={'target': url})
+
+    monkeypatch.setattr('requests.Session.post', MagicMock(side_effect=requests.ConnectionError('down')))
+    deliveries = [(1, {'data': {'n': n}}) for n in range(hook_delivery.BREAKER_THRESHOLD + 3)]
+    tasks.async_deliver_hooks(url, deliveries)
+
+    # the rest of the batch is not sent while the circuit is open
+    assert requests.Session.post.call_count == hook_delivery.BREAKER_THRESHOLD
+    assert hook_delivery.is_circuit_open(url) is not None
+
+    [retry] = tasks.async_deliver_hooks.apply_async.call_args_list
+    assert retry.kwargs['args'] == (url, deliveries)
+    assert retry.kwargs['kwargs'] == {'attempt': 1}
+    assert retry.kwargs['countdown'] > 0
+
+    tasks.async_deliver_hooks(url, deliveries, attempt=1)
+    assert requests.Session.post.call_count == hook_delivery.BREAKER_THRESHOLD
+
+
+def test_circuit_opened_once_by_concurrent_failures(fake):
+    url = fake.url()
+
+    results = [hook_delivery._record_result(url, False) for _ in range(hook_delivery.BREAKER_THRESHOLD)]
+    assert results == [False] * (hook_delivery.BREAKER_THRESHOLD - 1) + [True]
+
+    assert hook_delivery.is_circuit_open(url) is not None
+    open_until = cache.get(hook_delivery._breaker_key(url, 'open'))
+
+    # a concurrent delivery that failed meanwhile finds the circuit open, and does not extend its backoff
+    assert hook_delivery._record_result(url, False) is True
+    assert cache.get(hook_delivery._breaker_key(url, 'open')) == open_until
+    assert cache.get(hook_delivery._breaker_key(url, 'opened')) == 1
+
+    assert hook_delivery._record_result(url, True) is False
+    assert cache.get(hook_delivery._breaker_key(url, 'opened')) is None
+
+
+def test_find_and_fire_hook(bc: Breathecode, fake, monkeypatch, django_assert_num_queries):
+    url = fake.url()
+    hooks = [{'target': url, 'event': 'form_entry.added', 'user_id': n} for n in [1, 2, 3]]
+    users = [{'username': 'academy-1'}, {'username': 'other'}, {'username': 'admin', 'is_superuser': True}]
+    model = bc.database.create(user=users, hook=hooks, academy={'slug': 'academy-1'})
+
+    monkeypatch.setattr('breathecode.notify.tasks.async_deliver_hooks.delay', MagicMock())
+
+    instance = MagicMock(academy=model.academy)
+    for n in [1, 0]:
+        with django_assert_num_queries(n):
+            HookManager.find_and_fire_hook('form_entry.added', instance, payload_override={'a': 1})
+
+    assert tasks.async_deliver_hooks.delay.call_args_list == [
+        call(url, [(1, {
+            'a': 1
+        }), (3, {
+            'a': 1
+        })]),
+        call(url, [(1, {
+            'a': 1
+        }), (3, {
+            'a': 1
+        })]),
+    ]
+
+
+def test_samples_are_appended_to_the_saved_ones(bc: Breathecode, fake, monkeypatch):
+    url = fake.url()
+    samples = [{'n': n} for n in range(hook_delivery.MAX_SAMPLES - 1)]
+    bc.database.create(hook={'target': url, 'sample_data': samples})
+
+    monkeypatch.setattr('requests.Session.post', apply_requests_post_mock([(201, url, {})]))
+    tasks.async_deliver_hooks(url, [(1, {'data': {'a': 1}}), (1, {'data': {'b': 2}})])
+
+    assert bc.database.list_of('notify.Hook')[0]['sample_data'] == samples[1:] + [{'a': 1}, {'b': 2}]
+
+
+def test_demoted_superuser_stops_receiving_hooks(bc: Breathecode, fake, monkeypatch, enable_signals):
+    enable_signals()
+
+    url = fake.url()
+    users = [{'username': 'academy-1'}, {'username': 'admin', 'is_superuser': True}]
+    model = bc.database.create(user=users,
+                               hook={
+                                   'target': url,
+                                   'event': 'form_entry.added',
+                                   'user_id': 2
+                               },
+                               academy={'slug': 'academy-1'})
+
+    monkeypatch.setattr('breathecode.notify.tasks.async_deliver_hooks.delay', MagicMock())
+
+    instance = MagicMock(academy=model.academy)
+    HookManager.find_and_fire_hook('form_entry.added', instance, payload_override={'a': 1})
+
+    model.user[1].is_superuser = False
+    model.user[1].save()
+
+    HookManager.find_and_fire_hook('form_entry.added', instance, payload_override={'a': 1})
+
+    assert tasks.async_deliver_hooks.delay.call_args_list == [call(url, [(1, {'a': 1})])]
@@ -0,0 +1,250 @@
+"""
+Deliver the hooks.
+
+Each target has its own pooled session, so the deliveries reuse their connections, and a circuit breaker,
+after `BREAKER_THRESHOLD` consecutive failures the target is not called until its backoff expires. The stats
+of the deliveries of a batch are saved with a single update per hook, just the hooks that got new samples are
+read first, while they are locked.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from time import perf_counter
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+import requests
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from breathecode.utils.decorators.task import parse_payload
+
+__all__ = ['deliver_hooks', 'get_retry_delay', 'is_circuit_open']
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = float(os.getenv('HOOK_TIMEOUT', '2'))
+POOL_SIZE = int(os.getenv('HOOK_POOL_SIZE', '4'))
+MAX_ATTEMPTS = int(os.getenv('HOOK_MAX_ATTEMPTS', '5'))
+BREAKER_THRESHOLD = int(os.getenv('HOOK_BREAKER_THRESHOLD', '5'))
+
+# seconds
+BASE_BACKOFF = 30
+MAX_BACKOFF = 60 * 60
+
+MAX_SAMPLES = 10
+
+# the id of the hook, if it was saved, and its payload
+Delivery = tuple[Optional[int], Any]
+
+_lock = threading.Lock()
+_sessions: dict[str, requests.Session] = {}
+
+
+def _get_origin(target: str) -> str:
+    url = urlparse(target)
+    return f'{url.scheme}://{url.netloc}'
+
+
+def get_session(target: str) -> requests.Session:
+    origin = _get_origin(target)
+
+    if session := _sessions.get(origin):
+        return session
+
+    with _lock:
+        if (session := _sessions.get(origin)) is None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            _sessions[origin] = session
+
+    return session
+
+
+def _breaker_key(target: str, name: str) -> str:
+    return f'hook_breaker__{hashlib.sha1(target.encode()).hexdigest()}__{name}'
+
+
+def _incr(key: str) -> int:
+    try:
+        return cache.incr(key)
+
+    except ValueError:
+        if cache.add(key, 1, timeout=MAX_BACKOFF * 2):
+            return 1
+
+        return cache.incr(key)
+
+
+def get_retry_delay(attempt: int) -> int:
+    return min(BASE_BACKOFF * 2**attempt, MAX_BACKOFF)
+
+
+def is_circuit_open(target: str) -> Optional[int]:
+    """Get the seconds until the target can be called again, or None if it can be called."""
+
+    open_until = cache.get(_breaker_key(target, 'open'))
+    if open_until is None:
+        return None
+
+    remaining = int(open_until - timezone.now().timestamp())
+    return remaining if remaining > 0 else None
+
+
+def _record_result(target: str, success: bool) -> bool:
+    """Save the result of a delivery, return True if the circuit is open."""
+
+    failures_key = _breaker_key(target, 'failures')
+    opened_key = _breaker_key(target, 'opened')
+
+    if success:
+        if cache.get_many([failures_key, opened_key]):
+            cache.delete_many([failures_key, opened_key])
+
+        return False
+
+    # the failures of the concurrent deliveries to the same target are counted atomically
+    failures = _incr(failures_key)
+    opened = cache.get(opened_key) or 0
+
+    # a target whose circuit was opened before is closed again by a success, or opened at the first failure
+    if failures < BREAKER_THRESHOLD and not opened:
+        return False
+
+    # just one worker opens the circuit, so the backoff grows once per opening
+    delay = get_retry_delay(opened)
+    if not cache.add(_breaker_key(target, 'open'), timezone.now().timestamp() + delay, timeout=delay):
+        return True
+
+    cache.set(opened_key, opened + 1, MAX_BACKOFF * 2)
+    cache.delete(failures_key)
+
+    logger.warning(f'The circuit of {target} was opened for {delay} seconds')
+    return True
+
+
+def _get_sample(payload: Any, encoded_payload: str) -> Optional[dict]:
+    if isinstance(payload, dict) and 'data' in payload and isinstance(payload['data'], dict):
+        return payload['data']
+
+    if isinstance(payload, dict):
+        return json.loads(encoded_payload)
+
+    return None
+
+
+def _save_stats(hook_model, stats: dict[int, dict]) -> None:
+    now = timezone.now()
+    sampled = [hook_id for hook_id, hook_stats in stats.items() if hook_stats['samples']]
+
+    with transaction.atomic():
+        # the hooks that got samples are locked, so the samples of the concurrent deliveries are not lost
+        samples = {}
+        if sampled:
+            samples = dict(hook_model.objects.select_for_update().filter(
+                id__in=sampled).order_by('id').values_list('id', 'sample_data'))
+
+        for hook_id, hook_stats in sorted(stats.items()):
+            fields = {
+                'total_calls': F('total_calls') + hook_stats['calls'],
+                'total_failures': F('total_failures') + hook_stats['failures'],
+                'total_latency': F('total_latency') + hook_stats['latency'],
+                'last_latency': hook_stats['last_latency'],
+                'last_response_code': hook_stats['code'],
+                'last_call_at': now,
+            }
+
+            if hook_id in samples:
+                current = samples[hook_id] if isinstance(samples[hook_id], list) else []
+                fields['sample_data'] = (current + hook_stats['samples'])[-MAX_SAMPLES:]
+
+            hook_model.objects.filter(id=hook_id).update(**fields)
+
+
+def deliver_hooks(target: str, deliveries: list[Delivery]) -> list[Delivery]:
+    """
+    Post the payloads of many hooks to the same target, return the deliveries that should be retried.
+
+    A delivery is retried when the target could not be reached, or it returned 429 or 5xx. The hooks whose
+    target returns 410 are deleted.
+    """
+
+    from .hook_manager import HookManager
+
+    hook_model = HookManager.get_hook_model()
+    session = get_session(target)
+
+    stats: dict[int, dict] = {}
+    gone = set()
+    failed = []
+
+    for index, (hook_id, payload) in enumerate(deliveries):
+        if isinstance(payload, list):
+            payload = [parse_payload(x) for x in payload]
+
+        else:
+            payload = parse_payload(payload)
+
+        encoded_payload = json.dumps(payload, cls=DjangoJSONEncoder)
+
+        start = perf_counter()
+        try:
+            response = session.post(target,
+                                    data=encoded_payload,
+                                    headers={'Content-Type': 'application/json'},
+                                    timeout=TIMEOUT)
+            code = response.status_code
+
+        except requests.RequestException as e:
+            logger.warning(f'Error delivering the hook {hook_id} to {target}: {e}')
+            code = None
+
+        latency = perf_counter() - start
+
+        retry = code is None or code == 429 or code >= 500
+        if retry:
+            failed.append((hook_id, payload))
+
+        if hook_id and code == 410:
+            gone.add(hook_id)
+
+        elif hook_id:
+            hook_stats = stats.setdefault(hook_id, {
+                'calls': 0,
+                'failures': 0,
+                'latency': 0.0,
+                'last_latency': 0.0,
+                'code': None,
+                'samples': [],
+            })
+
+            hook_stats['calls'] += 1
+            hook_stats['failures'] += 1 if retry else 0
+            hook_stats['latency'] += latency
+            hook_stats['last_latency'] = latency
+            hook_stats['code'] = code
+
+            if not retry and (sample := _get_sample(payload, encoded_payload)) is not None:
+                hook_stats['samples'].append(sample)
+
+        # the rest of the batch waits until the target is available again
+        if _record_result(target, not retry):
+            failed += deliveries[index + 1:]
+            break
+
+    _save_stats(hook_model, stats)
+
+    if gone:
+        hook_model.objects.filter(id__in=gone).delete()
+
+    return failed
@@ -1,13 +1,21 @@
 import logging
+import time
 from django.conf import settings
 
 from breathecode.notify.models import Hook
-from ..tasks import async_deliver_hook
+from ..tasks import async_deliver_hooks
 from django.apps import apps as django_apps
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
 
 logger = logging.getLogger(__name__)
 
+HOOKS_VERSION_KEY = 'hooks__version'
+
+# the superusers are not tracked, so a user that stops being superuser is forgotten after this timeout
+HOOKS_TIMEOUT = 60 * 5
+
 
 class HookManagerClass(object):
     _HOOK_EVENT_ACTIONS_CONFIG = None
@@ -100,30 +108,21 @@ class HookManagerClass(object):
         """
         Look up Hooks that apply
         """
-        try:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-        except ImportError:
-            from django.contrib.auth.models import User
 
         if event_name not in self.HOOK_EVENTS.keys():
             raise Exception('"{}" does not exist in `settings.HOOK_EVENTS`.'.format(event_name))
 
-        filters = {'event': event_name}
-
         # only process hooks from instances from the same academy
         if academy_override is not None:
-            superadmins = User.objects.filter(is_superuser=True).values_list('username', flat=True)
-            filters['user__username__in'] = [academy_override.slug] + list(superadmins)
+            academy_slug = academy_override.slug
         elif hasattr(instance, 'academy') and instance.academy is not None:
-            superadmins = User.objects.filter(is_superuser=True).values_list('username', flat=True)
-            filters['user__username__in'] = [instance.academy.slug] + list(superadmins)
+            academy_slug = instance.academy.slug
         else:
             logger.debug(
                 f'Only admin will receive hook notification for {event_name} because entity has not academy property'
             )
             # Only the admin can retrieve events from objects that don't belong to any academy
-            filters['user__is_superuser'] = True
+            academy_slug = None
 
         # Ignore the user if the user_override is False
         # if user_override is not False:
@@ -137,12 +136,50 @@ class HookManagerClass(object):
         #         raise Exception('{} has no `user` property. REST Hooks needs this.'.format(repr(instance)))
 
         HookModel = self.get_hook_model()
-        hooks = HookModel.objects.filter(**filters)
-        for hook in hooks:
-            self.deliver_hook(hook,
-                              instance,
-                              payload_override=payload_override,
-                              academy_override=academy_override)
+
+        # the deliveries to the same target are made by the same task
+        deliveries = {}
+        for fields in self.get_hooks(event_name, academy_slug):
+            hook = HookModel(**fields)
+            payload = self.get_payload(hook, instance, payload_override=payload_override)
+            deliveries.setdefault(hook.target, []).append((hook.id, payload))
+
+        for target, target_deliveries in deliveries.items():
+            logger.debug(f'Calling delayed task async_deliver_hooks for {len(target_deliveries)} hooks')
+            async_deliver_hooks.delay(target, target_deliveries)
+
+    def clear_hooks_cache(self):
+        try:
+            cache.incr(HOOKS_VERSION_KEY)
+
+        except ValueError:
+            cache.add(HOOKS_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+
+    def get_hooks(self, event_name, academy_slug=None):
+        """
+        Get the fields of the hooks of an event, the ones of the academy and the superusers, or just the ones
+        of the superusers if `academy_slug` is None.
+        """
+
+        if (version := cache.get(HOOKS_VERSION_KEY)) is None:
+            cache.add(HOOKS_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+            version = cache.get(HOOKS_VERSION_KEY)
+
+        key = f'hooks__{version}__{event_name}__{academy_slug}'
+        if (hooks := cache.get(key)) is not None:
+            return hooks
+
+        query = Q(user__is_superuser=True)
+        if academy_slug is not None:
+            query |= Q(user__username=academy_slug)
+
+        HookModel = self.get_hook_model()
+        hooks = list(
+            HookModel.objects.filter(query, event=event_name).values('id', 'event', 'target', 'user_id',
+                                                                     'service_id'))
+
+        cache.set(key, hooks, HOOKS_TIMEOUT)
+        return hooks
 
     def process_model_event(
         self,
@@ -201,10 +238,10 @@ class HookManagerClass(object):
                                     payload_override=payload_override,
                                     academy_override=academy_override)
 
-    def deliver_hook(self, hook, instance, payload_override=None, academy_override=None):
+    def get_payload(self, hook, instance, payload_override=None):
         """
-        Deliver the payload to the target URL.
-        By default it serializes to JSON and POSTs.
+        Get the payload of a hook.
+        By default it serializes to JSON.
         Args:
             instance: instance that triggered event.
             payload_override: JSON-serializable object or callable that will
@@ -219,8 +256,22 @@ class HookManagerClass(object):
         if callable(payload):
             payload = payload(hook, instance)
 
-        logger.debug(f'Calling delayed task deliver_hook for hook {hook.id}')
-        async_deliver_hook.delay(hook.target, payload, hook_id=hook.id)
+        return payload
+
+    def deliver_hook(self, hook, instance, payload_override=None, academy_override=None):
+        """
+        Deliver the payload to the target URL.
+        By default it serializes to JSON and POSTs.
+        Args:
+            instance: instance that triggered event.
+            payload_override: JSON-serializable object or callable that will
+                return such object. If callable is used it should accept 2
+                arguments: `hook` and `instance`.
+        """
+        payload = self.get_payload(hook, instance, payload_override=payload_override)
+
+        logger.debug(f'Calling delayed task async_deliver_hooks for hook {hook.id}')
+        async_deliver_hooks.delay(hook.target, [(hook.id, payload)])
 
         return None
 
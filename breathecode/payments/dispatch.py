@@ -0,0 +1,76 @@
+"""
+Bulk dispatcher of the billing tasks.
+
+The ids are streamed from the database and sent in chunks of `CHUNK_SIZE` tasks, each chunk is a single
+group of signatures delayed `CHUNK_INTERVAL` seconds after the previous one, so a big run does not flood the
+workers. Every id sent is marked in the cache until `DISPATCH_TIMEOUT` seconds after its chunk starts, and a
+run holds a lock while it sends them, so overlapping runs never enqueue the same task twice.
+"""
+
+import logging
+import os
+from typing import Iterable
+
+from celery import Task, group
+from django.core.cache import cache
+
+__all__ = ['dispatch']
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = int(os.getenv('PAYMENTS_DISPATCH_CHUNK_SIZE', '100'))
+CHUNK_INTERVAL = int(os.getenv('PAYMENTS_DISPATCH_CHUNK_INTERVAL', '10'))
+DISPATCH_TIMEOUT = int(os.getenv('PAYMENTS_DISPATCH_TIMEOUT', str(60 * 50)))
+LOCK_TIMEOUT = 60 * 10
+
+
+def _key(task: Task, name: str | int) -> str:
+    return f'payments__dispatch__{task.name}__{name}'
+
+
+def _send(task: Task, ids: list[int], countdown: int) -> list[int]:
+    keys = {_key(task, x): x for x in ids}
+    sent = cache.get_many(list(keys))
+    pending = [x for key, x in keys.items() if key not in sent]
+
+    if not pending:
+        return []
+
+    group([task.si(x) for x in pending]).apply_async(countdown=countdown)
+
+    # the mark must outlive the countdown, otherwise a later run sends the chunks that did not start yet
+    cache.set_many({_key(task, x): 1 for x in pending}, timeout=countdown + DISPATCH_TIMEOUT)
+
+    return pending
+
+
+def dispatch(task: Task, ids: Iterable[int]) -> int:
+    """Send `task` once per id in rate limited chunks, it returns the number of tasks sent."""
+
+    lock = _key(task, 'lock')
+    if not cache.add(lock, 1, timeout=LOCK_TIMEOUT):
+        logger.info(f'{task.name} is being dispatched by another process')
+        return 0
+
+    try:
+        sent = 0
+        chunks = 0
+        chunk = []
+
+        for x in ids:
+            chunk.append(x)
+
+            if len(chunk) == CHUNK_SIZE:
+                if pending := _send(task, chunk, chunks * CHUNK_INTERVAL):
+                    sent += len(pending)
+                    chunks += 1
+
+                chunk = []
+
+        if chunk and (pending := _send(task, chunk, chunks * CHUNK_INTERVAL)):
+            sent += len(pending)
+
+    finally:
+        cache.delete(lock)
+
+    return sent
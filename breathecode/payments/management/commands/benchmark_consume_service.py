@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from breathecode.payments.models import Consumable
+from breathecode.payments.signals import consume_service, grant_service_permissions
+
+
+# it's meant to be run against a development database
+class Command(BaseCommand):
+    help = 'Consume a consumable from many concurrent consumers and check that no unit was lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumable', type=int, help='Consumable id')
+        parser.add_argument('--consumers', type=int, default=10, help='Concurrent consumers')
+        parser.add_argument('--times', type=int, default=10, help='Consumptions per consumer')
+
+    def consume(self, consumable_id: int, times: int) -> None:
+        try:
+            for _ in range(times):
+                # every consumer works with its own copy, like the requests do
+                instance = Consumable.objects.filter(id=consumable_id).first()
+                consume_service.send(instance=instance, sender=Consumable, how_many=1)
+
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        consumable_id = options['consumable']
+        consumers = options['consumers']
+        times = options['times']
+
+        if not (consumable := Consumable.objects.filter(id=consumable_id).first()):
+            raise CommandError(f'Consumable {consumable_id} not found')
+
+        if consumable.how_many == -1:
+            raise CommandError(f'Consumable {consumable_id} is unlimited')
+
+        original = consumable.how_many
+        units = consumers * times
+
+        Consumable.objects.filter(id=consumable_id).update(how_many=units)
+
+        try:
+            start = time.perf_counter()
+
+            with ThreadPoolExecutor(max_workers=consumers) as executor:
+                futures = [executor.submit(self.consume, consumable_id, times) for _ in range(consumers)]
+                for future in futures:
+                    future.result()
+
+            elapsed = time.perf_counter() - start
+            how_many = Consumable.objects.filter(id=consumable_id).values_list('how_many', flat=True).first()
+
+        finally:
+            Consumable.objects.filter(id=consumable_id).update(how_many=original)
+
+            # the permissions were lost when the balance crossed zero
+            if original:
+                consumable.how_many = original
+                grant_service_permissions.send(instance=consumable, sender=Consumable)
+
+        self.stdout.write(f'{units} consumptions from {consumers} consumers in {elapsed:.2f}s '
+                          f'({units / elapsed:.1f}/s)')
+
+        if how_many != 0:
+            self.stdout.write(self.style.ERROR(f'{how_many} units were not consumed'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('No consumption was lost'))
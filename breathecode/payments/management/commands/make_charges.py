@@ -1,7 +1,7 @@
 from datetime import timedelta
 from django.core.management.base import BaseCommand
 from breathecode.payments import tasks
-from django.db.models.query_utils import Q
+from breathecode.payments.dispatch import dispatch
 
 from ...models import PlanFinancing, Subscription
 from django.utils import timezone
@@ -15,28 +15,21 @@ class Command(BaseCommand):
         utc_now = timezone.now()
         statuses = ['CANCELLED', 'DEPRECATED', 'FREE_TRIAL']
 
-        avoid_expire_these_statuses = Q(status='EXPIRED') | Q(status='ERROR') | Q(status='PAYMENT_ISSUE') | Q(
-            status='FULLY_PAID') | Q(status='FREE_TRIAL') | Q(status='CANCELLED') | Q(status='DEPRECATED')
+        avoid_expire_these_statuses = [
+            'EXPIRED', 'ERROR', 'PAYMENT_ISSUE', 'FULLY_PAID', 'FREE_TRIAL', 'CANCELLED', 'DEPRECATED'
+        ]
 
-        subscriptions = Subscription.objects.filter(valid_until__lte=utc_now + timedelta(days=1))
-        plan_financings = PlanFinancing.objects.filter(valid_until__lte=utc_now + timedelta(days=1))
+        Subscription.objects.filter(valid_until__lte=utc_now).exclude(
+            status__in=avoid_expire_these_statuses).update(status='EXPIRED')
 
-        Subscription.objects.filter(valid_until__lte=utc_now).exclude(avoid_expire_these_statuses).update(
-            status='EXPIRED')
+        PlanFinancing.objects.filter(valid_until__lte=utc_now).exclude(
+            status__in=avoid_expire_these_statuses).update(status='EXPIRED')
 
-        PlanFinancing.objects.filter(valid_until__lte=utc_now).exclude(avoid_expire_these_statuses).update(
-            status='EXPIRED')
+        subscriptions = Subscription.objects.filter(valid_until__lte=utc_now + timedelta(days=1)).exclude(
+            status__in=statuses).order_by('id').values_list('id', flat=True)
 
-        for status in statuses:
-            subscriptions = subscriptions.exclude(status=status)
+        plan_financings = PlanFinancing.objects.filter(valid_until__lte=utc_now + timedelta(days=1)).exclude(
+            status__in=statuses + ['FULLY_PAID']).order_by('id').values_list('id', flat=True)
 
-        statuses.append('FULLY_PAID')
-
-        for status in statuses:
-            plan_financings = plan_financings.exclude(status=status)
-
-        for subscription in subscriptions:
-            tasks.charge_subscription.delay(subscription.id)
-
-        for plan_financing in plan_financings:
-            tasks.charge_plan_financing.delay(plan_financing.id)
+        dispatch(tasks.charge_subscription, subscriptions.iterator())
+        dispatch(tasks.charge_plan_financing, plan_financings.iterator())
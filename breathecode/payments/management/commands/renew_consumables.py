@@ -1,10 +1,11 @@
-from asyncio import tasks
 from datetime import timedelta
 from django.core.management.base import BaseCommand
-from ...models import ServiceStockScheduler, Subscription
+from django.db.models import Q
+from ...models import ServiceStockScheduler
 from django.utils import timezone
 
 from ... import tasks
+from ...dispatch import dispatch
 
 
 # renew the credits every 1 hours
@@ -13,17 +14,23 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         utc_now = timezone.now()
-        subscriptions = Subscription.objects.filter().exclude(status='CANCELLED').exclude(status='DEPRECATED')
+        statuses = ['CANCELLED', 'DEPRECATED']
 
-        subscription_ids = list(subscriptions.values_list('id', flat=True))
+        schedulers = ServiceStockScheduler.objects.filter(
+            Q(subscription_handler__subscription__isnull=False)
+            | Q(plan_handler__subscription__isnull=False)
+            | Q(plan_handler__plan_financing__isnull=False)).exclude(
+                subscription_handler__subscription__status__in=statuses).exclude(
+                    plan_handler__subscription__status__in=statuses).exclude(
+                        plan_handler__plan_financing__status__in=statuses)
 
-        no_need_to_renew = ServiceStockScheduler.objects.filter(
+        no_need_to_renew = schedulers.filter(
             consumables__valid_until__gte=utc_now +
-            timedelta(hours=2)).exclude(subscription__status='CANCELLED').exclude(
-                subscription__status='DEPRECATED').exclude(subscription__status='PAYMENT_ISSUE')
+            timedelta(hours=2)).exclude(subscription_handler__subscription__status='PAYMENT_ISSUE').exclude(
+                plan_handler__subscription__status='PAYMENT_ISSUE').exclude(
+                    plan_handler__plan_financing__status='PAYMENT_ISSUE')
 
-        for subscription in no_need_to_renew:
-            subscription_ids.remove(subscription.id)
+        scheduler_ids = set(schedulers.values_list('id', flat=True).iterator())
+        scheduler_ids -= set(no_need_to_renew.values_list('id', flat=True).iterator())
 
-        for subscription_id in subscription_ids:
-            tasks.renew_consumables.delay(subscription_id)
+        dispatch(tasks.renew_consumables, sorted(scheduler_ids))
@@ -1,7 +1,9 @@
 import logging
-from typing import Type
+from typing import Optional, Type
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -16,19 +18,43 @@ from breathecode.payments import tasks
 logger = logging.getLogger(__name__)
 
 
+def update_balance(instance: Consumable, how_many: float) -> Optional[tuple[int, int]]:
+    """
+    Add `how_many` units to a consumable without lose concurrent changes, it never goes below zero.
+
+    It returns the balances before and after the change, or None if it is unlimited or was deleted.
+    """
+
+    with transaction.atomic():
+        # the instance could be stale, the row is locked until the transaction ends
+        before = Consumable.objects.select_for_update().filter(id=instance.id).values_list('how_many',
+                                                                                           flat=True).first()
+
+        if before is None or before == -1:
+            return None
+
+        if how_many < 0 and before == 0:
+            instance.how_many = 0
+            return 0, 0
+
+        # avoid full_clean, this is the hot path of every consumption
+        Consumable.objects.filter(id=instance.id).update(how_many=Greatest(F('how_many') + how_many, 0))
+
+    after = max(before + how_many, 0)
+    instance.how_many = after
+
+    return before, after
+
+
 @receiver(consume_service, sender=Consumable)
 def consume_service_receiver(sender: Type[Consumable], instance: Consumable, how_many: float, **kwargs):
-    if instance.how_many == 0:
-        lose_service_permissions.send(instance=instance, sender=sender)
-        return
-
     if instance.how_many == -1:
         return
 
-    instance.how_many -= how_many
-    instance.save()
+    balances = update_balance(instance, -how_many)
 
-    if instance.how_many == 0:
+    # the permissions just are lost when the balance crosses zero
+    if balances and balances[0] > 0 and balances[1] == 0:
         lose_service_permissions.send(instance=instance, sender=sender)
 
 
@@ -38,12 +64,9 @@ def reimburse_service_units_receiver(sender: Type[Consumable], instance: Consuma
     if instance.how_many == -1:
         return
 
-    grant_permissions = not instance.how_many and how_many
-
-    instance.how_many += how_many
-    instance.save()
+    balances = update_balance(instance, how_many)
 
-    if grant_permissions:
+    if balances and balances[0] == 0 and balances[1] > 0:
         grant_service_permissions.send(instance=instance, sender=sender)
 
 
@@ -1,6 +1,7 @@
 import random
 from unittest.mock import patch, MagicMock, call
-from breathecode.payments import tasks
+from django.core.cache import cache
+from breathecode.payments import dispatch, tasks
 from breathecode.payments.management.commands.make_charges import Command
 from breathecode.payments.tests.mixins import PaymentsTestCase
 from django.utils import timezone
@@ -9,12 +10,20 @@ from dateutil.relativedelta import relativedelta
 UTC_NOW = timezone.now()
 
 
+def dispatched(task):
+    ids = []
+    for c in dispatch.group.call_args_list:
+        ids += [signature.args[0] for signature in c.args[0] if signature.task == task.name]
+
+    return ids
+
+
 class SlackTestSuite(PaymentsTestCase):
     """
     🔽🔽🔽 Subscription cases
     """
 
-    @patch('breathecode.payments.tasks.charge_subscription.delay', MagicMock())
+    @patch('breathecode.payments.dispatch.group', MagicMock())
     def test_with_zero_subscriptions(self):
         """Testing when context is None or not provided."""
 
@@ -23,9 +32,9 @@ class SlackTestSuite(PaymentsTestCase):
 
         self.assertEqual(result, None)
         self.assertEqual(self.bc.database.list_of('payments.Subscription'), [])
-        self.assertEqual(tasks.charge_subscription.delay.call_args_list, [])
+        self.assertEqual(dispatched(tasks.charge_subscription), [])
 
-    @patch('breathecode.payments.tasks.charge_subscription.delay', MagicMock())
+    @patch('breathecode.payments.dispatch.group', MagicMock())
     def test_with_two_subscriptions__wrong_cases(self):
         """Testing when context is None or not provided."""
         utc_now = timezone.now()
@@ -50,12 +59,12 @@ class SlackTestSuite(PaymentsTestCase):
                 self.bc.database.list_of('payments.Subscription'),
                 self.bc.format.to_dict(model.subscription),
             )
-            self.assertEqual(tasks.charge_subscription.delay.call_args_list, [])
+            self.assertEqual(dispatched(tasks.charge_subscription), [])
 
             # teardown
             self.bc.database.delete('payments.Subscription')
 
-    @patch('breathecode.payments.tasks.charge_subscription.delay', MagicMock())
+    @patch('breathecode.payments.dispatch.group', MagicMock())
     def test_with_two_subscriptions__valid_cases(self):
         """Testing when context is None or not provided."""
         utc_now = timezone.now()
@@ -79,20 +88,19 @@ class SlackTestSuite(PaymentsTestCase):
                     db[i]['status'] = 'EXPIRED'
 
             self.assertEqual(self.bc.database.list_of('payments.Subscription'), db)
-            self.assertEqual(tasks.charge_subscription.delay.call_args_list, [
-                call(model.subscription[0].id),
-                call(model.subscription[1].id),
-            ])
+            self.assertEqual(dispatched(tasks.charge_subscription),
+                             [model.subscription[0].id, model.subscription[1].id])
 
             # teardown
             self.bc.database.delete('payments.Subscription')
-            tasks.charge_subscription.delay.call_args_list = []
+            dispatch.group.call_args_list = []
+            cache.clear()
 
     """
     🔽🔽🔽 PlanFinancing cases
     """
 
-    @patch('breathecode.payments.tasks.charge_plan_financing.delay', MagicMock())
+    @patch('breathecode.payments.dispatch.group', MagicMock())
     def test_with_zero_plan_financings(self):
         """Testing when context is None or not provided."""
 
@@ -101,9 +109,9 @@ class SlackTestSuite(PaymentsTestCase):
 
         self.assertEqual(result, None)
         self.assertEqual(self.bc.database.list_of('payments.PlanFinancing'), [])
-        self.assertEqual(tasks.charge_plan_financing.delay.call_args_list, [])
+        self.assertEqual(dispatched(tasks.charge_plan_financing), [])
 
-    @patch('breathecode.payments.tasks.charge_plan_financing.delay', MagicMock())
+    @patch('breathecode.payments.dispatch.group', MagicMock())
     def test_with_two_plan_financings__wrong_cases(self):
         """Testing when context is None or not provided."""
         utc_now = timezone.now()
@@ -133,12 +141,12 @@ class SlackTestSuite(PaymentsTestCase):
                 self.bc.database.list_of('payments.PlanFinancing'),
                 self.bc.format.to_dict(model.plan_financing),
             )
-            self.assertEqual(tasks.charge_plan_financing.delay.call_args_list, [])
+            self.assertEqual(dispatched(tasks.charge_plan_financing), [])
 
             # teardown
             self.bc.database.delete('payments.PlanFinancing')
 
-    @patch('breathecode.payments.tasks.charge_plan_financing.delay', MagicMock())
+    @patch('breathecode.payments.dispatch.group', MagicMock())
     def test_with_two_plan_financings__valid_cases(self):
         """Testing when context is None or not provided."""
         utc_now = timezone.now()
@@ -168,11 +176,71 @@ class SlackTestSuite(PaymentsTestCase):
                     db[i]['status'] = 'EXPIRED'
 
             self.assertEqual(self.bc.database.list_of('payments.PlanFinancing'), db)
-            self.assertEqual(tasks.charge_plan_financing.delay.call_args_list, [
-                call(model.plan_financing[0].id),
-                call(model.plan_financing[1].id),
-            ])
+            self.assertEqual(dispatched(tasks.charge_plan_financing),
+                             [model.plan_financing[0].id, model.plan_financing[1].id])
 
             # teardown
             self.bc.database.delete('payments.PlanFinancing')
-            tasks.charge_plan_financing.delay.call_args_list = []
+            dispatch.group.call_args_list = []
+            cache.clear()
+
+    """
+    🔽🔽🔽 Dispatch cases
+    """
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    def test_overlapping_runs__just_dispatch_once(self):
+        subscription = {'valid_until': UTC_NOW - relativedelta(days=1, seconds=1), 'status': 'ERROR'}
+        model = self.bc.database.create(subscription=(2, subscription))
+
+        Command().handle()
+        Command().handle()
+
+        self.assertEqual(dispatched(tasks.charge_subscription),
+                         [model.subscription[0].id, model.subscription[1].id])
+        self.assertEqual(dispatch.group.return_value.apply_async.call_args_list, [call(countdown=0)])
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    def test_dispatch_in_progress(self):
+        subscription = {'valid_until': UTC_NOW - relativedelta(days=1, seconds=1), 'status': 'ERROR'}
+        self.bc.database.create(subscription=(2, subscription))
+
+        cache.set(f'payments__dispatch__{tasks.charge_subscription.name}__lock', 1)
+
+        Command().handle()
+
+        self.assertEqual(dispatched(tasks.charge_subscription), [])
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    @patch('breathecode.payments.dispatch.CHUNK_SIZE', 2)
+    def test_chunks(self):
+        subscription = {'valid_until': UTC_NOW - relativedelta(days=1, seconds=1), 'status': 'ERROR'}
+        model = self.bc.database.create(subscription=(5, subscription))
+
+        Command().handle()
+
+        self.assertEqual(dispatched(tasks.charge_subscription), [x.id for x in model.subscription])
+        self.assertEqual(dispatch.group.call_args_list, [
+            call([tasks.charge_subscription.si(x.id) for x in model.subscription[0:2]]),
+            call([tasks.charge_subscription.si(x.id) for x in model.subscription[2:4]]),
+            call([tasks.charge_subscription.si(x.id) for x in model.subscription[4:5]]),
+        ])
+        self.assertEqual(dispatch.group.return_value.apply_async.call_args_list, [
+            call(countdown=0),
+            call(countdown=dispatch.CHUNK_INTERVAL),
+            call(countdown=dispatch.CHUNK_INTERVAL * 2),
+        ])
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    @patch('breathecode.payments.dispatch.CHUNK_SIZE', 2)
+    def test_chunks__the_marks_outlive_the_countdown(self):
+        subscription = {'valid_until': UTC_NOW - relativedelta(days=1, seconds=1), 'status': 'ERROR'}
+        self.bc.database.create(subscription=(3, subscription))
+
+        with patch('breathecode.payments.dispatch.cache.set_many', MagicMock()) as set_many:
+            Command().handle()
+
+        self.assertEqual([x.kwargs['timeout'] for x in set_many.call_args_list], [
+            dispatch.DISPATCH_TIMEOUT,
+            dispatch.CHUNK_INTERVAL + dispatch.DISPATCH_TIMEOUT,
+        ])
@@ -0,0 +1,108 @@
+from unittest.mock import patch, MagicMock
+from django.core.cache import cache
+from breathecode.payments import dispatch, tasks
+from breathecode.payments.management.commands.renew_consumables import Command
+from breathecode.payments.tests.mixins import PaymentsTestCase
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
+
+UTC_NOW = timezone.now()
+
+
+def dispatched(task):
+    ids = []
+    for c in dispatch.group.call_args_list:
+        ids += [signature.args[0] for signature in c.args[0] if signature.task == task.name]
+
+    return ids
+
+
+class SlackTestSuite(PaymentsTestCase):
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    def test_with_zero_schedulers(self):
+        command = Command()
+        result = command.handle()
+
+        self.assertEqual(result, None)
+        self.assertEqual(dispatched(tasks.renew_consumables), [])
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    def test_with_schedulers__status_cases(self):
+        cases = [
+            ('ACTIVE', True),
+            ('PAYMENT_ISSUE', True),
+            ('CANCELLED', False),
+            ('DEPRECATED', False),
+        ]
+
+        for status, renewed in cases:
+            subscription = {'status': status}
+            model = self.bc.database.create(subscription=subscription, subscription_service_item=1)
+            model = self.bc.database.create(
+                service_stock_scheduler=(2, {
+                    'subscription_handler_id': model.subscription_service_item.id,
+                }))
+
+            Command().handle()
+
+            expected = [x.id for x in model.service_stock_scheduler] if renewed else []
+            self.assertEqual(dispatched(tasks.renew_consumables), expected)
+
+            # teardown
+            self.bc.database.delete('payments.Subscription')
+            dispatch.group.call_args_list = []
+            cache.clear()
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    def test_with_schedulers_of_plan_financings__status_cases(self):
+        cases = [
+            ('ACTIVE', True),
+            ('PAYMENT_ISSUE', True),
+            ('CANCELLED', False),
+            ('DEPRECATED', False),
+        ]
+
+        for status, renewed in cases:
+            plan_financing = {
+                'status': status,
+                'monthly_price': 10,
+                'plan_expires_at': UTC_NOW + relativedelta(months=1),
+            }
+            model = self.bc.database.create(plan_financing=plan_financing, plan_service_item_handler=1)
+            model = self.bc.database.create(
+                service_stock_scheduler=(2, {
+                    'plan_handler_id': model.plan_service_item_handler.id,
+                }))
+
+            Command().handle()
+
+            expected = [x.id for x in model.service_stock_scheduler] if renewed else []
+            self.assertEqual(dispatched(tasks.renew_consumables), expected)
+
+            # teardown
+            self.bc.database.delete('payments.PlanFinancing')
+            dispatch.group.call_args_list = []
+            cache.clear()
+
+    @patch('breathecode.payments.dispatch.group', MagicMock())
+    def test_with_schedulers__consumables_are_still_valid(self):
+        consumable = {'valid_until': UTC_NOW + relativedelta(hours=3)}
+        model = self.bc.database.create(subscription=1,
+                                        subscription_service_item=1,
+                                        consumable=consumable,
+                                        service_stock_scheduler={
+                                            'subscription_handler_id': 1,
+                                            'consumables': [1],
+                                        })
+
+        Command().handle()
+
+        self.assertEqual(dispatched(tasks.renew_consumables), [])
+
+        model.consumable.valid_until = UTC_NOW + relativedelta(hours=1)
+        model.consumable.save()
+
+        Command().handle()
+
+        self.assertEqual(dispatched(tasks.renew_consumables), [model.service_stock_scheduler.id])
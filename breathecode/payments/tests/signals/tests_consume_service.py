@@ -2,6 +2,7 @@ import random
 from unittest.mock import MagicMock, call, patch
 
 from breathecode.payments import signals
+from breathecode.payments.models import Consumable
 from breathecode.tests.mixins.legacy import LegacyAPITestCase
 
 
@@ -49,9 +50,8 @@ class TestSignal(LegacyAPITestCase):
                 'how_many': how_many,
             },
         ])
-        self.assertEqual(signals.lose_service_permissions.send.call_args_list, [
-            call(sender=model.consumable.__class__, instance=model.consumable),
-        ])
+        # it was lost when the balance crossed zero
+        self.assertEqual(signals.lose_service_permissions.send.call_args_list, [])
 
     @patch('breathecode.payments.signals.lose_service_permissions.send', MagicMock())
     def test__consumable_how_many_gte_1__consume_gte_1(self, enable_signals):
@@ -74,3 +74,60 @@ class TestSignal(LegacyAPITestCase):
             },
         ])
         self.assertEqual(signals.lose_service_permissions.send.call_args_list, [])
+
+    @patch('breathecode.payments.signals.lose_service_permissions.send', MagicMock())
+    def test__consumable_how_many_gte_1__consume_all(self, enable_signals):
+        enable_signals()
+
+        how_many = random.randint(1, 100)
+        consumable = {'how_many': how_many}
+        model = self.bc.database.create(consumable=consumable)
+        consumable_db = self.bc.format.to_dict(model.consumable)
+
+        signals.consume_service.send(sender=model.consumable.__class__,
+                                     instance=model.consumable,
+                                     how_many=how_many + random.randint(0, 100))
+
+        self.assertEqual(self.bc.database.list_of('payments.Consumable'), [
+            {
+                **consumable_db,
+                'how_many': 0,
+            },
+        ])
+        self.assertEqual(model.consumable.how_many, 0)
+        self.assertEqual(signals.lose_service_permissions.send.call_args_list, [
+            call(sender=model.consumable.__class__, instance=model.consumable),
+        ])
+
+    @patch('breathecode.payments.signals.lose_service_permissions.send', MagicMock())
+    def test__stale_instances__no_consumption_is_lost(self, enable_signals):
+        enable_signals()
+
+        consumable = {'how_many': 3}
+        model = self.bc.database.create(consumable=consumable)
+        consumable_db = self.bc.format.to_dict(model.consumable)
+
+        # two consumers that loaded the consumable at the same time
+        instances = [Consumable.objects.get(id=model.consumable.id) for _ in range(2)]
+
+        for instance in instances:
+            signals.consume_service.send(sender=Consumable, instance=instance, how_many=1)
+
+        self.assertEqual(self.bc.database.list_of('payments.Consumable'), [
+            {
+                **consumable_db,
+                'how_many': 1,
+            },
+        ])
+        self.assertEqual(signals.lose_service_permissions.send.call_args_list, [])
+
+    @patch('breathecode.payments.signals.lose_service_permissions.send', MagicMock())
+    def test__it_does_not_validate_the_consumable(self, enable_signals, django_assert_num_queries):
+        enable_signals()
+
+        consumable = {'how_many': 3}
+        model = self.bc.database.create(consumable=consumable)
+
+        # the savepoint, the select for update, the update and the release of the savepoint
+        with django_assert_num_queries(4):
+            signals.consume_service.send(sender=Consumable, instance=model.consumable, how_many=1)
@@ -14,7 +14,8 @@ from breathecode.utils.i18n import translation
 from breathecode.admissions.models import Academy, Cohort, CohortUser
 from .models import (ProvisioningUserConsumption, ProvisioningConsumptionEvent, ProvisioningConsumptionKind,
                      ProvisioningPrice, ProvisioningBill, ProvisioningProfile, ProvisioningVendor)
-from django.db.models import QuerySet, Q
+from django.db import connection
+from django.db.models import F, QuerySet, Q
 from dateutil.relativedelta import relativedelta
 
 logger = getLogger(__name__)
@@ -188,6 +189,138 @@ class ActivityContext(TypedDict):
     limit: datetime
     logs: dict[str, list[GithubAcademyUserObject]]
     profile_academies: dict[str, QuerySet[ProfileAcademy]]
+    provisioning_user_consumptions: dict[tuple[str, int], ProvisioningUserConsumption]
+    provisioning_consumption_events: list[tuple[ProvisioningUserConsumption, ProvisioningConsumptionEvent,
+                                                list[ProvisioningBill]]]
+
+
+BATCH_SIZE = 1000
+
+
+def _get_currency(context: ActivityContext) -> Currency:
+    if not (currency := context['currencies'].get('USD', None)):
+        currency, _ = Currency.objects.get_or_create(code='USD', name='US Dollar', decimals=2)
+        context['currencies']['USD'] = currency
+
+    return currency
+
+
+def _prefetch_user_consumptions(context: ActivityContext, usernames: set[str]) -> None:
+    for pa in ProvisioningUserConsumption.objects.filter(hash=context['hash'], username__in=usernames):
+        context['provisioning_user_consumptions'].setdefault((pa.username, pa.kind_id), pa)
+
+
+def _prefetch_kinds(context: ActivityContext, keys: set[tuple[str, str]], key=lambda x: x) -> None:
+    product_names = {x[0] for x in keys}
+    skus = {x[1] for x in keys}
+    kinds = ProvisioningConsumptionKind.objects.filter(product_name__in=product_names, sku__in=skus)
+
+    for kind in kinds:
+        if (kind.product_name, kind.sku) in keys:
+            context['provisioning_activity_kinds'].setdefault(key((kind.product_name, kind.sku)), kind)
+
+
+def prefetch_codespaces_activity(context: ActivityContext, rows: list[dict]) -> None:
+    """Get the objects required by `add_codespaces_activity` for many rows at once."""
+
+    usernames = {x['Username'] for x in rows if isinstance(x['Username'], str)}
+
+    logs = {x: [] for x in usernames if x not in context['github_academy_user_logs']}
+    if logs:
+        for log in GithubAcademyUserLog.objects.filter(
+                Q(valid_until__isnull=True)
+                | Q(valid_until__gte=context['limit'] - relativedelta(months=1, weeks=1)),
+                created_at__lte=context['limit'],
+                academy_user__username__in=logs.keys(),
+                storage_status='SYNCHED',
+                storage_action='ADD').select_related('academy_user__academy').order_by('-created_at'):
+            logs[log.academy_user.username].append(log)
+
+        context['github_academy_user_logs'].update(logs)
+
+    _prefetch_kinds(context, {(x['Product'], x['SKU']) for x in rows})
+    _prefetch_user_consumptions(context, usernames)
+
+    currency = _get_currency(context)
+    unit_types = {x['Unit Type'] for x in rows}
+    for price in ProvisioningPrice.objects.filter(currency=currency, unit_type__in=unit_types):
+        context['provisioning_activity_prices'].setdefault(
+            (price.unit_type, price.price_per_unit, price.multiplier), price)
+
+
+def prefetch_gitpod_activity(context: ActivityContext, rows: list[dict]) -> None:
+    """Get the objects required by `add_gitpod_activity` for many rows at once."""
+
+    usernames = {x['userName'] for x in rows if isinstance(x['userName'], str)}
+
+    profile_academies = {x: [] for x in usernames if x not in context['profile_academies']}
+    if profile_academies:
+        for profile in ProfileAcademy.objects.filter(
+                user__credentialsgithub__username__in=profile_academies.keys(),
+                status='ACTIVE').select_related('academy').annotate(
+                    github_username=F('user__credentialsgithub__username')):
+            profile_academies[profile.github_username].append(profile)
+
+        context['profile_academies'].update(profile_academies)
+
+    _prefetch_kinds(context, {(x['kind'], x['kind']) for x in rows}, key=lambda x: x[0])
+    _prefetch_user_consumptions(context, usernames)
+
+
+def get_user_consumption(context: ActivityContext, username: str,
+                         kind: ProvisioningConsumptionKind) -> ProvisioningUserConsumption:
+    if not (pa := context['provisioning_user_consumptions'].get((username, kind.id), None)):
+        pa, _ = ProvisioningUserConsumption.objects.get_or_create(username=username,
+                                                                  hash=context['hash'],
+                                                                  kind=kind,
+                                                                  defaults={'processed_at': timezone.now()})
+
+        context['provisioning_user_consumptions'][(username, kind.id)] = pa
+
+    return pa
+
+
+def save_consumption_events(context: ActivityContext) -> None:
+    """Save the events added since the last call, and the consumptions and bills they belong to."""
+
+    pending = context['provisioning_consumption_events']
+    if not pending:
+        return
+
+    events = [event for _, event, _ in pending]
+
+    # the backends that cannot return the ids of the new rows need them to add the events to the consumptions
+    if connection.features.can_return_rows_from_bulk_insert:
+        ProvisioningConsumptionEvent.objects.bulk_create(events, batch_size=BATCH_SIZE)
+
+    else:
+        for event in events:
+            event.save()
+
+    now = timezone.now()
+    consumptions = {pa.id: pa for pa, _, _ in pending}
+    for pa in consumptions.values():
+        pa.updated_at = now
+
+    ProvisioningUserConsumption.objects.bulk_update(list(consumptions.values()),
+                                                    ['status', 'status_text', 'updated_at'],
+                                                    batch_size=BATCH_SIZE)
+
+    Events = ProvisioningUserConsumption.events.through
+    events = [
+        Events(provisioninguserconsumption_id=pa.id, provisioningconsumptionevent_id=event.id)
+        for pa, event, _ in pending
+    ]
+    Events.objects.bulk_create(events, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    Bills = ProvisioningUserConsumption.bills.through
+    bills = {(pa.id, bill.id) for pa, _, provisioning_bills in pending for bill in provisioning_bills}
+    Bills.objects.bulk_create(
+        [Bills(provisioninguserconsumption_id=x, provisioningbill_id=y) for x, y in bills],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True)
+
+    pending.clear()
 
 
 def handle_pending_github_user(organization: str, username: str) -> list[Academy]:
@@ -334,9 +467,7 @@ def add_codespaces_activity(context: ActivityContext, field: dict, position: int
         )
         context['provisioning_activity_kinds'][(field['Product'], field['SKU'])] = kind
 
-    if not (currency := context['currencies'].get('USD', None)):
-        currency, _ = Currency.objects.get_or_create(code='USD', name='US Dollar', decimals=2)
-        context['currencies']['USD'] = currency
+    currency = _get_currency(context)
 
     if not (price := context['provisioning_activity_prices'].get(
         (field['Unit Type'], field['Price Per Unit ($)'], field['Multiplier']), None)):
@@ -350,12 +481,9 @@ def add_codespaces_activity(context: ActivityContext, field: dict, position: int
         context['provisioning_activity_prices'][(field['Unit Type'], field['Price Per Unit ($)'],
                                                  field['Multiplier'])] = price
 
-    pa, _ = ProvisioningUserConsumption.objects.get_or_create(username=field['Username'],
-                                                              hash=context['hash'],
-                                                              kind=kind,
-                                                              defaults={'processed_at': timezone.now()})
+    pa = get_user_consumption(context, field['Username'], kind)
 
-    item, _ = ProvisioningConsumptionEvent.objects.get_or_create(
+    item = ProvisioningConsumptionEvent(
         vendor=provisioning_vendor,
         price=price,
         registered_at=date,
@@ -379,14 +507,8 @@ def add_codespaces_activity(context: ActivityContext, field: dict, position: int
 
     pa.status_text = ', '.join(sorted(set(pa.status_text.split(', '))))
     pa.status_text = pa.status_text[:255]
-    pa.save()
-
-    current_bills = pa.bills.all()
-    for provisioning_bill in provisioning_bills.values():
-        if provisioning_bill not in current_bills:
-            pa.bills.add(provisioning_bill)
 
-    pa.events.add(item)
+    context['provisioning_consumption_events'].append((pa, item, list(provisioning_bills.values())))
 
 
 def add_gitpod_activity(context: ActivityContext, field: dict, position: int):
@@ -476,9 +598,7 @@ def add_gitpod_activity(context: ActivityContext, field: dict, position: int):
         )
         context['provisioning_activity_kinds'][field['kind']] = kind
 
-    if not (currency := context['currencies'].get('USD', None)):
-        currency, _ = Currency.objects.get_or_create(code='USD', name='US Dollar', decimals=2)
-        context['currencies']['USD'] = currency
+    currency = _get_currency(context)
 
     if not (price := context['provisioning_activity_prices'].get(currency.id, None)):
         price, _ = ProvisioningPrice.objects.get_or_create(
@@ -490,12 +610,9 @@ def add_gitpod_activity(context: ActivityContext, field: dict, position: int):
 
         context['provisioning_activity_prices'][currency.id] = price
 
-    pa, _ = ProvisioningUserConsumption.objects.get_or_create(username=field['userName'],
-                                                              hash=context['hash'],
-                                                              kind=kind,
-                                                              defaults={'processed_at': timezone.now()})
+    pa = get_user_consumption(context, field['userName'], kind)
 
-    item, _ = ProvisioningConsumptionEvent.objects.get_or_create(
+    item = ProvisioningConsumptionEvent(
         external_pk=field['id'],
         vendor=provisioning_vendor,
         price=price,
@@ -513,11 +630,5 @@ def add_gitpod_activity(context: ActivityContext, field: dict, position: int):
 
     pa.status_text = ', '.join(sorted(set(pa.status_text.split(', '))))
     pa.status_text = pa.status_text[:255]
-    pa.save()
-
-    current_bills = pa.bills.all()
-    for provisioning_bill in provisioning_bills:
-        if provisioning_bill not in current_bills:
-            pa.bills.add(provisioning_bill)
 
-    pa.events.add(item)
+    context['provisioning_consumption_events'].append((pa, item, provisioning_bills))
@@ -3,17 +3,22 @@ from io import BytesIO
 import logging
 import math
 import os
+import tempfile
+import time
 from typing import Any
 from dateutil.relativedelta import relativedelta
+import pytz
 
 from celery import Task
 import pandas as pd
 from breathecode.payments.services.stripe import Stripe
+from breathecode.commons.models import TaskManager
 from breathecode.utils.decorators import task, AbortTask
 
 from breathecode.provisioning import actions
 from breathecode.provisioning.models import ProvisioningBill, ProvisioningConsumptionEvent, ProvisioningUserConsumption
 from breathecode.services.google_cloud.storage import Storage
+from django.db.models import F, Max, Min, Sum
 from django.utils import timezone
 
 from breathecode.utils.io.file import cut_csv
@@ -41,29 +46,20 @@ MONTHS = [
     'November', 'December'
 ]
 
-PANDAS_ROWS_LIMIT = 100
+PANDAS_ROWS_LIMIT = 5000
 DELETE_LIMIT = 10000
 
+# seconds that an upload reads pages before it enqueues itself again, the worker must not be blocked by it
+UPLOAD_TIME_BUDGET = 60
 
-@task()
-def calculate_bill_amounts(hash: str, *, force: bool = False, **_: Any):
-    logger.info(f'Starting calculate_bill_amounts for hash {hash}')
-
-    bills = ProvisioningBill.objects.filter(hash=hash)
 
-    if force:
-        bills = bills.exclude(status='PAID')
+def get_csv_date_range(hash: str, vendor: str) -> tuple[datetime, datetime]:
+    """Get the dates of the first and the last rows of the file."""
 
-    else:
-        bills = bills.exclude(status__in=['DISPUTED', 'IGNORED', 'PAID'])
-
-    if not bills.exists():
-        raise AbortTask(f'Does not exists bills for hash {hash}')
-
-    if bills[0].vendor.name == 'Gitpod':
+    if vendor == 'Gitpod':
         fields = ['id', 'credits', 'startTime', 'endTime', 'kind', 'userName', 'contextURL']
 
-    elif bills[0].vendor.name == 'Codespaces':
+    elif vendor == 'Codespaces':
         fields = [
             'Username', 'Date', 'Product', 'SKU', 'Quantity', 'Unit Type', 'Price Per Unit ($)', 'Multiplier',
             'Owner'
@@ -76,51 +72,89 @@ def calculate_bill_amounts(hash: str, *, force: bool = False, **_: Any):
 
     csv_string_io = BytesIO()
     cloud_file.download(csv_string_io)
-    csv_string_io = cut_csv(csv_string_io, first=1)
-    csv_string_io.seek(0)
 
-    df1 = pd.read_csv(csv_string_io, sep=',', usecols=fields)
+    df1 = pd.read_csv(cut_csv(csv_string_io, first=1), sep=',', usecols=fields)
+    df2 = pd.read_csv(cut_csv(csv_string_io, last=1), sep=',', usecols=fields)
 
-    csv_string_io = BytesIO()
-    cloud_file.download(csv_string_io)
-    csv_string_io = cut_csv(csv_string_io, last=1)
-    csv_string_io.seek(0)
+    # the rows of gitpod are sorted from the newest
+    if vendor == 'Gitpod':
+        first = df2['startTime'][0]
+        last = df1['startTime'][0]
+
+    elif vendor == 'Codespaces':
+        first = df1['Date'][0]
+        last = df2['Date'][0]
 
-    df2 = pd.read_csv(csv_string_io, sep=',', usecols=fields)
+    first = datetime.strptime(first.split('T')[0], '%Y-%m-%d')
+    last = datetime.strptime(last.split('T')[0], '%Y-%m-%d')
 
-    if bills[0].vendor.name == 'Gitpod':
-        first = df2['startTime'][0].split('-')
-        last = df1['startTime'][0].split('-')
+    return first, last
 
-    elif bills[0].vendor.name == 'Codespaces':
-        first = df1['Date'][0].split('-')
-        last = df2['Date'][0].split('-')
 
-    first[2] = first[2].split('T')[0]
-    last[2] = last[2].split('T')[0]
+@task()
+def calculate_bill_amounts(hash: str, *, force: bool = False, **_: Any):
+    logger.info(f'Starting calculate_bill_amounts for hash {hash}')
 
-    month = MONTHS[int(first[1]) - 1]
+    bills = ProvisioningBill.objects.filter(hash=hash)
 
-    import pytz
+    if force:
+        bills = bills.exclude(status='PAID')
 
-    first = datetime(int(first[0]), int(first[1]), int(first[2]), 0, 0, 0, 0, pytz.UTC)
-    last = datetime(int(last[0]), int(last[1]), int(last[2]))
+    else:
+        bills = bills.exclude(status__in=['DISPUTED', 'IGNORED', 'PAID'])
 
-    for bill in bills:
-        amount = 0
-        for activity in ProvisioningUserConsumption.objects.filter(bills=bill, status='PERSISTED'):
-            consumption_amount = 0
-            consumption_quantity = 0
-            for item in activity.events.all():
-                consumption_amount += item.price.get_price(item.quantity)
-                consumption_quantity += item.quantity
+    bills = list(bills.select_related('vendor'))
+    if not bills:
+        raise AbortTask(f'Does not exists bills for hash {hash}')
+
+    # the range of the bills is the one of the events ingested from the file
+    dates = ProvisioningConsumptionEvent.objects.filter(provisioninguserconsumption__hash=hash).aggregate(
+        first=Min('registered_at'), last=Max('registered_at'))
+
+    if dates['first'] is None:
+        first, last = get_csv_date_range(hash, bills[0].vendor.name)
+
+    else:
+        first, last = dates['first'], dates['last']
+
+    first = datetime(first.year, first.month, first.day, tzinfo=pytz.UTC)
+    last = datetime(last.year, last.month, last.day, tzinfo=pytz.UTC)
 
-            activity.amount = consumption_amount
-            activity.quantity = consumption_quantity
-            activity.save()
+    month = MONTHS[first.month - 1]
 
-            amount += consumption_amount
+    Bills = ProvisioningUserConsumption.bills.through
+    persisted = Bills.objects.filter(provisioningbill__in=bills,
+                                     provisioninguserconsumption__status='PERSISTED')
 
+    consumption_bills = {}
+    for consumption_id, bill_id in persisted.values_list('provisioninguserconsumption_id',
+                                                         'provisioningbill_id'):
+        consumption_bills.setdefault(consumption_id, []).append(bill_id)
+
+    # the amount of each event is the one returned by ProvisioningPrice.get_price
+    consumptions = ProvisioningUserConsumption.objects.filter(
+        id__in=persisted.values('provisioninguserconsumption_id')).annotate(
+            events_amount=Sum(
+                F('events__price__price_per_unit') * F('events__price__multiplier') * F('events__quantity')),
+            events_quantity=Sum('events__quantity')).order_by('id')
+
+    now = timezone.now()
+    amounts = {bill.id: 0 for bill in bills}
+    activities = []
+    for activity in consumptions:
+        activity.amount = activity.events_amount or 0
+        activity.quantity = activity.events_quantity or 0
+        activity.updated_at = now
+        activities.append(activity)
+
+        for bill_id in consumption_bills[activity.id]:
+            amounts[bill_id] += activity.amount
+
+    ProvisioningUserConsumption.objects.bulk_update(activities, ['amount', 'quantity', 'updated_at'],
+                                                    batch_size=actions.BATCH_SIZE)
+
+    for bill in bills:
+        amount = amounts[bill.id]
         bill.status = 'DUE' if amount else 'PAID'
 
         if amount:
@@ -142,21 +176,58 @@ def calculate_bill_amounts(hash: str, *, force: bool = False, **_: Any):
         bill.save()
 
 
-def reverse_upload(hash: str, **_: Any):
-    logger.info(f'Canceling upload for hash {hash}')
+def get_local_csv(cloud_file, hash: str) -> str:
+    """
+    Download the file to a local copy, so its pages are read without loading the whole file in memory.
 
-    ProvisioningConsumptionEvent.objects.filter(provisioninguserconsumption__hash=hash).delete()
-    ProvisioningUserConsumption.objects.filter(hash=hash).delete()
-    ProvisioningBill.objects.filter(hash=hash).delete()
+    The rest of the upload could run in another worker, so each run downloads its own copy and removes it.
+    """
 
+    fd, path = tempfile.mkstemp(prefix=f'provisioning-{hash}-', suffix='.csv')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            cloud_file.download(f)
 
-@task(reverse=reverse_upload)
-def upload(hash: str, *, page: int = 0, force: bool = False, task_manager_id: int = 0, **_: Any):
-    logger.info(f'Starting upload for hash {hash}')
+    except Exception as e:
+        remove_local_csv(path)
+        raise e
+
+    return path
+
+
+def remove_local_csv(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def save_upload_checkpoint(task_manager_id: int, page: int, done: bool = False) -> None:
+    """
+    Save the next page of an upload, mark_task_as_pending resumes the upload from it.
+
+    When the upload is `done` its last page is saved instead, so the task decorator marks it as done.
+    """
+
+    current_page = F('total_pages') if done else page - 1
+    TaskManager.objects.filter(id=task_manager_id).update(current_page=current_page, last_run=timezone.now())
+
+
+def get_upload_handler(df: pd.DataFrame):
+    fields = ['id', 'credits', 'startTime', 'endTime', 'kind', 'userName', 'contextURL']
+    if len(df.keys().intersection(fields)) == len(fields):
+        return actions.add_gitpod_activity, actions.prefetch_gitpod_activity
+
+    fields = [
+        'Username', 'Date', 'Product', 'SKU', 'Quantity', 'Unit Type', 'Price Per Unit ($)', 'Multiplier'
+    ]
+    if len(df.keys().intersection(fields)) == len(fields):
+        return actions.add_codespaces_activity, actions.prefetch_codespaces_activity
+
+    return None, None
+
+
+def upload_page(hash: str, df: pd.DataFrame, start: int, handler, prefetch) -> None:
+    """Save the rows of a page, `start` is the position of its first row in the file."""
 
-    limit = PANDAS_ROWS_LIMIT
-    start = page * limit
-    end = start + limit
     context = {
         'provisioning_bills': {},
         'provisioning_vendors': {},
@@ -168,8 +239,52 @@ def upload(hash: str, *, page: int = 0, force: bool = False, task_manager_id: in
         'hash': hash,
         'limit': timezone.now(),
         'logs': {},
+        'provisioning_user_consumptions': {},
+        'provisioning_consumption_events': [],
     }
 
+    prev_bill = ProvisioningBill.objects.filter(hash=hash).first()
+    if prev_bill:
+        context['limit'] = prev_bill.created_at
+
+    rows = df.to_dict('records')
+
+    # the rows of this page that were saved before the page was retried
+    saved = ProvisioningConsumptionEvent.objects.filter(provisioninguserconsumption__hash=hash,
+                                                        csv_row__range=(start, start + len(rows) - 1))
+    saved = set(saved.values_list('csv_row', flat=True))
+
+    try:
+        prefetch(context, rows)
+
+        for position, row in enumerate(rows, start):
+            if position not in saved:
+                handler(context, row, position)
+
+        actions.save_consumption_events(context)
+
+    except Exception as e:
+        raise AbortTask(f'File {hash} cannot be processed due to: {str(e)}')
+
+    for bill in context['provisioning_bills'].values():
+        if not ProvisioningUserConsumption.objects.filter(bills=bill).exists():
+            bill.delete()
+
+
+def reverse_upload(hash: str, **_: Any):
+    logger.info(f'Canceling upload for hash {hash}')
+
+    ProvisioningConsumptionEvent.objects.filter(provisioninguserconsumption__hash=hash).delete()
+    ProvisioningUserConsumption.objects.filter(hash=hash).delete()
+    ProvisioningBill.objects.filter(hash=hash).delete()
+
+
+@task(reverse=reverse_upload)
+def upload(hash: str, *, page: int = 0, force: bool = False, task_manager_id: int = 0, **_: Any):
+    logger.info(f'Starting upload for hash {hash}')
+
+    limit = PANDAS_ROWS_LIMIT
+
     storage = Storage()
     cloud_file = storage.file(os.getenv('PROVISIONING_BUCKET', None), hash)
     if not cloud_file.exists():
@@ -190,56 +305,42 @@ def upload(hash: str, *, page: int = 0, force: bool = False, task_manager_id: in
 
         pending_bills.delete()
 
-    csv_string_io = BytesIO()
-    cloud_file.download(csv_string_io)
-    csv_string_io = cut_csv(csv_string_io, start=start, end=end)
-    csv_string_io.seek(0)
-
-    df = pd.read_csv(csv_string_io, sep=',')
-
-    handler = None
-
-    # edit it
-    fields = ['id', 'credits', 'startTime', 'endTime', 'kind', 'userName', 'contextURL']
-    if len(df.keys().intersection(fields)) == len(fields):
-        handler = actions.add_gitpod_activity
+    path = get_local_csv(cloud_file, hash)
+    started = time.monotonic()
+    done = True
 
-    if not handler:
-        fields = [
-            'Username', 'Date', 'Product', 'SKU', 'Quantity', 'Unit Type', 'Price Per Unit ($)', 'Multiplier'
-        ]
-
-    if not handler and len(df.keys().intersection(fields)) == len(fields):
-        handler = actions.add_codespaces_activity
-
-    if not handler:
-        raise AbortTask(f'File {hash} has an unsupported origin or the provider had changed the file format')
+    # the pages of this run are read from its copy in a single pass, the header is kept and the rows of the
+    # pages that were uploaded by the previous runs are skipped by the parser without being loaded
+    try:
+        with pd.read_csv(path, sep=',', skiprows=range(1, page * limit + 1), chunksize=limit) as reader:
+            for n, df in enumerate(reader):
+                # the rest of the pages are read by another run, so the other tasks can run in the meantime
+                if n and time.monotonic() - started >= UPLOAD_TIME_BUDGET:
+                    done = False
+                    break
 
-    prev_bill = ProvisioningBill.objects.filter(hash=hash).first()
-    if prev_bill:
-        context['limit'] = prev_bill.created_at
+                handler, prefetch = get_upload_handler(df)
+                if not handler:
+                    raise AbortTask(
+                        f'File {hash} has an unsupported origin or the provider had changed the file format')
 
-    try:
-        i = 0
-        for position in range(start, end):
-            try:
-                handler(context, df.iloc[i].to_dict(), position)
-                i += 1
+                upload_page(hash, df, page * limit, handler, prefetch)
+                page += 1
 
-            except IndexError:
-                break
+                if task_manager_id:
+                    save_upload_checkpoint(task_manager_id, page)
 
-    except Exception as e:
-        raise AbortTask(f'File {hash} cannot be processed due to: {str(e)}')
+    finally:
+        remove_local_csv(path)
 
-    for bill in context['provisioning_bills'].values():
-        if not ProvisioningUserConsumption.objects.filter(bills=bill).exists():
-            bill.delete()
+    if not done:
+        upload.delay(hash, page=page, task_manager_id=task_manager_id)
+        return
 
-    if len(df) == limit:
-        upload.delay(hash, page=page + 1, task_manager_id=task_manager_id)
+    if task_manager_id:
+        save_upload_checkpoint(task_manager_id, page, done=True)
 
-    elif not ProvisioningUserConsumption.objects.filter(hash=hash, status='ERROR').exists():
+    if not ProvisioningUserConsumption.objects.filter(hash=hash, status='ERROR').exists():
         calculate_bill_amounts.delay(hash)
 
 
@@ -14,6 +14,7 @@ from breathecode.provisioning.tasks import calculate_bill_amounts
 import logging
 from unittest.mock import PropertyMock, patch, MagicMock, call
 from breathecode.payments.services.stripe import Stripe
+from breathecode.services.google_cloud import File
 
 from ..mixins import ProvisioningTestCase
 
@@ -713,3 +714,72 @@ class MakeBillsTestSuite(ProvisioningTestCase):
         self.bc.check.calls(logging.Logger.error.call_args_list, [
             call(f'Does not exists bills for hash {slug}', exc_info=True),
         ])
+
+    # Given 1 ProvisioningBill, 2 ProvisioningConsumptionEvent and 2 ProvisioningUserConsumption
+    # When: the activities were ingested from the file with this hash
+    # Then: the range of the bill is the one of the events, and the file is not downloaded
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.error', MagicMock())
+    @patch('breathecode.notify.utils.hook_manager.HookManagerClass.process_model_event', MagicMock())
+    @patch('breathecode.services.google_cloud.File.download', MagicMock())
+    def test_bill_range_from_the_events(self):
+        slug = self.bc.fake.slug()
+        provisioning_bill = {'hash': slug, 'total_amount': 0.0}
+
+        provisioning_prices = [{
+            'price_per_unit': 0,
+        } for _ in range(2)]
+
+        provisioning_consumption_events = [{
+            'quantity': n + 1,
+            'price_id': n + 1,
+            'registered_at': UTC_NOW + timedelta(days=n * 5 - 3),
+        } for n in range(2)]
+
+        provisioning_user_consumptions = [{
+            'status': 'PERSISTED',
+            'hash': slug,
+        } for _ in range(2)]
+
+        model = self.bc.database.create(provisioning_bill=provisioning_bill,
+                                        provisioning_price=provisioning_prices,
+                                        provisioning_vendor={'name': 'Codespaces'},
+                                        provisioning_consumption_event=provisioning_consumption_events,
+                                        provisioning_user_consumption=provisioning_user_consumptions)
+
+        logging.Logger.info.call_args_list = []
+        logging.Logger.error.call_args_list = []
+
+        calculate_bill_amounts(slug)
+
+        self.assertEqual(self.bc.database.list_of('provisioning.ProvisioningUserConsumption'), [
+            {
+                **self.bc.format.to_dict(model.provisioning_user_consumption[0]),
+                'amount': 0.0,
+                'quantity': 3.0,
+            },
+            {
+                **self.bc.format.to_dict(model.provisioning_user_consumption[1]),
+                'amount': 0.0,
+                'quantity': 3.0,
+            },
+        ])
+        started = UTC_NOW.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=3)
+        self.assertEqual(self.bc.database.list_of('provisioning.ProvisioningBill'), [
+            {
+                **self.bc.format.to_dict(model.provisioning_bill),
+                'status': 'PAID',
+                'total_amount': 0.0,
+                'paid_at': UTC_NOW,
+                'started_at': started,
+                'ended_at': UTC_NOW.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=2),
+                'title': f'{MONTHS[started.month - 1]} {started.year}',
+            },
+        ])
+
+        self.assertEqual(File.download.call_count, 0)
+
+        self.bc.check.calls(logging.Logger.info.call_args_list,
+                            [call(f'Starting calculate_bill_amounts for hash {slug}')])
+        self.bc.check.calls(logging.Logger.error.call_args_list, [])
@@ -11,7 +11,8 @@ import pandas as pd
 from pytz import UTC
 from breathecode.provisioning.tasks import upload
 from breathecode.provisioning import tasks
-import re, string, os
+from breathecode.provisioning.models import ProvisioningConsumptionEvent, ProvisioningUserConsumption
+import re, string, os, tempfile
 import logging
 from unittest.mock import PropertyMock, patch, MagicMock, call
 from breathecode.services.datetime_to_iso_format import datetime_to_iso_format
@@ -970,6 +971,8 @@ class CodespacesTestSuite(ProvisioningTestCase):
     @patch('breathecode.admissions.signals.student_edu_status_updated.send', MagicMock())
     @patch('breathecode.notify.utils.hook_manager.HookManagerClass.process_model_event', MagicMock())
     @patch('breathecode.provisioning.tasks.PANDAS_ROWS_LIMIT', PropertyMock(return_value=3))
+    @patch('breathecode.provisioning.tasks.save_upload_checkpoint',
+           MagicMock(wraps=tasks.save_upload_checkpoint))
     def test_pagination(self):
         csv = codespaces_csv(10)
 
@@ -995,10 +998,13 @@ class CodespacesTestSuite(ProvisioningTestCase):
 
         slug = self.bc.fake.slug()
         with patch('breathecode.services.google_cloud.File.download',
-                   MagicMock(side_effect=csv_file_mock(csv))):
+                   MagicMock(side_effect=csv_file_mock(csv))) as download:
 
             upload(slug)
 
+        # every page is read from the same copy of the file
+        self.assertEqual(download.call_count, 1)
+
         self.assertEqual(self.bc.database.list_of('payments.Currency'), [currency_data()])
         self.assertEqual(self.bc.database.list_of('provisioning.ProvisioningBill'), [
             provisioning_bill_data({
@@ -1051,15 +1057,12 @@ class CodespacesTestSuite(ProvisioningTestCase):
             self.bc.format.to_dict(model.github_academy_user),
         )
 
-        self.bc.check.calls(logging.Logger.info.call_args_list,
-                            [call(f'Starting upload for hash {slug}') for _ in range(4)])
+        self.bc.check.calls(logging.Logger.info.call_args_list, [call(f'Starting upload for hash {slug}')])
         self.bc.check.calls(logging.Logger.error.call_args_list, [])
 
-        self.bc.check.calls(tasks.upload.delay.call_args_list, [
-            call(slug, page=1, task_manager_id=1),
-            call(slug, page=2, task_manager_id=1),
-            call(slug, page=3, task_manager_id=1),
-        ])
+        self.bc.check.calls(tasks.upload.delay.call_args_list, [])
+        self.assertEqual(tasks.save_upload_checkpoint.call_args_list,
+                         [call(1, n) for n in range(1, 5)] + [call(1, 4, done=True)])
 
         self.bc.check.calls(tasks.calculate_bill_amounts.delay.call_args_list, [call(slug)])
 
@@ -1623,6 +1626,8 @@ class GitpodTestSuite(ProvisioningTestCase):
     @patch('breathecode.admissions.signals.student_edu_status_updated.send', MagicMock())
     @patch('breathecode.notify.utils.hook_manager.HookManagerClass.process_model_event', MagicMock())
     @patch('breathecode.provisioning.tasks.PANDAS_ROWS_LIMIT', PropertyMock(return_value=3))
+    @patch('breathecode.provisioning.tasks.save_upload_checkpoint',
+           MagicMock(wraps=tasks.save_upload_checkpoint))
     def test_pagination(self):
         csv = gitpod_csv(10)
 
@@ -1703,16 +1708,311 @@ class GitpodTestSuite(ProvisioningTestCase):
         self.assertEqual(self.bc.database.list_of('authenticate.GithubAcademyUser'),
                          self.bc.format.to_dict(model.github_academy_user))
 
-        self.bc.check.calls(logging.Logger.info.call_args_list,
-                            [call(f'Starting upload for hash {slug}') for _ in range(4)])
+        self.bc.check.calls(logging.Logger.info.call_args_list, [call(f'Starting upload for hash {slug}')])
         self.bc.check.calls(logging.Logger.error.call_args_list, [])
 
-        self.bc.check.calls(tasks.upload.delay.call_args_list, [
-            call(slug, page=1, task_manager_id=1),
-            call(slug, page=2, task_manager_id=1),
-            call(slug, page=3, task_manager_id=1),
-        ])
+        self.bc.check.calls(tasks.upload.delay.call_args_list, [])
+        self.assertEqual(tasks.save_upload_checkpoint.call_args_list,
+                         [call(1, n) for n in range(1, 5)] + [call(1, 4, done=True)])
+
+        self.bc.check.calls(tasks.calculate_bill_amounts.delay.call_args_list, [call(slug)])
+
+        tasks.PANDAS_ROWS_LIMIT = limit
+
+    # Given: a csv with gitpod data and 10 User, 10 GithubAcademyUser, 10 GithubAcademyUserLog
+    #     -> and 1 ProvisioningVendor of type Gitpod
+    # When: the page is retried after it saved some of its rows
+    # Then: the task should save just the missing rows, and add them once to their consumptions and bills
+    @patch.multiple('breathecode.services.google_cloud.Storage',
+                    __init__=MagicMock(return_value=None),
+                    client=PropertyMock(),
+                    create=True)
+    @patch.multiple(
+        'breathecode.services.google_cloud.File',
+        __init__=MagicMock(return_value=None),
+        bucket=PropertyMock(),
+        file_name=PropertyMock(),
+        upload=MagicMock(),
+        exists=MagicMock(return_value=True),
+        url=MagicMock(return_value='https://storage.cloud.google.com/media-breathecode/hardcoded_url'),
+        create=True)
+    @patch('breathecode.provisioning.tasks.upload.delay', MagicMock(wraps=upload.delay))
+    @patch('breathecode.provisioning.tasks.calculate_bill_amounts.delay', MagicMock())
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.error', MagicMock())
+    @patch('breathecode.admissions.signals.student_edu_status_updated.send', MagicMock())
+    @patch('breathecode.notify.utils.hook_manager.HookManagerClass.process_model_event', MagicMock())
+    def test_from_github_credentials__page_retried(self):
+        csv = gitpod_csv(10)
+
+        github_academy_users = [{
+            'username': username,
+        } for username in csv['userName']]
+        github_academy_user_logs = [{
+            'storage_status': 'SYNCHED',
+            'storage_action': 'ADD',
+            'academy_user_id': n + 1,
+        } for n in range(10)]
+        provisioning_vendor = {'name': 'Gitpod'}
+        self.bc.database.create(user=10,
+                                github_academy_user=github_academy_users,
+                                github_academy_user_log=github_academy_user_logs,
+                                provisioning_vendor=provisioning_vendor)
+
+        slug = self.bc.fake.slug()
+        with patch('breathecode.services.google_cloud.File.download',
+                   MagicMock(side_effect=csv_file_mock(csv))):
+
+            upload(slug)
+
+            # the page failed after it saved its first 6 rows
+            ProvisioningConsumptionEvent.objects.filter(csv_row__gte=6).delete()
+
+            upload(slug)
+
+        events = self.bc.database.list_of('provisioning.ProvisioningConsumptionEvent')
+        self.assertEqual(sorted(x['csv_row'] for x in events), list(range(10)))
+
+        consumptions = self.bc.database.list_of('provisioning.ProvisioningUserConsumption')
+        self.assertEqual(sorted(x['username'] for x in consumptions), sorted(csv['userName']))
+
+        self.assertEqual(len(self.bc.database.list_of('provisioning.ProvisioningBill')), 1)
+
+        # every event was added once to the consumption of its user
+        Events = ProvisioningUserConsumption.events.through
+        self.assertEqual(
+            sorted(
+                Events.objects.values_list('provisioninguserconsumption__username',
+                                           'provisioningconsumptionevent__csv_row')),
+            sorted((csv['userName'][n], n) for n in range(10)))
+
+        Bills = ProvisioningUserConsumption.bills.through
+        self.assertEqual(
+            sorted(Bills.objects.values_list('provisioninguserconsumption_id', 'provisioningbill_id')),
+            [(x['id'], 1) for x in sorted(consumptions, key=lambda x: x['id'])])
+
+        # the copy of the file is removed
+        self.assertEqual(
+            [x for x in os.listdir(tempfile.gettempdir()) if x.startswith(f'provisioning-{slug}-')], [])
+
+        self.bc.check.calls(logging.Logger.error.call_args_list, [])
+        self.bc.check.calls(tasks.calculate_bill_amounts.delay.call_args_list, [call(slug), call(slug)])
+
+    # Given: a csv with gitpod data and 10 User, 10 GithubAcademyUser, 10 GithubAcademyUserLog
+    #     -> and 1 ProvisioningVendor of type Gitpod
+    # When: the upload is resumed from its third page
+    # Then: the task should save just the rows of the pages that were not uploaded
+    @patch.multiple('breathecode.services.google_cloud.Storage',
+                    __init__=MagicMock(return_value=None),
+                    client=PropertyMock(),
+                    create=True)
+    @patch.multiple(
+        'breathecode.services.google_cloud.File',
+        __init__=MagicMock(return_value=None),
+        bucket=PropertyMock(),
+        file_name=PropertyMock(),
+        upload=MagicMock(),
+        exists=MagicMock(return_value=True),
+        url=MagicMock(return_value='https://storage.cloud.google.com/media-breathecode/hardcoded_url'),
+        create=True)
+    @patch('breathecode.provisioning.tasks.upload.delay', MagicMock(wraps=upload.delay))
+    @patch('breathecode.provisioning.tasks.calculate_bill_amounts.delay', MagicMock())
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.error', MagicMock())
+    @patch('breathecode.admissions.signals.student_edu_status_updated.send', MagicMock())
+    @patch('breathecode.notify.utils.hook_manager.HookManagerClass.process_model_event', MagicMock())
+    @patch('breathecode.provisioning.tasks.PANDAS_ROWS_LIMIT', PropertyMock(return_value=3))
+    def test_from_github_credentials__resumed(self):
+        csv = gitpod_csv(10)
+
+        limit = tasks.PANDAS_ROWS_LIMIT
+        tasks.PANDAS_ROWS_LIMIT = 3
+
+        github_academy_users = [{
+            'username': username,
+        } for username in csv['userName']]
+        github_academy_user_logs = [{
+            'storage_status': 'SYNCHED',
+            'storage_action': 'ADD',
+            'academy_user_id': n + 1,
+        } for n in range(10)]
+        provisioning_vendor = {'name': 'Gitpod'}
+        self.bc.database.create(user=10,
+                                github_academy_user=github_academy_users,
+                                github_academy_user_log=github_academy_user_logs,
+                                provisioning_vendor=provisioning_vendor)
+
+        slug = self.bc.fake.slug()
+        with patch('breathecode.services.google_cloud.File.download',
+                   MagicMock(side_effect=csv_file_mock(csv))) as download:
+
+            upload(slug, page=2)
+
+        self.assertEqual(download.call_count, 1)
+
+        events = self.bc.database.list_of('provisioning.ProvisioningConsumptionEvent')
+        self.assertEqual(sorted(x['csv_row'] for x in events), list(range(6, 10)))
 
+        consumptions = self.bc.database.list_of('provisioning.ProvisioningUserConsumption')
+        self.assertEqual(sorted(x['username'] for x in consumptions), sorted(csv['userName'][6:]))
+
+        self.bc.check.calls(logging.Logger.error.call_args_list, [])
+        self.bc.check.calls(tasks.calculate_bill_amounts.delay.call_args_list, [call(slug)])
+
+        tasks.PANDAS_ROWS_LIMIT = limit
+
+    # Given: a csv with gitpod data and 10 User, 10 GithubAcademyUser, 10 GithubAcademyUserLog
+    #     -> and 1 ProvisioningVendor of type Gitpod
+    # When: the time budget of a run is spent after each page
+    # Then: the task should enqueue the next pages and read all of them from the same copy
+    @patch.multiple('breathecode.services.google_cloud.Storage',
+                    __init__=MagicMock(return_value=None),
+                    client=PropertyMock(),
+                    create=True)
+    @patch.multiple(
+        'breathecode.services.google_cloud.File',
+        __init__=MagicMock(return_value=None),
+        bucket=PropertyMock(),
+        file_name=PropertyMock(),
+        upload=MagicMock(),
+        exists=MagicMock(return_value=True),
+        url=MagicMock(return_value='https://storage.cloud.google.com/media-breathecode/hardcoded_url'),
+        create=True)
+    @patch('breathecode.provisioning.tasks.upload.delay', MagicMock(wraps=upload.delay))
+    @patch('breathecode.provisioning.tasks.calculate_bill_amounts.delay', MagicMock())
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.error', MagicMock())
+    @patch('breathecode.admissions.signals.student_edu_status_updated.send', MagicMock())
+    @patch('breathecode.notify.utils.hook_manager.HookManagerClass.process_model_event', MagicMock())
+    @patch('breathecode.provisioning.tasks.PANDAS_ROWS_LIMIT', PropertyMock(return_value=3))
+    @patch('breathecode.provisioning.tasks.UPLOAD_TIME_BUDGET', 0)
+    def test_from_github_credentials__time_budget_spent(self):
+        csv = gitpod_csv(10)
+
+        limit = tasks.PANDAS_ROWS_LIMIT
+        tasks.PANDAS_ROWS_LIMIT = 3
+
+        github_academy_users = [{
+            'username': username,
+        } for username in csv['userName']]
+        github_academy_user_logs = [{
+            'storage_status': 'SYNCHED',
+            'storage_action': 'ADD',
+            'academy_user_id': n + 1,
+        } for n in range(10)]
+        provisioning_vendor = {'name': 'Gitpod'}
+        self.bc.database.create(user=10,
+                                github_academy_user=github_academy_users,
+                                github_academy_user_log=github_academy_user_logs,
+                                provisioning_vendor=provisioning_vendor)
+
+        slug = self.bc.fake.slug()
+        with patch('breathecode.services.google_cloud.File.download',
+                   MagicMock(side_effect=csv_file_mock(csv))) as download:
+
+            upload(slug, total_pages=4)
+
+        # each run downloads its own copy, the next one could run in another worker
+        self.assertEqual(download.call_count, 4)
+
+        events = self.bc.database.list_of('provisioning.ProvisioningConsumptionEvent')
+        self.assertEqual(sorted(x['csv_row'] for x in events), list(range(10)))
+
+        consumptions = self.bc.database.list_of('provisioning.ProvisioningUserConsumption')
+        self.assertEqual(sorted(x['username'] for x in consumptions), sorted(csv['userName']))
+
+        task_managers = self.bc.database.list_of('commons.TaskManager')
+        self.assertEqual([(x['status'], x['current_page'], x['total_pages']) for x in task_managers],
+                         [('DONE', 4, 4)])
+
+        # the copy of the file is removed
+        self.assertEqual(
+            [x for x in os.listdir(tempfile.gettempdir()) if x.startswith(f'provisioning-{slug}-')], [])
+
+        self.bc.check.calls(logging.Logger.error.call_args_list, [])
+        self.bc.check.calls(tasks.upload.delay.call_args_list,
+                            [call(slug, page=n, task_manager_id=1) for n in range(1, 4)])
+        self.bc.check.calls(tasks.calculate_bill_amounts.delay.call_args_list, [call(slug)])
+
+        tasks.PANDAS_ROWS_LIMIT = limit
+
+    # Given: a csv with gitpod data and 10 User, 10 GithubAcademyUser, 10 GithubAcademyUserLog
+    #     -> and 1 ProvisioningVendor of type gitpod
+    # When: the time budget is spent, and the continuation runs in another worker
+    # Then: the first run removes its copy, and the continuation downloads the file again
+    @patch.multiple('breathecode.services.google_cloud.Storage',
+                    __init__=MagicMock(return_value=None),
+                    client=PropertyMock(),
+                    create=True)
+    @patch.multiple(
+        'breathecode.services.google_cloud.File',
+        __init__=MagicMock(return_value=None),
+        bucket=PropertyMock(),
+        file_name=PropertyMock(),
+        upload=MagicMock(),
+        exists=MagicMock(return_value=True),
+        url=MagicMock(return_value='https://storage.cloud.google.com/media-breathecode/hardcoded_url'),
+        create=True)
+    @patch('breathecode.provisioning.tasks.upload.delay', MagicMock())
+    @patch('breathecode.provisioning.tasks.calculate_bill_amounts.delay', MagicMock())
+    @patch('django.utils.timezone.now', MagicMock(return_value=UTC_NOW))
+    @patch('logging.Logger.info', MagicMock())
+    @patch('logging.Logger.error', MagicMock())
+    @patch('breathecode.admissions.signals.student_edu_status_updated.send', MagicMock())
+    @patch('breathecode.notify.utils.hook_manager.HookManagerClass.process_model_event', MagicMock())
+    @patch('breathecode.provisioning.tasks.PANDAS_ROWS_LIMIT', PropertyMock(return_value=3))
+    def test_from_github_credentials__continued_without_the_copy(self):
+        csv = gitpod_csv(10)
+
+        limit = tasks.PANDAS_ROWS_LIMIT
+        tasks.PANDAS_ROWS_LIMIT = 3
+
+        github_academy_users = [{
+            'username': username,
+        } for username in csv['userName']]
+        github_academy_user_logs = [{
+            'storage_status': 'SYNCHED',
+            'storage_action': 'ADD',
+            'academy_user_id': n + 1,
+        } for n in range(10)]
+        provisioning_vendor = {'name': 'Gitpod'}
+        self.bc.database.create(user=10,
+                                github_academy_user=github_academy_users,
+                                github_academy_user_log=github_academy_user_logs,
+                                provisioning_vendor=provisioning_vendor)
+
+        slug = self.bc.fake.slug()
+        with patch('breathecode.services.google_cloud.File.download',
+                   MagicMock(side_effect=csv_file_mock(csv))) as download:
+
+            with patch('breathecode.provisioning.tasks.UPLOAD_TIME_BUDGET', 0):
+                upload(slug, total_pages=4)
+
+            # the copy is removed before the continuation is enqueued
+            self.assertEqual(
+                [x for x in os.listdir(tempfile.gettempdir()) if x.startswith(f'provisioning-{slug}-')], [])
+
+            self.bc.check.calls(tasks.upload.delay.call_args_list, [call(slug, page=1, task_manager_id=1)])
+            self.bc.check.calls(tasks.calculate_bill_amounts.delay.call_args_list, [])
+
+            upload(slug, page=1, task_manager_id=1)
+
+        self.assertEqual(download.call_count, 2)
+
+        events = self.bc.database.list_of('provisioning.ProvisioningConsumptionEvent')
+        self.assertEqual(sorted(x['csv_row'] for x in events), list(range(10)))
+
+        task_managers = self.bc.database.list_of('commons.TaskManager')
+        self.assertEqual([(x['status'], x['current_page'], x['total_pages']) for x in task_managers],
+                         [('DONE', 4, 4)])
+
+        self.assertEqual(
+            [x for x in os.listdir(tempfile.gettempdir()) if x.startswith(f'provisioning-{slug}-')], [])
+
+        self.bc.check.calls(logging.Logger.error.call_args_list, [])
         self.bc.check.calls(tasks.calculate_bill_amounts.delay.call_args_list, [call(slug)])
 
         tasks.PANDAS_ROWS_LIMIT = limit
@@ -14,6 +14,7 @@ from breathecode.services.seo import SEOAnalyzer
 from .models import (Asset, AssetTechnology, AssetAlias, AssetErrorLog, KeywordCluster, AssetCategory,
                      AssetKeyword, AssetComment, SEOReport, AssetImage, OriginalityScan,
                      CredentialsOriginality, SyllabusVersionProxy, ContentVariable)
+from .caches import AssetCache
 from .tasks import (async_pull_from_github, async_test_asset, async_execute_seo_report,
                     async_regenerate_asset_readme, async_download_readme_images, async_remove_img_from_cloud,
                     async_upload_image_to_bucket)
@@ -33,6 +34,7 @@ lang_flags = {
 
 
 def add_gitpod(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     assets = queryset.update(gitpod=True)
 
 
@@ -40,6 +42,7 @@ add_gitpod.short_description = 'Add GITPOD flag (to open on gitpod)'
 
 
 def remove_gitpod(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     assets = queryset.update(gitpod=False)
 
 
@@ -47,6 +50,7 @@ remove_gitpod.short_description = 'Remove GITPOD flag'
 
 
 def make_external(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     result = queryset.update(external=True)
 
 
@@ -54,6 +58,7 @@ make_external.short_description = 'Make it an EXTERNAL resource (new window)'
 
 
 def make_internal(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     result = queryset.update(external=False)
 
 
@@ -61,6 +66,7 @@ make_internal.short_description = 'Make it an INTERNAL resource (same window)'
 
 
 def pull_content_from_github(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     queryset.update(sync_status='PENDING', status_text='Starting to sync...')
     assets = queryset.all()
     for a in assets:
@@ -69,6 +75,7 @@ def pull_content_from_github(modeladmin, request, queryset):
 
 
 def pull_content_from_github_override_meta(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     queryset.update(sync_status='PENDING', status_text='Starting to sync...')
     assets = queryset.all()
     for a in assets:
@@ -77,6 +84,7 @@ def pull_content_from_github_override_meta(modeladmin, request, queryset):
 
 
 def async_regenerate_readme(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     queryset.update(cleaning_status='PENDING', cleaning_status_details='Starting to clean...')
     assets = queryset.all()
     for a in assets:
@@ -158,6 +166,7 @@ def generate_spanish_translation(modeladmin, request, queryset):
 
 
 def test_asset_integrity(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     queryset.update(test_status='PENDING')
     assets = queryset.all()
 
@@ -193,10 +202,12 @@ def originality_report(modeladmin, request, queryset):
 
 
 def seo_optimization_off(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     queryset.update(is_seo_tracked=False)
 
 
 def seo_optimization_on(modeladmin, request, queryset):
+    AssetCache().invalidate_queryset(queryset)
     queryset.update(is_seo_tracked=True)
 
 
@@ -1,11 +1,40 @@
 from breathecode.utils import Cache
-from .models import Asset, AssetComment, AssetTechnology, AssetKeyword, KeywordCluster, AssetCategory, ContentVariable
+from .models import (Asset, AssetAlias, AssetComment, AssetTechnology, AssetKeyword, KeywordCluster,
+                     AssetCategory, ContentVariable)
 
 
 class AssetCache(Cache):
     model = Asset
     depends = ['User', 'AssetTechnology', 'AssetCategory', 'KeywordCluster', 'AssetKeyword', 'Assessment']
     parents = ['AssetAlias', 'AssetErrorLog']
+    stale_timeout = 60 * 10
+    lookups = {
+        'slug': ['asset_slug', 'slug'],
+        'academy_id': ['academy_id', 'academy'],
+        'lang': ['language'],
+    }
+
+    def __expand_lookups__(self, lookups):
+        slugs = {x for x in lookups['slug'] if x}
+
+        # the assets are serialized along with the slug and lang of its translations
+        translations = Asset.objects.filter(all_translations__slug__in=slugs).values_list(
+            'slug', 'academy_id', 'lang')
+
+        for slug, academy_id, lang in translations:
+            lookups['slug'].add(slug)
+            lookups['academy_id'].add(academy_id)
+            lookups['lang'].add(lang)
+
+        # the assets can be requested by any of its aliases
+        aliases = AssetAlias.objects.filter(asset__slug__in=lookups['slug']).values_list('slug', flat=True)
+        lookups['slug'] |= set(aliases)
+
+        # language=en is filtered as us
+        if 'us' in lookups['lang']:
+            lookups['lang'].add('en')
+
+        return lookups
 
 
 class AssetCommentCache(Cache):
@@ -2,6 +2,7 @@ import os, requests, logging
 from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Q
 from ...models import Asset
+from ...caches import AssetCache
 from breathecode.admissions.models import Academy
 from ...tasks import async_pull_from_github
 from slugify import slugify
@@ -15,6 +16,14 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
 
         miami = Academy.objects.filter(slug='downtown-miami').first()
-        Asset.objects.filter(academy__isnull=True).update(academy=miami)
-        Asset.objects.filter(status='OK').update(status='PUBLISHED')
-        Asset.objects.filter(status='UNASSIGNED').update(status='NOT_STARTED')
+        cache = AssetCache()
+
+        assets = Asset.objects.filter(academy__isnull=True)
+        cache.invalidate_queryset(assets)
+        assets.update(academy=miami)
+        cache.invalidate(academy_id=miami.id if miami else None)
+
+        for old_status, new_status in [('OK', 'PUBLISHED'), ('UNASSIGNED', 'NOT_STARTED')]:
+            assets = Asset.objects.filter(status=old_status)
+            cache.invalidate_queryset(assets)
+            assets.update(status=new_status)
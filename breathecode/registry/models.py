@@ -1,5 +1,6 @@
 import base64, frontmatter, markdown, pathlib, logging, re, hashlib
 from urllib.parse import urlparse
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import User
 from django.contrib.auth.models import AnonymousUser
@@ -14,6 +15,9 @@ from breathecode.assessment.models import Assessment
 __all__ = ['AssetTechnology', 'Asset', 'AssetAlias']
 logger = logging.getLogger(__name__)
 
+# the parsed readmes are cached by their content, so they never get stale
+README_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
 PUBLIC = 'PUBLIC'
 UNLISTED = 'UNLISTED'
 PRIVATE = 'PRIVATE'
@@ -556,7 +560,23 @@ class Asset(models.Model):
                               status_text='Invalid Readme URL').save()
         return readme
 
+    @staticmethod
+    def get_readme_cache_key(content, format='markdown'):
+        digest = hashlib.sha256((content or '').encode('utf-8')).hexdigest()
+        return f'asset_readme__{format}__{digest}'
+
     def parse(self, readme, format='markdown', remove_frontmatter=False):
+        """
+        Parse the decoded readme, the result is cached by its content, so the same readme is not parsed twice.
+
+        `remove_frontmatter` is not part of the key, the parsed readme never includes its frontmatter.
+        """
+
+        key = Asset.get_readme_cache_key(readme['decoded'], format)
+        if (parsed := cache.get(key)) is not None:
+            readme.update(parsed)
+            return readme
+
         if format == 'markdown':
             _data = frontmatter.loads(readme['decoded'])
             readme['frontmatter'] = _data.metadata
@@ -572,9 +592,20 @@ class Asset(models.Model):
             html_exporter = HTMLExporter(template_name='basic')
             # Process the notebook we loaded earlier
             body, resources = html_exporter.from_notebook_node(notebook)
-            readme['frontmatter'] = resources
+
+            # the resources include the helpers of the templates, they cannot be cached or serialized
+            readme['frontmatter'] = {k: v for k, v in resources.items() if not callable(v)}
             readme['frontmatter']['format'] = format
             readme['html'] = body
+
+        if 'html' in readme:
+            try:
+                cache.set(key, {x: readme[x]
+                                for x in ['decoded', 'frontmatter', 'html']}, README_CACHE_TIMEOUT)
+
+            except Exception:
+                logger.exception(f'The readme of {self.slug} could not be cached')
+
         return readme
 
     def get_thumbnail_name(self):
@@ -82,8 +82,16 @@ def async_regenerate_asset_readme(asset_slug):
 
     a.readme = a.readme_raw
     a.save()
+
     clean_asset_readme(a)
 
+    # the parsed readme is cached before it's requested, even if it could not be cleaned
+    try:
+        a.get_readme(parse=True)
+
+    except Exception:
+        logger.exception(f'Error parsing the readme of the asset {a.slug}')
+
     async_download_readme_images.delay(a.slug)
 
     return a.cleaning_status == 'OK'
@@ -0,0 +1,126 @@
+"""
+Test Asset.parse
+"""
+import json
+from unittest.mock import MagicMock
+
+import markdown
+import pytest
+from django.core.cache import cache
+
+from breathecode.registry.models import Asset
+
+# enable this file to use the database
+pytestmark = pytest.mark.usefixtures('db')
+
+CONTENT = """---
+title: Hello
+---
+# Hello world
+"""
+
+NOTEBOOK = json.dumps({
+    'cells': [{
+        'cell_type': 'markdown',
+        'metadata': {},
+        'source': ['# Hello world'],
+    }],
+    'metadata': {},
+    'nbformat': 4,
+    'nbformat_minor': 5,
+})
+
+
+def spy_markdown(monkeypatch):
+    calls = []
+    original = markdown.markdown
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr('markdown.markdown', wrapper)
+    return calls
+
+
+def spy_notebook_exporter(monkeypatch):
+    from nbconvert import HTMLExporter
+
+    calls = []
+    original = HTMLExporter.from_notebook_node
+
+    def wrapper(self, *args, **kwargs):
+        calls.append(args)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(HTMLExporter, 'from_notebook_node', wrapper)
+    return calls
+
+
+def test_parsed_once(bc, monkeypatch):
+    model = bc.database.create(asset={'readme': Asset.encode(CONTENT), 'readme_raw': Asset.encode(CONTENT)})
+    cache.clear()
+
+    calls = spy_markdown(monkeypatch)
+
+    first = model.asset.get_readme(parse=True)
+    second = model.asset.get_readme(parse=True)
+
+    assert len(calls) == 1
+    assert first['html'] == second['html'] == '<h1>Hello world</h1>'
+    assert first['frontmatter'] == second['frontmatter'] == {'title': 'Hello', 'format': 'markdown'}
+    assert first['decoded'] == second['decoded'] == '# Hello world'
+
+
+def test_parsed_again_when_the_content_changes(bc, monkeypatch):
+    model = bc.database.create(asset={'readme': Asset.encode(CONTENT), 'readme_raw': Asset.encode(CONTENT)})
+    cache.clear()
+
+    calls = spy_markdown(monkeypatch)
+
+    first = model.asset.get_readme(parse=True)
+
+    model.asset.readme = Asset.encode(CONTENT.replace('world', 'there'))
+    second = model.asset.get_readme(parse=True)
+
+    assert len(calls) == 2
+    assert first['html'] == '<h1>Hello world</h1>'
+    assert second['html'] == '<h1>Hello there</h1>'
+
+
+def test_notebook_parsed_once(bc, monkeypatch):
+    asset = {
+        'readme': Asset.encode(NOTEBOOK),
+        'readme_raw': Asset.encode(NOTEBOOK),
+        'readme_url': 'https://github.com/4GeeksAcademy/hello/blob/main/README.ipynb',
+    }
+    model = bc.database.create(asset=asset)
+    cache.clear()
+
+    calls = spy_notebook_exporter(monkeypatch)
+
+    first = model.asset.get_readme(parse=True)
+    second = model.asset.get_readme(parse=True)
+
+    assert len(calls) == 1
+    assert '>Hello world<' in first['html']
+    assert first['html'] == second['html']
+    assert first['frontmatter']['format'] == second['frontmatter']['format'] == 'notebook'
+
+
+def test_parsed_when_the_readme_is_modified(bc, monkeypatch, enable_signals):
+    monkeypatch.setattr('breathecode.registry.tasks.async_download_readme_images.delay', MagicMock())
+
+    model = bc.database.create(asset={'readme': Asset.encode(CONTENT), 'readme_raw': Asset.encode(CONTENT)})
+    cache.clear()
+    enable_signals()
+
+    model.asset.readme_raw = Asset.encode(CONTENT.replace('world', 'there'))
+    model.asset.save()
+
+    # the readme was parsed by async_regenerate_asset_readme, before it was requested
+    calls = spy_markdown(monkeypatch)
+    readme = Asset.objects.get(id=model.asset.id).get_readme(parse=True)
+
+    assert calls == []
+    assert readme['html'] == '<h1>Hello there</h1>'
@@ -148,7 +148,7 @@ class AcademyTechnologyView(APIView, GenerateLookupsMixin):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = AssetTechnology.objects.all()
         lookup = {}
@@ -487,7 +487,7 @@ class AssetView(APIView, GenerateLookupsMixin):
         lang = get_user_language(request)
 
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         if asset_slug is not None:
             asset = Asset.get_by_slug(asset_slug, request)
@@ -767,7 +767,7 @@ class AcademyAssetView(APIView, GenerateLookupsMixin):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         if asset_slug is not None:
             asset = Asset.get_by_slug(asset_slug, request)
@@ -1021,7 +1021,7 @@ class AcademyAssetCommentView(APIView, GenerateLookupsMixin):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = AssetComment.objects.filter(asset__academy__id=academy_id)
         lookup = {}
@@ -1126,7 +1126,7 @@ class AcademyCategoryView(APIView, GenerateLookupsMixin):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = AssetCategory.objects.filter(academy__id=academy_id)
         lookup = {}
@@ -1210,7 +1210,7 @@ class AcademyKeywordView(APIView, GenerateLookupsMixin):
         handler = self.extensions(request)
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         items = AssetKeyword.objects.filter(academy__id=academy_id)
         lookup = {}
@@ -1305,7 +1305,7 @@ class AcademyKeywordClusterView(APIView, GenerateLookupsMixin):
         # cache has been disabled because I cant get it to refresh then keywords are resigned to assets
         # cache = handler.cache.get()
         # if cache is not None:
-        #     return Response(cache, status=status.HTTP_200_OK)
+        #     return cache
 
         items = KeywordCluster.objects.filter(academy__id=academy_id)
         lookup = {}
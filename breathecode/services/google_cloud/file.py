@@ -1,12 +1,17 @@
 import logging, os
 from io import StringIO, BytesIO, TextIOWrapper, BufferedReader
-from typing import Optional, overload
+from typing import Iterator, Optional, overload
 from google.cloud.storage import Bucket, Blob
+from google.cloud.storage.fileio import BlobWriter
 
 logger = logging.getLogger(__name__)
 
 __all__ = ['File']
 
+# the chunks of a resumable upload must be a multiple of 256 KB
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 class File:
     """Google Cloud Storage"""
@@ -37,6 +42,17 @@ class File:
         if public:
             self.blob.make_public()
 
+    def writer(self, content_type: str = 'text/plain', chunk_size: int = UPLOAD_CHUNK_SIZE) -> BlobWriter:
+        """Open a resumable upload, the content is sent in chunks of `chunk_size` bytes while it's written."""
+        self.blob = self.bucket.blob(self.file_name, chunk_size=chunk_size)
+        return self.blob.open('wb', ignore_flush=True, content_type=content_type)
+
+    def stream(self, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        """Download Blob from Bucket in chunks"""
+        with self.bucket.blob(self.file_name).open('rb', chunk_size=chunk_size) as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
     def exists(self) -> bool:
         """Check if Blob exists in Bucket"""
 
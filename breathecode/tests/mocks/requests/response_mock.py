@@ -37,3 +37,12 @@ class ResponseMock():
     def json(self) -> dict:
         """Convert Response to JSON"""
         return self.data
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        """Iterate over the content, like a streamed Response"""
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        """Release the connection"""
+        pass
@@ -5,6 +5,7 @@ this is one wrapper to import utils like one package
 from .admin_export_csv_mixin import *
 from .attr_dict import *
 from .breathecode_exception_handler import *
+from .buffered_counter import *
 from .cache import *
 from .decorators import *
 from .header_limit_offset_pagination import *
@@ -1,10 +1,14 @@
 import csv
+import os
 from django.http import StreamingHttpResponse
 from django.contrib import admin, messages
 from django.utils.safestring import mark_safe
 
 __all__ = ['AdminExportCsvMixin']
 
+# the exports with at least these rows are compressed
+GZIP_THRESHOLD = int(os.getenv('DOWNLOADS_GZIP_THRESHOLD', '10000'))
+
 
 class Echo:
     """An object that implements just the write method of the file-like
@@ -37,7 +41,10 @@ class AdminExportCsvMixin:
         from breathecode.monitoring.tasks import async_download_csv
         meta = self.model._meta
         ids = list(queryset.values_list('pk', flat=True))
-        async_download_csv.delay(self.model.__module__, meta.object_name, ids)
+        async_download_csv.delay(self.model.__module__,
+                                 meta.object_name,
+                                 ids,
+                                 compress=len(ids) >= GZIP_THRESHOLD)
         messages.add_message(
             request, messages.INFO,
             mark_safe(
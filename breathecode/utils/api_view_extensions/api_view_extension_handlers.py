@@ -7,7 +7,7 @@ from rest_framework import status
 from breathecode.utils.api_view_extensions.extension_base import ExtensionBase
 from breathecode.utils.api_view_extensions.extensions.language_extension import LanguageExtension
 from breathecode.utils.api_view_extensions.extensions.lookup_extension import LookupExtension
-from .extensions import CacheExtension
+from .extensions import CacheExtension, SortExtension
 
 __all__ = ['APIViewExtensionHandlers']
 is_test_env = os.getenv('ENV') == 'test'
@@ -22,6 +22,7 @@ class APIViewExtensionHandlers:
     cache: Optional[CacheExtension]
     language: Optional[LanguageExtension]
     lookup: Optional[LookupExtension]
+    sort: Optional[SortExtension]
 
     # internal attrs
     _request: WSGIRequest
@@ -37,6 +38,7 @@ class APIViewExtensionHandlers:
         self._request = request
 
         self._instances = set()
+        self.cache = None
 
         for extension in valid_extensions:
             instance = extension(**kwargs)
@@ -79,6 +81,10 @@ class APIViewExtensionHandlers:
         for extension in extensions:
             data, headers = extension._apply_response_mutation(data, headers)
 
+        # the cache already rendered the body, it does not need to be rendered again
+        if self.cache and (response := self.cache._get_response()):
+            return response
+
         return Response(data, status=status.HTTP_200_OK, headers=headers)
 
     def _register_valid_extensions(self) -> None:
@@ -1,12 +1,67 @@
+import json
 import logging
+import re
 from typing import Optional
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from breathecode.utils.api_view_extensions.extension_base import ExtensionBase
 from breathecode.utils.api_view_extensions.priorities.response_order import ResponseOrder
-from breathecode.utils.cache import Cache
+from breathecode.utils.cache import Cache, CacheEntry
 
-__all__ = ['CacheExtension']
+__all__ = ['CacheExtension', 'CachedResponse']
 
 logger = logging.getLogger(__name__)
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class CachedResponse(Response):
+    """
+    Response built from a cache entry, its body was rendered when it was saved.
+    """
+
+    _entry: CacheEntry
+
+    def __init__(self, entry: CacheEntry, status=status.HTTP_200_OK):
+        self._entry = entry
+        super().__init__(None, status=status, headers={**entry['headers'], 'ETag': entry['etag']})
+
+    @property
+    def data(self):
+        if self.status_code == status.HTTP_304_NOT_MODIFIED:
+            return None
+
+        return json.loads(Cache.decode(self._entry))
+
+    @data.setter
+    def data(self, value):
+        ...
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, 'accepted_renderer', None)
+
+        if self.status_code == status.HTTP_304_NOT_MODIFIED:
+            return b''
+
+        # other formats, like csv, must be rendered from the data
+        if not isinstance(renderer, JSONRenderer):
+            del self['ETag']
+            return super().rendered_content
+
+        self['Content-Type'] = renderer.media_type
+        request = self.renderer_context['request']
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+        if self._entry['encoding'] == 'gzip' and re_accepts_gzip.search(accept_encoding):
+            self['Content-Encoding'] = 'gzip'
+            patch_vary_headers(self, ('Accept-Encoding', ))
+            return self._entry['content']
+
+        return Cache.decode(self._entry)
 
 
 class CacheExtension(ExtensionBase):
@@ -14,9 +69,11 @@ class CacheExtension(ExtensionBase):
     _cache: Cache
     _cache_per_user: bool
     _cache_prefix: str
+    _entry: Optional[CacheEntry]
 
     def __init__(self, cache: Cache, **kwargs) -> None:
         self._cache = cache()
+        self._entry = None
 
     def _optional_dependencies(self, cache_per_user: bool = False, cache_prefix: str = '', **kwargs):
         self._cache_per_user = cache_per_user
@@ -36,7 +93,15 @@ class CacheExtension(ExtensionBase):
 
         return {**self._request.GET.dict(), **self._request.parser_context['kwargs'], **extends}
 
-    def get(self) -> dict:
+    def _build_response(self, entry: CacheEntry) -> CachedResponse:
+        etags = [x.removeprefix('W/') for x in parse_etags(self._request.META.get('HTTP_IF_NONE_MATCH', ''))]
+
+        if '*' in etags or entry['etag'] in etags:
+            return CachedResponse(entry, status=status.HTTP_304_NOT_MODIFIED)
+
+        return CachedResponse(entry)
+
+    def get(self) -> Optional[CachedResponse]:
         try:
             # allow requests to disable cache with querystring "cache" variable
             _cache_is_active = self._request.GET.get('cache', 'true').lower() in ['true', '1', 'yes']
@@ -45,7 +110,22 @@ class CacheExtension(ExtensionBase):
                 return None
 
             params = self._get_params()
-            return self._cache.get(**params)
+            entry = self._cache.get_entry(**params)
+
+            if entry is not None:
+                self._cache.count('hit')
+                return self._build_response(entry)
+
+            # just one process rebuilds the entry, the others keep serving the stale one meanwhile
+            if self._cache.stale_timeout and not self._cache.lock(**params):
+                entry = self._cache.get_stale_entry(**params)
+
+                if entry is not None:
+                    self._cache.count('stale')
+                    return self._build_response(entry)
+
+            self._cache.count('miss')
+            return None
 
         except Exception:
             return None
@@ -58,5 +138,8 @@ class CacheExtension(ExtensionBase):
 
     def _apply_response_mutation(self, data: list[dict] | dict, headers: dict = {}):
         params = self._get_params()
-        self._cache.set(data, **params)
+        self._entry = self._cache.set(data, headers, **params)
         return (data, headers)
+
+    def _get_response(self) -> Optional[CachedResponse]:
+        return self._build_response(self._entry) if self._entry else None
@@ -1,10 +1,19 @@
+import base64
+import datetime
+import hashlib
 import inspect
+import json
 from collections import OrderedDict
-from typing import Any
+from typing import Any, Optional
 from breathecode.utils.api_view_extensions.extension_base import ExtensionBase
 from breathecode.utils.api_view_extensions.priorities.mutator_order import MutatorOrder
 from breathecode.utils.api_view_extensions.priorities.response_order import ResponseOrder
-from django.db.models import QuerySet
+from breathecode.utils.validation_exception import ValidationException
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
 from rest_framework.utils.urls import replace_query_param, remove_query_param
 
 __all__ = ['PaginationExtension']
@@ -12,9 +21,28 @@ __all__ = ['PaginationExtension']
 REQUIREMENTS = ['cache']
 OFFSET_QUERY_PARAM = 'offset'
 LIMIT_QUERY_PARAM = 'limit'
+CURSOR_QUERY_PARAM = 'cursor'
 MAX_LIMIT = None
 DEFAULT_LIMIT = 1000
 
+COUNT_MODES = ['exact', 'cached', 'estimated']
+COUNT_TIMEOUT = 60 * 5
+
+# the estimates of the planner are not accurate for the small results, and counting them is cheap anyway
+ESTIMATE_THRESHOLD = 10000
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keep the microseconds of the datetimes and times, the cursor must match its row exactly.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+
+        return super().default(o)
+
 
 def _positive_int(integer_string, strict=False, cutoff=None):
     """
@@ -29,14 +57,40 @@ def _positive_int(integer_string, strict=False, cutoff=None):
 
 
 class PaginationExtension(ExtensionBase):
+    """
+    Paginate the queryset by offset, or by cursor if the view passes `paginate_cursor=True`.
+
+    The cursor mode is used when the request does not have an offset, its pages are sorted by the order of the
+    queryset and start at the row saved in the cursor, so its cost does not grow with the depth of the page.
+    `paginate_count` sets how `x-total-count` is got, it can be `exact`, `cached` for some minutes, or
+    `estimated` by the query planner when the result is big. By default the cursor pages use the `cached`
+    count, so their cost does not grow with the size of the result either, the offset pages use the `exact`
+    one.
+    """
 
     _count: int
     _offset: int
     _use_envelope: bool
     _paginate: bool
+    _paginate_cursor: bool
+    _paginate_count: Optional[str]
+    _cursor_mode: bool
+    _next_cursor: Optional[str]
 
     def __init__(self, paginate: bool, **kwargs) -> None:
         self._paginate = paginate
+        self._cursor_mode = False
+        self._next_cursor = None
+
+    def _optional_dependencies(self,
+                               paginate_cursor: bool = False,
+                               paginate_count: Optional[str] = None,
+                               **kwargs):
+        if paginate_count is not None and paginate_count not in COUNT_MODES:
+            raise ValueError(f'paginate_count must be one of {", ".join(COUNT_MODES)}')
+
+        self._paginate_cursor = paginate_cursor
+        self._paginate_count = paginate_count
 
     def _can_modify_queryset(self) -> bool:
         return self._paginate
@@ -51,7 +105,9 @@ class PaginationExtension(ExtensionBase):
         return int(ResponseOrder.PAGINATION) if self._is_paginate() else -1
 
     def _is_paginate(self):
-        return bool(self._request.GET.get(LIMIT_QUERY_PARAM) or self._request.GET.get(OFFSET_QUERY_PARAM))
+        return bool(
+            self._request.GET.get(LIMIT_QUERY_PARAM) or self._request.GET.get(OFFSET_QUERY_PARAM)
+            or self._request.GET.get(CURSOR_QUERY_PARAM))
 
     def _apply_queryset_mutation(self, queryset: QuerySet[Any]):
         if not self._is_paginate():
@@ -61,11 +117,125 @@ class PaginationExtension(ExtensionBase):
         if str(self._request.GET.get('envelope')).lower() in ['false', '0']:
             self._use_envelope = False
 
-        self._count = self._get_count(queryset)
         self._offset = self._get_offset()
         self._limit = self._get_limit()
+
+        fields = None
+        if self._paginate_cursor and OFFSET_QUERY_PARAM not in self._request.GET:
+            fields = self._get_ordering(queryset)
+
+        # the whole result is counted, before the filter of the cursor, so every page shares the cached count
+        mode = self._paginate_count or ('cached' if fields else 'exact')
+        self._count = self._get_count(queryset, mode)
+
+        if fields:
+            return self._apply_cursor(queryset, fields)
+
         return queryset[self._offset:self._offset + self._limit]
 
+    def _get_ordering(self, queryset: QuerySet[Any] | list) -> Optional[list[str]]:
+        """
+        Get the fields that sort the queryset ended by its primary key, or None if they cannot make a cursor.
+
+        Just the fields of the model that are not nullable are supported, a null cannot be compared with the
+        values of a cursor, neither the relations, Django sorts them by the ordering of the related model
+        instead of by its key.
+        """
+
+        if not isinstance(queryset, QuerySet):
+            return None
+
+        query = queryset.query
+        ordering = list(query.order_by or (query.default_ordering and queryset.model._meta.ordering) or [])
+
+        meta = queryset.model._meta
+        fields = []
+
+        for field in ordering:
+            if not isinstance(field, str) or field == '?':
+                return None
+
+            name = field.removeprefix('-')
+            if name != 'pk':
+                try:
+                    model_field = meta.get_field(name)
+                    if model_field.null or model_field.is_relation:
+                        return None
+
+                except FieldDoesNotExist:
+                    return None
+
+            fields.append(field)
+
+        # the primary key breaks the ties, so the rows have a total order
+        if not {'pk', meta.pk.name} & {x.removeprefix('-') for x in fields}:
+            fields.append('pk')
+
+        return fields
+
+    def _apply_cursor(self, queryset: QuerySet[Any], fields: list[str]) -> list[Any]:
+        self._cursor_mode = True
+
+        if (values := self._decode_cursor(fields)) is not None:
+            try:
+                queryset = queryset.filter(self._get_cursor_filter(fields, values))
+
+            except (ValueError, TypeError, ValidationError):
+                raise ValidationException('Invalid cursor', code=400, slug='invalid-cursor')
+
+        # the extra row is the first one of the next page
+        rows = list(queryset[:self._limit + 1])
+        if len(rows) > self._limit:
+            boundary = rows.pop()
+            values = [self._get_cursor_value(boundary, x.removeprefix('-')) for x in fields]
+            self._next_cursor = self._encode_cursor(fields, values)
+
+        return rows
+
+    def _get_cursor_value(self, row: Any, name: str) -> Any:
+        if name == 'pk':
+            return row.pk
+
+        return getattr(row, row._meta.get_field(name).attname)
+
+    def _get_cursor_filter(self, fields: list[str], values: list[Any]) -> Q:
+        query = Q()
+        equal = {}
+
+        for index, (field, value) in enumerate(zip(fields, values)):
+            name = field.removeprefix('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+
+            # the row of the cursor is the first one of the page
+            if index == len(fields) - 1:
+                lookup += 'e'
+
+            query |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+
+        return query
+
+    def _encode_cursor(self, fields: list[str], values: list[Any]) -> str:
+        payload = json.dumps({'sort': fields, 'values': values}, cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('utf-8')
+
+    def _decode_cursor(self, fields: list[str]) -> Optional[list[Any]]:
+        if not (cursor := self._request.GET.get(CURSOR_QUERY_PARAM)):
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+
+        except ValueError:
+            payload = None
+
+        # a cursor of another sort cannot be used
+        if (not isinstance(payload, dict) or payload.get('sort') != fields
+                or not isinstance(payload.get('values'), list) or len(payload['values']) != len(fields)):
+            raise ValidationException('Invalid cursor', code=400, slug='invalid-cursor')
+
+        return payload['values']
+
     def _apply_response_mutation(self, data: list[dict] | dict, headers: dict = {}):
         next_url = self._parse_comma(self._get_next_link())
         previous_url = self._parse_comma(self._get_previous_link())
@@ -98,16 +268,59 @@ class PaginationExtension(ExtensionBase):
 
         return string.replace('%2C', ',')
 
-    def _get_count(self, queryset: QuerySet[Any] | list):
+    def _get_count(self, queryset: QuerySet[Any] | list, mode: str = 'exact'):
         """
         Determine an object count, supporting either querysets or regular lists.
         """
 
         try:
+            if mode == 'cached':
+                return self._get_cached_count(queryset)
+
+            if mode == 'estimated' and (count := self._get_estimated_count(queryset)) is not None:
+                return count
+
             return queryset.count()
         except (AttributeError, TypeError):
             return len(queryset)
 
+    def _get_cached_count(self, queryset: QuerySet[Any]) -> int:
+        try:
+            sql, params = queryset.query.sql_with_params()
+
+        except EmptyResultSet:
+            return 0
+
+        hash = hashlib.sha256(f'{queryset.db}:{sql}:{params}'.encode('utf-8')).hexdigest()
+        key = f'pagination_count__{hash}'
+
+        if (count := cache.get(key)) is None:
+            count = queryset.count()
+            cache.set(key, count, COUNT_TIMEOUT)
+
+        return count
+
+    def _get_estimated_count(self, queryset: QuerySet[Any]) -> Optional[int]:
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+
+        except EmptyResultSet:
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        return estimate if estimate >= ESTIMATE_THRESHOLD else None
+
     def _get_limit(self):
         if LIMIT_QUERY_PARAM:
             try:
@@ -126,6 +339,13 @@ class PaginationExtension(ExtensionBase):
             return 0
 
     def _get_first_link(self):
+        if self._cursor_mode:
+            if not self._request.GET.get(CURSOR_QUERY_PARAM):
+                return None
+
+            url = self._request.build_absolute_uri()
+            return remove_query_param(url, CURSOR_QUERY_PARAM)
+
         if self._offset <= 0:
             return None
 
@@ -133,7 +353,8 @@ class PaginationExtension(ExtensionBase):
         return remove_query_param(url, OFFSET_QUERY_PARAM)
 
     def _get_last_link(self):
-        if self._offset + self._limit >= self._count:
+        # the cursors just go forward
+        if self._cursor_mode or self._offset + self._limit >= self._count:
             return None
 
         url = self._request.build_absolute_uri()
@@ -142,6 +363,14 @@ class PaginationExtension(ExtensionBase):
         return replace_query_param(url, OFFSET_QUERY_PARAM, offset)
 
     def _get_next_link(self):
+        if self._cursor_mode:
+            if not self._next_cursor:
+                return None
+
+            url = self._request.build_absolute_uri()
+            url = replace_query_param(url, LIMIT_QUERY_PARAM, self._limit)
+            return replace_query_param(url, CURSOR_QUERY_PARAM, self._next_cursor)
+
         if self._offset + self._limit >= self._count:
             return None
 
@@ -152,7 +381,7 @@ class PaginationExtension(ExtensionBase):
         return replace_query_param(url, OFFSET_QUERY_PARAM, offset)
 
     def _get_previous_link(self):
-        if self._offset <= 0:
+        if self._cursor_mode or self._offset <= 0:
             return None
 
         url = self._request.build_absolute_uri()
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 from breathecode.utils.api_view_extensions.extension_base import ExtensionBase
 from breathecode.utils.api_view_extensions.priorities.mutator_order import MutatorOrder
 from breathecode.utils import GenerateLookupsMixin
@@ -12,17 +12,27 @@ REQUIREMENTS = ['cache']
 class SortExtension(ExtensionBase, GenerateLookupsMixin):
 
     _sort: str
+    _priority: list
 
     def __init__(self, sort: str, **kwargs) -> None:
         self._sort = sort
+        self._priority = []
+
+    def prepend(self, *fields) -> None:
+        """Sort by these fields first, the sort of the request just breaks their ties."""
+
+        self._priority = list(fields)
+
+    def _instance_name(self) -> Optional[str]:
+        return 'sort'
 
     def _apply_queryset_mutation(self, queryset: QuerySet[Any]):
         lookups = self.generate_lookups(self._request, many_fields=['sort'])
         sort_in = lookups['sort__in'] if 'sort__in' in lookups else ''
         if len(sort_in) != 0:
-            queryset = queryset.order_by(*sort_in or self._sort)
+            queryset = queryset.order_by(*self._priority, *sort_in or self._sort)
         else:
-            queryset = queryset.order_by(self._request.GET.get('sort') or self._sort)
+            queryset = queryset.order_by(*self._priority, self._request.GET.get('sort') or self._sort)
         return queryset
 
     def _can_modify_queryset(self) -> bool:
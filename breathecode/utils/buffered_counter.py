@@ -0,0 +1,139 @@
+from __future__ import annotations
+from typing import Any, Callable, Hashable
+
+from django.core.cache import cache
+
+__all__ = ['BufferedCounter']
+
+
+class BufferedCounter:
+    """
+    Counter of the hits of many objects that are saved in batches, instead of one query per hit.
+
+    Every object has a counter in the cache, and the first hit since the last flush adds it to a queue of
+    numbered slots, `flush` reads a batch of that queue and passes the hits of each object to `save`. The
+    objects are identified by a string or a tuple, all the keys start with `prefix`.
+
+    ```py
+    clicks = BufferedCounter('short_links__clicks', save_clicks)
+
+    if clicks.add('my-link'):
+        flush_clicks.apply_async(countdown=clicks.flush_interval)
+    ```
+    """
+
+    def __init__(self,
+                 prefix: str,
+                 save: Callable[[dict[Hashable, int]], Any],
+                 *,
+                 batch_size: int = 500,
+                 flush_interval: int = 60,
+                 lock_timeout: int = 60 * 5):
+        self.prefix = prefix
+        self.save = save
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock_timeout = lock_timeout
+
+    def _key(self, name: str | int) -> str:
+        return f'{self.prefix}__{name}'
+
+    def _counter_key(self, item: Hashable) -> str:
+        name = '__'.join(str(x) for x in item) if isinstance(item, tuple) else item
+        return self._key(f'count__{name}')
+
+    def _incr(self, key: str, delta: int = 1) -> int:
+        try:
+            return cache.incr(key, delta)
+
+        except ValueError:
+            if cache.add(key, delta, timeout=None):
+                return delta
+
+            return cache.incr(key, delta)
+
+    def _enqueue(self, item: Hashable) -> None:
+        slot = self._incr(self._key('tail'))
+        cache.set(self._key(slot), item, timeout=None)
+
+    def add(self, *items: Hashable) -> bool:
+        """Count a hit of each item, it returns True if a flush must be scheduled in `flush_interval`."""
+
+        # just the first hit since the last flush adds the object to the queue
+        for item in items:
+            if self._incr(self._counter_key(item)) == 1:
+                self._enqueue(item)
+
+        return cache.add(self._key('scheduled'), 1, timeout=self.flush_interval)
+
+    def _read_queue(self, head: int, limit: int) -> tuple[list[Hashable], int]:
+        """Get the oldest objects of the queue and the slot where they end."""
+
+        tail = min(cache.get(self._key('tail')) or 0, head + limit)
+
+        keys = [self._key(slot) for slot in range(head + 1, tail + 1)]
+        values = cache.get_many(keys)
+
+        items = []
+        last = head
+        gap = cache.get(self._key('gap'))
+
+        for slot, key in zip(range(head + 1, tail + 1), keys):
+            if key in values:
+                item = values[key]
+                items.append(tuple(item) if isinstance(item, list) else item)
+                last = slot
+                continue
+
+            # a slot that was missing in the previous flush too belongs to a hit that never finished
+            if gap == slot:
+                last = slot
+                continue
+
+            cache.set(self._key('gap'), slot, timeout=None)
+            break
+
+        return items, last
+
+    def flush(self, limit: int | None = None) -> dict[Hashable, int]:
+        """Save the hits of a batch of objects, it returns the hits of the objects that were updated."""
+
+        lock = self._key('lock')
+        if not cache.add(lock, 1, timeout=self.lock_timeout):
+            return {}
+
+        try:
+            head = cache.get(self._key('head')) or 0
+            items, last = self._read_queue(head, limit or self.batch_size)
+
+            counters = {item: self._counter_key(item) for item in items}
+            values = cache.get_many(list(counters.values()))
+            hits = {item: values.get(key) or 0 for item, key in counters.items()}
+            saved = {item: value for item, value in hits.items() if value}
+
+            if saved:
+                self.save(saved)
+
+            cache.delete_many([self._key(slot) for slot in range(head + 1, last + 1)])
+            cache.set(self._key('head'), last, timeout=None)
+
+            # the hits received meanwhile are kept, and their objects go back to the queue
+            for item, value in saved.items():
+                try:
+                    pending = cache.decr(counters[item], value)
+
+                except ValueError:
+                    pending = 0
+
+                if pending > 0:
+                    self._enqueue(item)
+
+        finally:
+            cache.delete(lock)
+
+        return saved
+
+    def pending(self) -> int:
+        """Get the number of objects in the queue."""
+
+        return (cache.get(self._key('tail')) or 0) - (cache.get(self._key('head')) or 0)
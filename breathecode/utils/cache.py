@@ -1,105 +1,336 @@
 from __future__ import annotations
-import urllib.parse, json
+import urllib.parse, json, time, gzip, hashlib
+from typing import Optional, TypedDict
 from django.core.cache import cache
-from datetime import datetime
-from breathecode.tests.mixins import DatetimeMixin
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.signals import post_init
+from django.utils.http import quote_etag
+from rest_framework.renderers import JSONRenderer
 
-__all__ = ['Cache', 'CACHE_DESCRIPTORS']
+__all__ = ['Cache', 'CacheEntry', 'CACHE_DESCRIPTORS']
 CACHE_DESCRIPTORS: dict[int, Cache] = {}
+COMPRESS_MIN_LENGTH = 1024
+MAX_INVALIDATED_SCOPES = 100
 
 
-class Cache(DatetimeMixin):
+def _keep_loaded_lookups(sender, instance, **kwargs):
+    """Keep the lookups that the instance was loaded with, to invalidate the entries where it was."""
+
+    instance._cache_lookups = CACHE_DESCRIPTORS[hash(sender)].get_loaded_lookups(instance)
+
+
+class CacheEntry(TypedDict):
+    content: bytes
+    encoding: Optional[str]
+    etag: str
+    headers: dict[str, str]
+
+
+class Cache:
+    """
+    Model scoped cache.
+
+    Every entry is stored under the current generation of its model, so invalidate all the entries of a
+    model is just increment its generation counter.
+
+    Set `stale_timeout` to keep serving the last value of an entry for that many seconds after it expires
+    or gets invalidated, while just one process rebuilds it.
+
+    Declare in `lookups` the fields of the model that the entries can be filtered by, mapped to the request
+    params that filter by them, like `{'academy_id': ['academy_id', 'academy']}`. An entry filtered by just
+    one value of those fields is only invalidated when an object with that value changes, the others are
+    invalidated when any object changes. The params are checked in order, declare first the most specific
+    ones, and only declare params the views really filter by.
+
+    Entries are saved already rendered as json, with its etag, so they can be sent without serialize
+    them again, the bodies bigger than `COMPRESS_MIN_LENGTH` are saved compressed if `compress` is true.
+    """
+
     model: str
     parents: list[str]
+    lookups: dict[str, list[str]] = {}
+    timeout: Optional[int] = DEFAULT_TIMEOUT
+    stale_timeout: int = 0
+    lock_timeout: int = 30
+    compress: bool = True
 
     def __init__(self):
         CACHE_DESCRIPTORS[hash(self.model)] = self
 
-    def __generate_key__(self, storage_key=False, parent='', **kwargs):
+        # just the models scoped by lookups pay for the signal on every instance they load
+        if self.lookups:
+            post_init.connect(_keep_loaded_lookups, sender=self.model)
+
+    def __generate_version_key__(self, parent='', scope=''):
         key = self.model.__name__ if not parent else parent
 
-        if storage_key:
-            return f'{key}__keys'
+        if scope:
+            return f'{key}__version__{scope}'
 
-        credentials = urllib.parse.urlencode(kwargs)
-        return f'{key}__{credentials}'
+        return f'{key}__version'
 
-    def __add_key_to_storage__(self, key: str):
-        storage_key = self.__generate_key__(storage_key=True)
+    def __new_version__(self) -> int:
+        # if the counter was evicted, a time based seed avoids to reuse the generation of old entries
+        return time.time_ns() // 1000
 
-        json_data = cache.get(storage_key)
-        keys = json.loads(json_data) if json_data else []
+    def __get_versions__(self, keys: list[str]) -> list[int]:
+        versions = cache.get_many(keys)
 
-        keys.append(key)
+        for key in keys:
+            if key not in versions:
+                cache.add(key, self.__new_version__(), timeout=None)
+                versions[key] = cache.get(key)
 
-        json_data = json.dumps(keys)
-        cache.set(storage_key, json_data)
+        return [versions[key] for key in keys]
 
-    def keys(self):
-        # we get key from cache to support multiprocess
-        key = self.__generate_key__(storage_key=True)
-        json_data = cache.get(key)
-        return json.loads(json_data) if json_data else []
+    def version(self, parent='') -> int:
+        key = self.__generate_version_key__(parent)
+        return self.__get_versions__([key])[0]
 
-    def __clear_one__(self, parent=''):
-        # we get key from cache to support multiprocess
-        storage_key = self.__generate_key__(storage_key=True, parent=parent)
-        keys = self.keys()
+    def __get_scope__(self, **kwargs) -> Optional[tuple[str, str]]:
+        for field, params in self.lookups.items():
+            for param in params:
+                value = str(kwargs.get(param, ''))
 
-        for key in keys:
-            cache.set(key, None)
+                # the entries filtered by many values, or by none, are not scoped by this field
+                if value.lower() not in ['', 'null', 'none', 'undefined'] and ',' not in value:
+                    return field, value
+
+        return None
+
+    def __generate_version__(self, **kwargs) -> str:
+        keys = [self.__generate_version_key__()]
+
+        if self.lookups:
+            if scope := self.__get_scope__(**kwargs):
+                field, value = scope
+                keys.append(self.__generate_version_key__(scope=field))
+                keys.append(self.__generate_version_key__(scope=f'{field}={value}'))
+
+            else:
+                keys.append(self.__generate_version_key__(scope='*'))
 
-        cache.set(storage_key, None)
+        return '-'.join([str(x) for x in self.__get_versions__(keys)])
+
+    def __generate_key__(self, **kwargs):
+        key = self.model.__name__
+        version = self.__generate_version__(**kwargs)
+
+        credentials = urllib.parse.urlencode(kwargs)
+        return f'{key}__{version}__{credentials}'
+
+    def __generate_stale_key__(self, **kwargs):
+        key = self.model.__name__
+        credentials = urllib.parse.urlencode(kwargs)
+        return f'{key}__stale__{credentials}'
+
+    def __generate_lock_key__(self, **kwargs):
+        key = self.model.__name__
+        credentials = urllib.parse.urlencode(kwargs)
+        return f'{key}__lock__{credentials}'
+
+    def __generate_stat_key__(self, event: str):
+        key = self.model.__name__
+        return f'{key}__stats__{event}'
+
+    def __get_timeout__(self) -> Optional[int]:
+        return cache.default_timeout if self.timeout is DEFAULT_TIMEOUT else self.timeout
+
+    def __clear_one__(self, parent='', scope=''):
+        key = self.__generate_version_key__(parent, scope)
+
+        try:
+            cache.incr(key)
+
+        # the counter does not exists, so there are not entries attached to the current generation
+        except ValueError:
+            cache.add(key, self.__new_version__(), timeout=None)
 
     def clear(self):
-        # we get key from cache to support multiprocess
         for parent in self.parents:
             self.__clear_one__(parent)
 
         self.__clear_one__()
 
-    def get(self, **kwargs) -> dict:
+    def __expand_lookups__(self, lookups: dict[str, set]) -> dict[str, set]:
+        """Add the lookups of other objects affected by a change, like related objects or aliases."""
+
+        return lookups
+
+    def get_lookups(self, instance, previous: Optional[dict] = None) -> dict[str, set]:
+        """
+        Get the lookups of an instance, along with the `previous` ones that it was loaded with.
+
+        The fields that were not loaded, like the deferred ones, are left out, so they are invalidated like if
+        they could have any value.
+        """
+
+        lookups = {field: {getattr(instance, field)} for field in self.lookups}
+        unknown = []
+
+        if previous is not None:
+            for field in self.lookups:
+                if field in previous:
+                    lookups[field].add(previous[field])
+
+                else:
+                    unknown.append(field)
+
+        lookups = self.__expand_lookups__(lookups)
+
+        for field in unknown:
+            lookups.pop(field, None)
+
+        return lookups
+
+    def get_loaded_lookups(self, instance) -> dict:
+        """Get the values of the lookups that the instance has, the deferred ones are not loaded."""
+
+        return {field: instance.__dict__[field] for field in self.lookups if field in instance.__dict__}
+
+    def invalidate(self, **lookups) -> None:
+        """
+        Invalidate just the entries that could include an object with these lookups.
+
+        Each lookup gets a value or a collection of values, the declared lookups that were not provided are
+        handled like if they could have any value.
+        """
+
+        if not self.lookups:
+            self.clear()
+            return
+
+        scopes = {'*'}
+
+        for field in self.lookups:
+            values = lookups.get(field)
+
+            if field not in lookups:
+                scopes.add(field)
+                continue
+
+            if not isinstance(values, (list, set, tuple)):
+                values = [values]
+
+            for value in values:
+                scopes.add(field if value is None else f'{field}={value}')
+
+        for parent in self.parents:
+            self.__clear_one__(parent)
+
+        for scope in scopes:
+            self.__clear_one__(scope=scope)
+
+    def invalidate_queryset(self, queryset) -> None:
+        """
+        Invalidate the entries that could include the objects of a queryset.
+
+        Bulk operations like `QuerySet.update()` do not emit signals, call it before them, and after them as
+        well if they change any lookup.
+        """
+
+        if not self.lookups:
+            self.clear()
+            return
+
+        lookups = {field: set() for field in self.lookups}
+        for values in queryset.values_list(*self.lookups).distinct().iterator():
+            for field, value in zip(self.lookups, values):
+                lookups[field].add(value)
+
+        if not any(lookups.values()):
+            return
+
+        # too many scopes to track them one by one
+        if sum([len(x) for x in lookups.values()]) > MAX_INVALIDATED_SCOPES:
+            self.clear()
+            return
+
+        self.invalidate(**self.__expand_lookups__(lookups))
+
+    def __build_entry__(self, data, headers: Optional[dict[str, str]] = None) -> CacheEntry:
+        content = JSONRenderer().render(data)
+        etag = quote_etag(hashlib.sha1(content).hexdigest())
+        encoding = None
+
+        if self.compress and len(content) >= COMPRESS_MIN_LENGTH:
+            content = gzip.compress(content)
+            encoding = 'gzip'
+
+        return {
+            'content': content,
+            'encoding': encoding,
+            'etag': etag,
+            'headers': headers or {},
+        }
+
+    @staticmethod
+    def decode(entry: CacheEntry) -> bytes:
+        """Get the json body of an entry."""
+
+        if entry['encoding'] == 'gzip':
+            return gzip.decompress(entry['content'])
+
+        return entry['content']
+
+    def get(self, **kwargs) -> Optional[dict]:
+        entry = self.get_entry(**kwargs)
+        return json.loads(self.decode(entry)) if entry else None
+
+    def get_entry(self, **kwargs) -> Optional[CacheEntry]:
         key = self.__generate_key__(**kwargs)
-        json_data = cache.get(key)
-        return json.loads(json_data) if json_data else None
+        return cache.get(key)
 
-    def __fix_fields__(self, data):
-        for key in data.keys():
-            if isinstance(data[key], datetime):
-                data[key] = self.datetime_to_iso(data[key])
+    def get_stale_entry(self, **kwargs) -> Optional[CacheEntry]:
+        """Get the last entry saved, even if it was expired or invalidated."""
 
-            if isinstance(data[key], dict):
-                data[key] = self.__fix_fields__(data[key])
+        if not self.stale_timeout:
+            return None
 
-            if isinstance(data[key], list):
-                if data[key] and isinstance(data[key][0], dict):
-                    data[key] = [self.__fix_fields__(item) for item in data[key]]
+        key = self.__generate_stale_key__(**kwargs)
+        return cache.get(key)
 
-                if data[key] and isinstance(data[key][0], datetime):
-                    data[key] = [self.datetime_to_iso(item) for item in data[key]]
+    def lock(self, **kwargs) -> bool:
+        """Try to take the right to rebuild this entry, it is released by `set` or after `lock_timeout`."""
 
-        return data
+        key = self.__generate_lock_key__(**kwargs)
+        return cache.add(key, 1, timeout=self.lock_timeout)
 
-    def __fix_fields_in_array__(self, data):
-        check_data = data
-        if 'results' in data:
-            check_data = data['results']
+    def unlock(self, **kwargs) -> None:
+        key = self.__generate_lock_key__(**kwargs)
+        cache.delete(key)
 
-        if isinstance(check_data, dict):
-            check_data = self.__fix_fields__(check_data)
-        else:
-            check_data = [self.__fix_fields__(x) for x in check_data]
+    def count(self, event: str) -> None:
+        key = self.__generate_stat_key__(event)
 
-        if 'results' in data:
-            return {**data, 'results': check_data}
+        try:
+            cache.incr(key)
 
-        return check_data
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
 
-    def set(self, data, **kwargs):
+    def stats(self) -> dict[str, int]:
+        events = ['hit', 'miss', 'stale']
+        keys = [self.__generate_stat_key__(event) for event in events]
+        values = cache.get_many(keys)
+
+        return {event: values.get(key, 0) for event, key in zip(events, keys)}
+
+    def set(self, data, headers: Optional[dict[str, str]] = None, /, **kwargs) -> CacheEntry:
         key = self.__generate_key__(**kwargs)
-        data = self.__fix_fields_in_array__(data)
+        entry = self.__build_entry__(data, headers)
+        timeout = self.__get_timeout__()
+
+        if not self.stale_timeout:
+            cache.set(key, entry, timeout)
+            return entry
+
+        stale_key = self.__generate_stale_key__(**kwargs)
+        stale_timeout = timeout + self.stale_timeout if timeout is not None else None
 
-        json_data = json.dumps(data)
-        cache.set(key, json_data)
+        cache.set(key, entry, timeout)
+        cache.set(stale_key, entry, stale_timeout)
+        self.unlock(**kwargs)
 
-        self.__add_key_to_storage__(key)
+        return entry
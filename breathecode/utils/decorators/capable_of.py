@@ -2,6 +2,7 @@ from rest_framework.exceptions import PermissionDenied
 from django.contrib.auth.models import AnonymousUser
 
 from breathecode.utils.exceptions import ProgrammingError
+from ..permission_resolver import get_user_permissions
 from ..validation_exception import ValidationException
 from rest_framework.views import APIView
 
@@ -46,8 +47,6 @@ def capable_of(capability=None):
 
 
 def get_academy_from_capability(kwargs, request, capability):
-    from breathecode.authenticate.models import ProfileAcademy
-
     academy_id = None
 
     if ('academy_id' not in kwargs and 'Academy' not in request.headers and 'academy' not in request.headers
@@ -74,19 +73,20 @@ def get_academy_from_capability(kwargs, request, capability):
     if isinstance(request.user, AnonymousUser):
         raise PermissionDenied('Invalid user')
 
-    capable = ProfileAcademy.objects.filter(user=request.user.id,
-                                            academy__id=academy_id,
-                                            role__capabilities__slug=capability)
+    academy = get_user_permissions(request.user)['academies'].get(int(academy_id))
+
+    # the role could have been granted after the permissions were cached
+    if academy is None or capability not in academy['capabilities']:
+        academy = get_user_permissions(request.user, refresh=True)['academies'].get(int(academy_id))
 
-    if capable.count() == 0:
+    if academy is None or capability not in academy['capabilities']:
         raise PermissionDenied(
             f"You (user: {request.user.id}) don't have this capability: {capability} for academy {academy_id}"
         )
 
-    academy = capable.first().academy
-    if academy.status == 'DELETED':
+    if academy['status'] == 'DELETED':
         raise PermissionDenied(f'This academy is deleted')
-    if request.get_full_path() != '/v1/admissions/academy/activate' and academy.status == 'INACTIVE':
+    if request.get_full_path() != '/v1/admissions/academy/activate' and academy['status'] == 'INACTIVE':
         raise PermissionDenied(f'This academy is not active')
 
     return academy_id
@@ -12,11 +12,12 @@ from django.db.models import Sum
 from django.shortcuts import render
 from django.http import JsonResponse
 
-from breathecode.authenticate.models import Permission, User
+from breathecode.authenticate.models import User
 from breathecode.payments.signals import consume_service
 
 from ..exceptions import ProgrammingError
 from ..payment_exception import PaymentException
+from ..permission_resolver import get_permission_services, get_user_permissions
 from ..validation_exception import ValidationException
 from rest_framework.response import Response
 
@@ -41,14 +42,13 @@ HasPermissionCallback = Callable[[PermissionContextType, tuple, dict], tuple[Per
 
 
 def validate_permission(user: User, permission: str, consumer: bool | HasPermissionCallback = False) -> bool:
-    if consumer:
-        return User.objects.filter(id=user.id, groups__permissions__codename=permission).exists()
+    key = 'group_permissions' if consumer else 'permissions'
 
-    found = Permission.objects.filter(codename=permission).first()
-    if not found:
-        return False
+    if permission in get_user_permissions(user)[key]:
+        return True
 
-    return found.user_set.filter(id=user.id).exists() or found.group_set.filter(user__id=user.id).exists()
+    # the permission could have been granted after the permissions were cached
+    return permission in get_user_permissions(user, refresh=True)[key]
 
 
 def render_message(r, msg, btn_label=None, btn_url=None, btn_target='_blank', data={}, status=None):
@@ -111,7 +111,10 @@ def has_permission(permission: str,
                     context = build_context()
 
                     if consumer:
-                        items = Consumable.list(user=request.user, permission=permission)
+                        # filter by the services that grant the permission avoids to join its groups
+                        items = Consumable.list(
+                            user=request.user,
+                            extra={'service_item__service__id__in': get_permission_services(permission)})
                         context['consumables'] = items
 
                     if callable(consumer):
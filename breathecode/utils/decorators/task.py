@@ -2,6 +2,8 @@ from datetime import datetime
 from decimal import Decimal
 import inspect
 import logging
+import os
+import random
 from typing import Callable
 from breathecode.utils.exceptions import ProgrammingError
 import celery
@@ -13,6 +15,8 @@ __all__ = ['task', 'AbortTask']
 
 logger = logging.getLogger(__name__)
 
+BOOKKEEPING_MODES = ['full', 'sampled', 'on_failure']
+
 
 class AbortTask(Exception):
     pass
@@ -51,6 +55,8 @@ class Task(object):
         self.fallback = kwargs.pop('fallback', None)
         self.reverse = kwargs.pop('reverse', None)
         self.bind = kwargs.get('bind', False)
+        self.bookkeeping = kwargs.pop('bookkeeping', None)
+        self.sample_rate = kwargs.pop('sample_rate', None)
 
         if self.fallback and not callable(self.fallback):
             raise ProgrammingError('Fallback must be a callable')
@@ -58,8 +64,38 @@ class Task(object):
         if self.reverse and not callable(self.reverse):
             raise ProgrammingError('Reverse must be a callable')
 
+        if self.bookkeeping is not None and self.bookkeeping not in BOOKKEEPING_MODES:
+            raise ProgrammingError(f'Bookkeeping must be one of {", ".join(BOOKKEEPING_MODES)}')
+
+        if self.reverse and self.bookkeeping not in [None, 'full']:
+            raise ProgrammingError('A task with reverse must use the full bookkeeping')
+
         self.parent_decorator = celery.shared_task(*args, **kwargs)
 
+    def get_mode(self) -> str:
+        return self.bookkeeping or os.getenv('TASK_MANAGER_BOOKKEEPING', 'full')
+
+    def is_tracked(self, total_pages: int) -> bool:
+        """Check if a new run should be saved in a TaskManager before it starts."""
+
+        # the reversible and paginated tasks need it to be reversed, paused or resumed
+        if self.reverse or total_pages > 1:
+            return True
+
+        return self.get_mode() == 'full'
+
+    def is_sampled(self) -> bool:
+        """Check if a new run that is not tracked should be saved when it ends, even if it finishes well."""
+
+        if self.get_mode() != 'sampled':
+            return False
+
+        sample_rate = self.sample_rate
+        if sample_rate is None:
+            sample_rate = float(os.getenv('TASK_MANAGER_SAMPLE_RATE', '0.1'))
+
+        return random.random() < sample_rate
+
     def get_fn_desc(self, function: Callable) -> tuple[str, str] or tuple[None, None]:
         if not function:
             return None, None
@@ -91,28 +127,50 @@ class Task(object):
             if task_manager_id:
                 x = TaskManager.objects.filter(id=task_manager_id).first()
 
-            created = False
-            if x is None:
-                created = True
-
-                x = TaskManager.objects.create(task_module=task_module,
-                                               task_name=task_name,
-                                               reverse_module=reverse_module,
-                                               reverse_name=reverse_name,
-                                               arguments=arguments,
-                                               status='PENDING',
-                                               current_page=page + 1,
-                                               total_pages=total_pages,
-                                               last_run=last_run)
-
-                kwargs['task_manager_id'] = x.id
-
-            if not created:
+            def create(status, message=None):
+                return TaskManager.objects.create(task_module=task_module,
+                                                  task_name=task_name,
+                                                  reverse_module=reverse_module,
+                                                  reverse_name=reverse_name,
+                                                  arguments=arguments,
+                                                  status=status,
+                                                  status_message=message,
+                                                  current_page=page + 1,
+                                                  total_pages=total_pages,
+                                                  last_run=last_run)
+
+            def finish(status, message=None):
+                nonlocal x
+
+                # the untracked runs are saved with a single write when they end
+                if x is None:
+                    x = create(status, message)
+                    return
+
+                x.status = status
+                fields = ['status']
+
+                if message is not None:
+                    x.status_message = message
+                    fields.append('status_message')
+
+                # the task could have saved its progress while it ran, like the checkpoints of an upload
+                x.save(update_fields=fields)
+
+            sampled = False
+            if x is not None:
                 x.current_page = page + 1
                 x.last_run = last_run
                 x.save()
 
-            if x.status in ['CANCELLED', 'REVERSED', 'PAUSED', 'ABORTED', 'DONE']:
+            elif self.is_tracked(total_pages):
+                x = create('PENDING')
+                kwargs['task_manager_id'] = x.id
+
+            else:
+                sampled = self.is_sampled()
+
+            if x is not None and x.status in ['CANCELLED', 'REVERSED', 'PAUSED', 'ABORTED', 'DONE']:
                 x.killed = True
                 x.save()
                 return
@@ -121,12 +179,15 @@ class Task(object):
                 with transaction.atomic():
                     sid = transaction.savepoint()
                     try:
-                        return function(*args, **kwargs)
+                        res = function(*args, **kwargs)
+
+                        if sampled:
+                            finish('DONE')
+
+                        return res
 
                     except AbortTask as e:
-                        x.status = 'ABORTED'
-                        x.status_message = str(e)[:255]
-                        x.save()
+                        finish('ABORTED', str(e)[:255])
 
                         logger.exception(str(e))
 
@@ -138,9 +199,8 @@ class Task(object):
 
                         error = str(e)[:255]
                         exception = e
-                x.status = 'ERROR'
-                x.status_message = error
-                x.save()
+
+                finish('ERROR', error)
 
                 # fallback
                 if self.fallback:
@@ -153,9 +213,7 @@ class Task(object):
                 res = function(*args, **kwargs)
 
             except AbortTask as e:
-                x.status = 'ABORTED'
-                x.status_message = str(e)[:255]
-                x.save()
+                finish('ABORTED', str(e)[:255])
 
                 logger.exception(str(e))
 
@@ -163,9 +221,7 @@ class Task(object):
                 return
 
             except Exception as e:
-                x.status = 'ERROR'
-                x.status_message = str(e)[:255]
-                x.save()
+                finish('ERROR', str(e)[:255])
 
                 # fallback
                 if self.fallback:
@@ -174,9 +230,12 @@ class Task(object):
                 # behavior by default
                 raise e
 
-            if x.total_pages == x.current_page:
-                x.status = 'DONE'
-                x.save()
+            # a task that reads several pages in a run saves the last one read
+            if x is not None and x.total_pages > 1:
+                x.refresh_from_db(fields=['current_page'])
+
+            if sampled or (x is not None and x.total_pages == x.current_page):
+                finish('DONE')
 
             return res
 
@@ -214,6 +273,20 @@ def task(*args, **kwargs):
         \"\"\"
 
         pass
+
+
+    # just the runs that fail are saved in a TaskManager
+    @task(bookkeeping='on_failure')
+    def my_light_task(*args, **kwargs):
+        pass
+    ```
+
+    `bookkeeping` sets which runs are saved in a TaskManager, `full` saves all of them, `sampled` saves a
+    `sample_rate` fraction of them and the ones that fail, and `on_failure` just saves the ones that fail.
+    The runs of `sampled` and `on_failure` are saved with a single write when they end, the runs of `full`
+    are saved before they start too, so `rerun_pending_tasks` can run again the ones that were killed.
+    It defaults to the `TASK_MANAGER_BOOKKEEPING` environment variable, or `full`. The tasks with reverse or
+    more than one page are always saved, the untracked runs cannot be paused or cancelled.
     """
 
     return Task(*args, **kwargs)
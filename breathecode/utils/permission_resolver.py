@@ -0,0 +1,137 @@
+"""
+Resolve the capabilities and the permissions of the users.
+
+The capabilities of every academy of a user and its permission codenames are loaded with a couple of queries
+and saved in the cache, they are kept as well in the user instance, so a request just loads them once. The
+entries are versioned, a change in the roles of a user bumps its version, and a change in the roles,
+capabilities, groups or permissions that could affect many users bumps the global version. A check that
+fails can be retried with `refresh=True`, so a grant that was not seen by the signals just costs a reload.
+"""
+
+import time
+from typing import TypedDict
+
+from django.core.cache import cache
+
+__all__ = [
+    'UserPermissions', 'get_user_permissions', 'get_permission_services', 'clear_user_permissions',
+    'clear_permissions'
+]
+
+TIMEOUT = 60 * 60
+VERSION_KEY = 'permissions__version'
+
+
+class AcademyCapabilities(TypedDict):
+    status: str
+    capabilities: frozenset[str]
+
+
+class UserPermissions(TypedDict):
+    academies: dict[int, AcademyCapabilities]
+    # permissions granted directly or by a group
+    permissions: frozenset[str]
+    # permissions granted by a group
+    group_permissions: frozenset[str]
+
+
+def _new_version() -> int:
+    return time.time_ns() // 1000
+
+
+def _get_versions(keys: list[str]) -> list[int]:
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def _incr(key: str) -> None:
+    try:
+        cache.incr(key)
+
+    except ValueError:
+        cache.add(key, _new_version(), timeout=None)
+
+
+def clear_user_permissions(user_id: int) -> None:
+    _incr(f'{VERSION_KEY}__{user_id}')
+
+
+def clear_permissions() -> None:
+    _incr(VERSION_KEY)
+
+
+def _load(user_id: int) -> UserPermissions:
+    from breathecode.authenticate.models import Permission, ProfileAcademy
+
+    academies: dict[int, dict] = {}
+    rows = ProfileAcademy.objects.filter(user__id=user_id).values_list('academy__id', 'academy__status',
+                                                                       'role__capabilities__slug')
+
+    for academy_id, status, capability in rows:
+        if academy_id not in academies:
+            academies[academy_id] = {'status': status, 'capabilities': set()}
+
+        if capability:
+            academies[academy_id]['capabilities'].add(capability)
+
+    group_permissions = set(
+        Permission.objects.filter(group__user__id=user_id).values_list('codename', flat=True))
+    user_permissions = set(Permission.objects.filter(user__id=user_id).values_list('codename', flat=True))
+
+    return {
+        'academies': {
+            academy_id: {
+                'status': academy['status'],
+                'capabilities': frozenset(academy['capabilities']),
+            }
+            for academy_id, academy in academies.items()
+        },
+        'permissions': frozenset(group_permissions | user_permissions),
+        'group_permissions': frozenset(group_permissions),
+    }
+
+
+def get_user_permissions(user, refresh: bool = False) -> UserPermissions:
+    """
+    Get the capabilities and the permissions of a user, they are just resolved once per instance.
+
+    Pass `refresh` to load them again from the database, it should be used just before deny an access.
+    """
+
+    if user is None or not user.id:
+        return {'academies': {}, 'permissions': frozenset(), 'group_permissions': frozenset()}
+
+    if not refresh and (resolved := getattr(user, '_user_permissions', None)) is not None:
+        return resolved
+
+    versions = _get_versions([VERSION_KEY, f'{VERSION_KEY}__{user.id}'])
+    key = f'permissions__{versions[0]}-{versions[1]}__{user.id}'
+
+    resolved = None if refresh else cache.get(key)
+    if resolved is None:
+        resolved = _load(user.id)
+        cache.set(key, resolved, TIMEOUT)
+
+    user._user_permissions = resolved
+    return resolved
+
+
+def get_permission_services(permission: str) -> list[int]:
+    """
+    Get the ids of the services that grant a permission.
+
+    They are not kept in the cache, the services and its groups are changed in bulk by the admins, without
+    emitting any signal that could clear them.
+    """
+
+    from breathecode.payments.models import Service
+
+    return list(
+        Service.objects.filter(groups__permissions__codename=permission).values_list('id',
+                                                                                    flat=True).distinct())
@@ -1,11 +1,66 @@
 from __future__ import annotations
-from typing import Optional
+import os
+import threading
+import time
+from typing import Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-__all__ = ['Service']
+__all__ = ['Service', 'AsyncService']
+
+POOL_SIZE = int(os.getenv('SERVICE_POOL_SIZE', '10'))
+TIMEOUT = float(os.getenv('SERVICE_TIMEOUT', '30'))
+RETRIES = int(os.getenv('SERVICE_RETRIES', '2'))
+
+# a token is not reused when it expires in less than these seconds
+JWT_MARGIN = 60
+
+_lock = threading.Lock()
+_sessions: dict[tuple[str, bool], requests.Session] = {}
+_tokens: dict[tuple, tuple[str, float]] = {}
+
+
+def get_session(app_slug: str, stream: bool = False) -> requests.Session:
+    """
+    Get the session of an app, its connections are kept alive and shared between the requests.
+
+    The streams use their own session, its requests are never retried, because the app could take a while to
+    answer them and a retry would repeat its work.
+    """
+
+    key = (app_slug, stream)
+    if session := _sessions.get(key):
+        return session
+
+    with _lock:
+        if (session := _sessions.get(key)) is None:
+            # just the idempotent methods are retried
+            retry = 0 if stream else Retry(total=RETRIES,
+                                           connect=RETRIES,
+                                           read=RETRIES,
+                                           backoff_factor=0.3,
+                                           status_forcelist=[502, 503, 504],
+                                           allowed_methods=['HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS'],
+                                           raise_on_status=False)
+
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            _sessions[key] = session
+
+    return session
 
 
 class Service:
+    """
+    Client of an app.
+
+    The requests are made through a pooled session per app, and the JWT of each user is reused until it is
+    about to expire.
+    """
 
     def __init__(self, app_pk: str | int, user_pk: Optional[str | int] = None, *, mode: Optional[str] = None):
         from breathecode.authenticate.actions import get_app
@@ -14,10 +69,10 @@ class Service:
         self.user_pk = user_pk
         self.mode = mode
 
-    def _sign(self, method, params=None, data=None, json=None, **kwargs) -> requests.Request:
+    def _sign(self, method, params=None, data=None, json=None, **kwargs) -> dict[str, str]:
         from breathecode.authenticate.actions import get_signature
 
-        headers = kwargs.pop('headers', {})
+        headers = dict(kwargs.pop('headers', None) or {})
         headers.pop('Authorization', None)
 
         sign, now = get_signature(self.app,
@@ -34,19 +89,35 @@ class Service:
 
         return headers
 
-    def _jwt(self, method, **kwargs) -> requests.Request:
-        from breathecode.authenticate.actions import get_jwt
+    def _get_jwt(self) -> str:
+        from breathecode.authenticate.actions import JWT_LIFETIME, get_jwt
+
+        # updated_at changes when the keys are rotated
+        key = (self.app.id, self.app.updated_at, self.user_pk)
+        now = time.time()
 
-        headers = kwargs.pop('headers', {})
+        if (cached := _tokens.get(key)) and cached[1] - JWT_MARGIN > now:
+            return cached[0]
 
         token = get_jwt(self.app, self.user_pk)
 
+        if len(_tokens) >= 1000:
+            _tokens.clear()
+
+        _tokens[key] = (token, now + JWT_LIFETIME * 60)
+        return token
+
+    def _jwt(self, method, **kwargs) -> dict[str, str]:
+        headers = dict(kwargs.pop('headers', None) or {})
+
+        token = self._get_jwt()
+
         headers['Authorization'] = (f'Link App=4geeks,'
                                     f'Token={token}')
 
         return headers
 
-    def _authenticate(self, method, params=None, data=None, json=None, **kwargs) -> requests.Request:
+    def _authenticate(self, method, params=None, data=None, json=None, **kwargs) -> dict[str, str]:
         if self.mode == 'signature' or self.app.strategy == 'SIGNATURE':
             return self._sign(method, params=params, data=data, json=json, **kwargs)
 
@@ -62,41 +133,103 @@ class Service:
         return url
 
     def get(self, url, params=None, **kwargs):
-        url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate('get', params=params, **kwargs)
-        return requests.get(url, params=params, **kwargs, headers=headers)
+        return self.request('get', url, params=params, **kwargs)
 
     def options(self, url, **kwargs):
-        url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate('options', **kwargs)
-        return requests.options(url, **kwargs, headers=headers)
+        return self.request('options', url, **kwargs)
 
     def head(self, url, **kwargs):
-        url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate('head', **kwargs)
-        return requests.head(url, **kwargs, headers=headers)
+        return self.request('head', url, **kwargs)
 
     def post(self, url, data=None, json=None, **kwargs):
-        url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate('post', data=data, json=json, **kwargs)
-        return requests.post(url, data=data, json=json, **kwargs, headers=headers)
+        return self.request('post', url, data=data, json=json, **kwargs)
 
     def put(self, url, data=None, **kwargs):
-        url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate('put', data=data, **kwargs)
-        return requests.put(url, data=data, **kwargs, headers=headers)
+        return self.request('put', url, data=data, **kwargs)
 
     def patch(self, url, data=None, **kwargs):
-        url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate('patch', data=data, **kwargs)
-        return requests.patch(url, data=data, **kwargs, headers=headers)
+        return self.request('patch', url, data=data, **kwargs)
 
     def delete(self, url, **kwargs):
+        return self.request('delete', url, **kwargs)
+
+    def request(self, method, url, **kwargs) -> requests.Response:
         url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate('delete', **kwargs)
-        return requests.delete(url, **kwargs, headers=headers)
+        kwargs['headers'] = self._authenticate(method, **kwargs)
+
+        # the streams are not limited, the app could take a while to send the first chunk
+        stream = kwargs.get('stream', False)
+        if not stream:
+            kwargs.setdefault('timeout', TIMEOUT)
+
+        return get_session(self.app.slug, stream).request(method, url, **kwargs)
+
+
+class AsyncService(Service):
+    """
+    Asyncio client of an app, it must be used as an async context manager.
+
+    ```py
+    async with AsyncService('rigobot', user.id) as s:
+        response = await s.get('/v1/finetuning/me/coderevision')
+        data = await response.json()
+    ```
+
+    Its connections are kept alive until the context exits, so it's meant to make many requests at once, the
+    app and the credentials are resolved in a thread, so the event loop is not blocked by the database.
+    """
+
+    def __init__(self, app_pk: str | int, user_pk: Optional[str | int] = None, *, mode: Optional[str] = None):
+        self.app_pk = app_pk
+        self.app = None
+        self.user_pk = user_pk
+        self.mode = mode
+        self.session = None
+
+    async def __aenter__(self) -> AsyncService:
+        import aiohttp
+        from asgiref.sync import sync_to_async
+
+        from breathecode.authenticate.actions import get_app
+
+        self.app = await sync_to_async(get_app)(self.app_pk)
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=POOL_SIZE),
+                                             timeout=aiohttp.ClientTimeout(total=TIMEOUT))
+
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.session.close()
+        self.session = None
+
+    async def get(self, url, params=None, **kwargs):
+        return await self.request('get', url, params=params, **kwargs)
+
+    async def options(self, url, **kwargs):
+        return await self.request('options', url, **kwargs)
+
+    async def head(self, url, **kwargs):
+        return await self.request('head', url, **kwargs)
+
+    async def post(self, url, data=None, json=None, **kwargs):
+        return await self.request('post', url, data=data, json=json, **kwargs)
+
+    async def put(self, url, data=None, **kwargs):
+        return await self.request('put', url, data=data, **kwargs)
+
+    async def patch(self, url, data=None, **kwargs):
+        return await self.request('patch', url, data=data, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request('delete', url, **kwargs)
+
+    async def request(self, method, url, **kwargs):
+        from asgiref.sync import sync_to_async
+
+        if self.session is None:
+            raise Exception('AsyncService must be used as an async context manager')
 
-    def request(self, method, url, **kwargs):
         url = self.app.app_url + self._fix_url(url)
-        headers = self._authenticate(method, **kwargs)
-        return requests.request(method, url, **kwargs, headers=headers)
+        kwargs['headers'] = await sync_to_async(self._authenticate)(method, **kwargs)
+
+        return await self.session.request(method, url, **kwargs)
@@ -1,4 +1,7 @@
+import gzip
 import json
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
 import serpy
 from unittest.mock import MagicMock, call, patch
 from rest_framework.views import APIView
@@ -10,12 +13,33 @@ from breathecode.utils import APIViewExtensions, ValidationException
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from ..mixins import UtilsTestCase
 from breathecode.utils.api_view_extensions.api_view_extension_handlers import APIViewExtensionHandlers
 
 cohort_cache = CohortCache()
 
 
+def versioned(key: str) -> str:
+    return key.replace('Cohort__', f'Cohort__{cohort_cache.__generate_version__()}__', 1)
+
+
+def set_cached(key: str, json_data: str) -> None:
+    cache.set(versioned(key), cohort_cache.__build_entry__(json.loads(json_data)))
+
+
+def get_cached(key: str) -> str:
+    entry = cache.get(versioned(key))
+    return json.dumps(json.loads(cohort_cache.decode(entry)))
+
+
+def stored_keys() -> set[str]:
+    prefix = cache.make_key(versioned('Cohort__'))
+    return {'Cohort__' + key[len(prefix):] for key in cache._cache if key.startswith(prefix)}
+
+
 class GetCohortSerializer(serpy.Serializer):
     id = serpy.Field()
     slug = serpy.Field()
@@ -56,7 +80,7 @@ class TestView(APIView):
 
         cache = handler.cache.get()
         if cache is not None:
-            return Response(cache, status=status.HTTP_200_OK)
+            return cache
 
         if id:
             item = Cohort.objects.filter(id=id).first()
@@ -96,6 +120,22 @@ class CachePrefixTestView(TestView):
                                    paginate=False)
 
 
+class PaginateCursorTestView(TestView):
+    extensions = APIViewExtensions(cache=CohortCache, sort='name', paginate=True, paginate_cursor=True)
+
+
+class PaginateCursorByCreatedAtTestView(TestView):
+    extensions = APIViewExtensions(cache=CohortCache, sort='-created_at', paginate=True, paginate_cursor=True)
+
+
+class PaginateCursorByAcademyTestView(TestView):
+    extensions = APIViewExtensions(cache=CohortCache, sort='academy', paginate=True, paginate_cursor=True)
+
+
+class PaginateCachedCountTestView(TestView):
+    extensions = APIViewExtensions(cache=CohortCache, sort='name', paginate=True, paginate_count='cached')
+
+
 class ApiViewExtensionsGetTestSuite(UtilsTestCase):
     """
     🔽🔽🔽 Spy the extensions
@@ -205,7 +245,7 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        self.assertEqual(cohort_cache.keys(), ['Cohort__'])
+        self.assertEqual(stored_keys(), {'Cohort__'})
 
     def test_cache__get__without_cache__one_cohort(self):
         cache.clear()
@@ -223,7 +263,7 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        self.assertEqual(cohort_cache.keys(), ['Cohort__'])
+        self.assertEqual(stored_keys(), {'Cohort__'})
 
     def test_cache__get__without_cache__ten_cohorts(self):
         cache.clear()
@@ -241,7 +281,7 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        self.assertEqual(cohort_cache.keys(), ['Cohort__'])
+        self.assertEqual(stored_keys(), {'Cohort__'})
 
     def test_cache__get__without_cache__ten_cohorts__passing_arguments(self):
         cache.clear()
@@ -261,16 +301,17 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        self.assertEqual(cohort_cache.keys(), ['Cohort__sort=slug&slug=100%2C101%2C110%2C111'])
+        self.assertEqual(stored_keys(), {'Cohort__sort=slug&slug=100%2C101%2C110%2C111'})
 
     def test_cache__get__with_cache(self):
         cache.clear()
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for expected in cases:
+            cohort_cache.clear()
+
             json_data = json.dumps(expected)
-            cache.set('Cohort__keys', '["Cohort__"]')
-            cache.set('Cohort__', json_data)
+            set_cached('Cohort__', json_data)
 
             request = APIRequestFactory()
             request = request.get('/the-beans-should-not-have-sugar')
@@ -280,7 +321,7 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), ['Cohort__'])
+            self.assertEqual(stored_keys(), {'Cohort__'})
 
     def test_cache__get__with_cache__passing_arguments(self):
         cache.clear()
@@ -288,9 +329,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         params = [bin(x).replace('0b', '') for x in range(4, 8)]
         for expected in cases:
+            cohort_cache.clear()
+
             json_data = json.dumps(expected)
-            cache.set('Cohort__keys', '["Cohort__sort=slug&slug=100%2C101%2C110%2C111"]')
-            cache.set('Cohort__sort=slug&slug=100%2C101%2C110%2C111', json_data)
+            set_cached('Cohort__sort=slug&slug=100%2C101%2C110%2C111', json_data)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={",".join(params)}')
@@ -300,8 +342,8 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), ['Cohort__sort=slug&slug=100%2C101%2C110%2C111'])
-            self.assertEqual(cache.get('Cohort__sort=slug&slug=100%2C101%2C110%2C111'),
+            self.assertEqual(stored_keys(), {'Cohort__sort=slug&slug=100%2C101%2C110%2C111'})
+            self.assertEqual(get_cached('Cohort__sort=slug&slug=100%2C101%2C110%2C111'),
                              str(expected).replace('\'', '"'))
 
     def test_cache__get__with_cache_but_other_case__passing_arguments(self):
@@ -309,13 +351,14 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             model = self.bc.database.create(cohort={'slug': slug})
 
             json_data = json.dumps(case)
-            cache.set('Cohort__', json_data)
-            cache.set('Cohort__keys', '["Cohort__"]')
+            set_cached('Cohort__', json_data)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -326,15 +369,17 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), ['Cohort__', f'Cohort__sort=slug&slug={slug}'])
-            self.assertEqual(cache.get('Cohort__'), serialize_cache_value(case))
-            self.assertEqual(cache.get(f'Cohort__sort=slug&slug={slug}'), serialize_cache_value(expected))
+            self.assertEqual(stored_keys(), {'Cohort__', f'Cohort__sort=slug&slug={slug}'})
+            self.assertEqual(get_cached('Cohort__'), serialize_cache_value(case))
+            self.assertEqual(get_cached(f'Cohort__sort=slug&slug={slug}'), serialize_cache_value(expected))
 
     def test_cache__get__with_cache_case_of_root_and_current__passing_arguments(self):
         cache.clear()
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             self.bc.database.delete('admissions.Cohort')
@@ -342,9 +387,8 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             json_data_root = json.dumps(case)
             json_data_query = json.dumps(case + case)
-            cache.set('Cohort__', json_data_root)
-            cache.set(f'Cohort__sort=slug&slug={slug}', json_data_query)
-            cache.set('Cohort__keys', f'["Cohort__", "Cohort__sort=slug&slug={slug}"]')
+            set_cached('Cohort__', json_data_root)
+            set_cached(f'Cohort__sort=slug&slug={slug}', json_data_query)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -355,9 +399,9 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), ['Cohort__', f'Cohort__sort=slug&slug={slug}'])
-            self.assertEqual(cache.get('Cohort__'), json_data_root)
-            self.assertEqual(cache.get(f'Cohort__sort=slug&slug={slug}'), json_data_query)
+            self.assertEqual(stored_keys(), {'Cohort__', f'Cohort__sort=slug&slug={slug}'})
+            self.assertEqual(get_cached('Cohort__'), json_data_root)
+            self.assertEqual(get_cached(f'Cohort__sort=slug&slug={slug}'), json_data_query)
 
     """
     🔽🔽🔽 Cache per user without auth
@@ -369,9 +413,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         params = [bin(x).replace('0b', '') for x in range(4, 8)]
         for expected in cases:
+            cohort_cache.clear()
+
             json_data = json.dumps(expected)
-            cache.set('Cohort__keys', '["Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id=None"]')
-            cache.set('Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id=None', json_data)
+            set_cached('Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id=None', json_data)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={",".join(params)}')
@@ -381,9 +426,9 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(),
-                             ['Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id=None'])
-            self.assertEqual(cache.get('Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id=None'),
+            self.assertEqual(stored_keys(),
+                             {'Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id=None'})
+            self.assertEqual(get_cached('Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id=None'),
                              str(expected).replace('\'', '"'))
 
     def test_cache_per_user__get__with_cache_but_other_case__passing_arguments(self):
@@ -391,13 +436,14 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             model = self.bc.database.create(cohort={'slug': slug})
 
             json_data = json.dumps(case)
-            cache.set('Cohort__', json_data)
-            cache.set('Cohort__keys', '["Cohort__"]')
+            set_cached('Cohort__', json_data)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -408,10 +454,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(),
-                             ['Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id=None'])
-            self.assertEqual(cache.get('Cohort__'), serialize_cache_value(case))
-            self.assertEqual(cache.get(f'Cohort__sort=slug&slug={slug}&request.user.id=None'),
+            self.assertEqual(stored_keys(),
+                             {'Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id=None'})
+            self.assertEqual(get_cached('Cohort__'), serialize_cache_value(case))
+            self.assertEqual(get_cached(f'Cohort__sort=slug&slug={slug}&request.user.id=None'),
                              serialize_cache_value(expected))
 
     def test_cache_per_user__get__with_cache_case_of_root_and_current__passing_arguments(self):
@@ -419,6 +465,8 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             self.bc.database.delete('admissions.Cohort')
@@ -426,9 +474,8 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             json_data_root = json.dumps(case)
             json_data_query = json.dumps(case + case)
-            cache.set('Cohort__', json_data_root)
-            cache.set(f'Cohort__sort=slug&slug={slug}&request.user.id=None', json_data_query)
-            cache.set('Cohort__keys', f'["Cohort__", "Cohort__sort=slug&slug={slug}&request.user.id=None"]')
+            set_cached('Cohort__', json_data_root)
+            set_cached(f'Cohort__sort=slug&slug={slug}&request.user.id=None', json_data_query)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -439,10 +486,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(),
-                             ['Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id=None'])
-            self.assertEqual(cache.get('Cohort__'), json_data_root)
-            self.assertEqual(cache.get(f'Cohort__sort=slug&slug={slug}&request.user.id=None'),
+            self.assertEqual(stored_keys(),
+                             {'Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id=None'})
+            self.assertEqual(get_cached('Cohort__'), json_data_root)
+            self.assertEqual(get_cached(f'Cohort__sort=slug&slug={slug}&request.user.id=None'),
                              json_data_query)
 
     """
@@ -455,12 +502,12 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         params = [bin(x).replace('0b', '') for x in range(4, 8)]
         for expected in cases:
+            cohort_cache.clear()
+
             model = self.bc.database.create(user=1)
             json_data = json.dumps(expected)
-            cache.set('Cohort__keys',
-                      f'["Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id={model.user.id}"]')
-            cache.set(f'Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id={model.user.id}',
-                      json_data)
+            set_cached(f'Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id={model.user.id}',
+                       json_data)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={",".join(params)}')
@@ -472,10 +519,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertEqual(
-                cohort_cache.keys(),
-                [f'Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id={model.user.id}'])
+                stored_keys(),
+                {f'Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id={model.user.id}'})
             self.assertEqual(
-                cache.get(f'Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id={model.user.id}'),
+                get_cached(f'Cohort__sort=slug&slug=100%2C101%2C110%2C111&request.user.id={model.user.id}'),
                 str(expected).replace('\'', '"'))
 
     def test_cache_per_user__get__auth__with_cache_but_other_case__passing_arguments(self):
@@ -483,13 +530,14 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             model = self.bc.database.create(cohort={'slug': slug}, user=1)
 
             json_data = json.dumps(case)
-            cache.set('Cohort__', json_data)
-            cache.set('Cohort__keys', '["Cohort__"]')
+            set_cached('Cohort__', json_data)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -501,10 +549,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(),
-                             ['Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'])
-            self.assertEqual(cache.get('Cohort__'), serialize_cache_value(case))
-            self.assertEqual(cache.get(f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'),
+            self.assertEqual(stored_keys(),
+                             {'Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'})
+            self.assertEqual(get_cached('Cohort__'), serialize_cache_value(case))
+            self.assertEqual(get_cached(f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'),
                              serialize_cache_value(expected))
 
     def test_cache_per_user__get__auth__with_cache_case_of_root_and_current__passing_arguments(self):
@@ -512,6 +560,8 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             self.bc.database.delete('admissions.Cohort')
@@ -519,10 +569,8 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             json_data_root = json.dumps(case)
             json_data_query = json.dumps(case + case)
-            cache.set('Cohort__', json_data_root)
-            cache.set(f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}', json_data_query)
-            cache.set('Cohort__keys',
-                      f'["Cohort__", "Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}"]')
+            set_cached('Cohort__', json_data_root)
+            set_cached(f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}', json_data_query)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -534,10 +582,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(),
-                             ['Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'])
-            self.assertEqual(cache.get('Cohort__'), json_data_root)
-            self.assertEqual(cache.get(f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'),
+            self.assertEqual(stored_keys(),
+                             {'Cohort__', f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'})
+            self.assertEqual(get_cached('Cohort__'), json_data_root)
+            self.assertEqual(get_cached(f'Cohort__sort=slug&slug={slug}&request.user.id={model.user.id}'),
                              json_data_query)
 
     """
@@ -550,12 +598,10 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         params = [bin(x).replace('0b', '') for x in range(4, 8)]
         for expected in cases:
+            cohort_cache.clear()
+
             json_data = json.dumps(expected)
-            cache.set(
-                'Cohort__keys',
-                '["Cohort__sort=slug&slug=100%2C101%2C110%2C111&breathecode.view.get=the-beans-should-not-have-sugar"]'
-            )
-            cache.set(
+            set_cached(
                 'Cohort__sort=slug&slug=100%2C101%2C110%2C111&breathecode.view.get=the-beans-should-not-have-sugar',
                 json_data)
 
@@ -567,11 +613,12 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), [
-                'Cohort__sort=slug&slug=100%2C101%2C110%2C111&breathecode.view.get=the-beans-should-not-have-sugar'
-            ])
             self.assertEqual(
-                cache.get(
+                stored_keys(), {
+                    'Cohort__sort=slug&slug=100%2C101%2C110%2C111&breathecode.view.get=the-beans-should-not-have-sugar'
+                })
+            self.assertEqual(
+                get_cached(
                     'Cohort__sort=slug&slug=100%2C101%2C110%2C111&breathecode.view.get=the-beans-should-not-have-sugar'
                 ),
                 str(expected).replace('\'', '"'))
@@ -581,13 +628,14 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             model = self.bc.database.create(cohort={'slug': slug})
 
             json_data = json.dumps(case)
-            cache.set('Cohort__', json_data)
-            cache.set('Cohort__keys', '["Cohort__"]')
+            set_cached('Cohort__', json_data)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -598,13 +646,13 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), [
+            self.assertEqual(stored_keys(), {
                 'Cohort__',
                 f'Cohort__sort=slug&slug={slug}&breathecode.view.get=the-beans-should-not-have-sugar'
-            ])
-            self.assertEqual(cache.get('Cohort__'), serialize_cache_value(case))
+            })
+            self.assertEqual(get_cached('Cohort__'), serialize_cache_value(case))
             self.assertEqual(
-                cache.get(
+                get_cached(
                     f'Cohort__sort=slug&slug={slug}&breathecode.view.get=the-beans-should-not-have-sugar'),
                 serialize_cache_value(expected))
 
@@ -613,6 +661,8 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             self.bc.database.delete('admissions.Cohort')
@@ -620,13 +670,9 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             json_data_root = json.dumps(case)
             json_data_query = json.dumps(case + case)
-            cache.set('Cohort__', json_data_root)
-            cache.set(f'Cohort__sort=slug&slug={slug}&breathecode.view.get=the-beans-should-not-have-sugar',
-                      json_data_query)
-            cache.set(
-                'Cohort__keys',
-                f'["Cohort__", "Cohort__sort=slug&slug={slug}&breathecode.view.get=the-beans-should-not-have-sugar"]'
-            )
+            set_cached('Cohort__', json_data_root)
+            set_cached(f'Cohort__sort=slug&slug={slug}&breathecode.view.get=the-beans-should-not-have-sugar',
+                       json_data_query)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar?sort=slug&slug={slug}')
@@ -637,16 +683,173 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), [
+            self.assertEqual(stored_keys(), {
                 'Cohort__',
                 f'Cohort__sort=slug&slug={slug}&breathecode.view.get=the-beans-should-not-have-sugar'
-            ])
-            self.assertEqual(cache.get('Cohort__'), json_data_root)
+            })
+            self.assertEqual(get_cached('Cohort__'), json_data_root)
             self.assertEqual(
-                cache.get(
+                get_cached(
                     f'Cohort__sort=slug&slug={slug}&breathecode.view.get=the-beans-should-not-have-sugar'),
                 json_data_query)
 
+    """
+    🔽🔽🔽 Cache stale while revalidate
+    """
+
+    def test_cache_stale__get__invalidated__lock_taken__serve_stale(self):
+        cache.clear()
+
+        self.bc.database.create(cohort=1)
+        case = [{'x': 1}]
+
+        cache.set('Cohort__stale__', cohort_cache.__build_entry__(case))
+        cohort_cache.lock()
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar')
+
+        view = TestView.as_view()
+        response = view(request).render()
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), case)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(stored_keys(), set())
+        self.assertEqual(cohort_cache.stats(), {'hit': 0, 'miss': 0, 'stale': 1})
+
+    def test_cache_stale__get__invalidated__lock_free__rebuild(self):
+        cache.clear()
+
+        model = self.bc.database.create(cohort=1)
+        case = [{'x': 1}]
+
+        cache.set('Cohort__stale__', cohort_cache.__build_entry__(case))
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar')
+
+        view = TestView.as_view()
+        response = view(request).render()
+        expected = GetCohortSerializer([model.cohort], many=True).data
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(stored_keys(), {'Cohort__'})
+        self.assertEqual(get_cached('Cohort__'), serialize_cache_value(expected))
+        self.assertEqual(json.loads(cohort_cache.decode(cache.get('Cohort__stale__'))), expected)
+        self.assertEqual(cohort_cache.stats(), {'hit': 0, 'miss': 1, 'stale': 0})
+
+        # the lock was released after rebuild the entry
+        self.assertTrue(cohort_cache.lock())
+
+    def test_cache_stale__get__hit(self):
+        cache.clear()
+
+        case = [{'x': 1}]
+
+        set_cached('Cohort__', json.dumps(case))
+        cache.set('Cohort__stale__', json.dumps(case + case))
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar')
+
+        view = TestView.as_view()
+        response = view(request).render()
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), case)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cohort_cache.stats(), {'hit': 1, 'miss': 0, 'stale': 0})
+
+    """
+    🔽🔽🔽 Cache etag and compression
+    """
+
+    def test_cache_etag__get__without_cache__etag_of_the_saved_entry(self):
+        cache.clear()
+
+        model = self.bc.database.create(cohort=1)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar')
+
+        view = TestView.as_view()
+        response = view(request).render()
+        expected = GetCohortSerializer([model.cohort], many=True).data
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], cache.get(versioned('Cohort__'))['etag'])
+
+    def test_cache_etag__get__with_cache__if_none_match(self):
+        cache.clear()
+
+        case = [{'x': 1}]
+        entry = cohort_cache.__build_entry__(case)
+        cache.set(versioned('Cohort__'), entry)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar', HTTP_IF_NONE_MATCH=entry['etag'])
+
+        view = TestView.as_view()
+        response = view(request).render()
+
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], entry['etag'])
+
+    def test_cache_etag__get__with_cache__if_none_match_other_etag(self):
+        cache.clear()
+
+        case = [{'x': 1}]
+        entry = cohort_cache.__build_entry__(case)
+        cache.set(versioned('Cohort__'), entry)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar', HTTP_IF_NONE_MATCH='"other"')
+
+        view = TestView.as_view()
+        response = view(request).render()
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), case)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], entry['etag'])
+
+    def test_cache_compression__get__with_cache__accept_gzip(self):
+        cache.clear()
+
+        case = [{'x': 'y' * 2048}]
+        entry = cohort_cache.__build_entry__(case)
+        cache.set(versioned('Cohort__'), entry)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar', HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        view = TestView.as_view()
+        response = view(request).render()
+
+        self.assertEqual(entry['encoding'], 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content).decode('utf-8')), case)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cache_compression__get__with_cache__without_accept_gzip(self):
+        cache.clear()
+
+        case = [{'x': 'y' * 2048}]
+        entry = cohort_cache.__build_entry__(case)
+        cache.set(versioned('Cohort__'), entry)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar')
+
+        view = TestView.as_view()
+        response = view(request).render()
+
+        self.assertEqual(entry['encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content.decode('utf-8')), case)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     """
     🔽🔽🔽 Sort
     """
@@ -824,6 +1027,214 @@ class ApiViewExtensionsGetTestSuite(UtilsTestCase):
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    """
+    🔽🔽🔽 Pagination by cursor
+    """
+
+    def test_pagination_cursor__get__with_10_cohorts__get_first_five(self):
+        cache.clear()
+
+        model = self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar?limit=5')
+
+        view = PaginateCursorTestView.as_view()
+
+        response = view(request).render()
+        json_data = json.loads(response.content.decode('utf-8'))
+        expected = GetCohortSerializer(sorted(model.cohort, key=lambda x: x.name)[:5], many=True).data
+
+        self.assertEqual(json_data['results'], expected)
+        self.assertEqual(json_data['count'], 10)
+        self.assertEqual(json_data['first'], None)
+        self.assertEqual(json_data['previous'], None)
+        self.assertEqual(json_data['last'], None)
+
+        next_url = urlparse(json_data['next'])
+        query = parse_qs(next_url.query)
+        self.assertEqual(next_url.path, '/the-beans-should-not-have-sugar')
+        self.assertEqual(query['limit'], ['5'])
+        self.assertEqual(len(query['cursor']), 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pagination_cursor__get__with_10_cohorts__follow_the_next_link(self):
+        cache.clear()
+
+        model = self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        view = PaginateCursorTestView.as_view()
+
+        response = view(request.get('/the-beans-should-not-have-sugar?limit=5')).render()
+        next_url = json.loads(response.content.decode('utf-8'))['next']
+
+        response = view(request.get(next_url)).render()
+        json_data = json.loads(response.content.decode('utf-8'))
+        expected = {
+            'count': 10,
+            'first': 'http://testserver/the-beans-should-not-have-sugar?limit=5',
+            'last': None,
+            'next': None,
+            'previous': None,
+            'results': GetCohortSerializer(sorted(model.cohort, key=lambda x: x.name)[5:], many=True).data
+        }
+
+        self.assertEqual(json_data, expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pagination_cursor__get__with_10_cohorts__one_query_per_page(self):
+        cache.clear()
+
+        self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        view = PaginateCursorTestView.as_view()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request.get('/the-beans-should-not-have-sugar?limit=5')).render()
+
+        json_data = json.loads(response.content.decode('utf-8'))
+
+        # the count and the rows of the page, along with the first row of the next one
+        cohort_queries = [x['sql'] for x in queries if 'FROM "admissions_cohort"' in x['sql']]
+        self.assertEqual(len(cohort_queries), 2)
+        self.assertTrue(cohort_queries[1].endswith('LIMIT 6'))
+
+        self.assertEqual(len(json_data['results']), 5)
+        self.assertNotEqual(json_data['next'], None)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pagination_cursor__get__with_10_cohorts__count_is_cached_by_default(self):
+        cache.clear()
+
+        self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        view = PaginateCursorTestView.as_view()
+
+        response = view(request.get('/the-beans-should-not-have-sugar?limit=5')).render()
+        next_url = json.loads(response.content.decode('utf-8'))['next']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request.get(next_url)).render()
+
+        json_data = json.loads(response.content.decode('utf-8'))
+
+        # the next page reuses the count of the first one, so it just gets its rows
+        cohort_queries = [x['sql'] for x in queries if 'FROM "admissions_cohort"' in x['sql']]
+        self.assertEqual(len(cohort_queries), 1)
+        self.assertTrue(cohort_queries[0].endswith('LIMIT 6'))
+
+        self.assertEqual(json_data['count'], 10)
+        self.assertEqual(len(json_data['results']), 5)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pagination_cursor__get__with_offset(self):
+        cache.clear()
+
+        model = self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar?limit=5&offset=5')
+
+        view = PaginateCursorTestView.as_view()
+
+        response = view(request).render()
+        expected = {
+            'count': 10,
+            'first': 'http://testserver/the-beans-should-not-have-sugar?limit=5',
+            'last': None,
+            'next': None,
+            'previous': 'http://testserver/the-beans-should-not-have-sugar?limit=5',
+            'results': GetCohortSerializer(sorted(model.cohort, key=lambda x: x.name)[5:], many=True).data
+        }
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pagination_cursor__get__sorted_by_created_at__follow_the_next_links(self):
+        cache.clear()
+
+        model = self.bc.database.create(cohort=10)
+
+        # several rows in the same millisecond, the cursor must keep the microseconds to split them
+        now = timezone.now().replace(microsecond=123000)
+        for index, cohort in enumerate(model.cohort):
+            Cohort.objects.filter(id=cohort.id).update(created_at=now + timedelta(microseconds=index * 100))
+
+        request = APIRequestFactory()
+        view = PaginateCursorByCreatedAtTestView.as_view()
+
+        ids = []
+        url = '/the-beans-should-not-have-sugar?limit=3'
+        while url:
+            response = view(request.get(url)).render()
+            json_data = json.loads(response.content.decode('utf-8'))
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [x['id'] for x in json_data['results']]
+            url = json_data['next']
+
+        self.assertEqual(ids, [x.id for x in reversed(model.cohort)])
+
+    def test_pagination_cursor__get__sorted_by_a_relation__use_the_offset(self):
+        cache.clear()
+
+        self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar?limit=5')
+
+        view = PaginateCursorByAcademyTestView.as_view()
+
+        response = view(request).render()
+        json_data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(len(json_data['results']), 5)
+        self.assertEqual(json_data['next'], 'http://testserver/the-beans-should-not-have-sugar?limit=5&offset=5')
+        self.assertEqual(json_data['last'], 'http://testserver/the-beans-should-not-have-sugar?limit=5&offset=5')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pagination_cursor__get__bad_cursor(self):
+        cache.clear()
+
+        self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        request = request.get('/the-beans-should-not-have-sugar?limit=5&cursor=potato')
+
+        view = PaginateCursorTestView.as_view()
+
+        response = view(request).render()
+        expected = {'detail': 'invalid-cursor', 'status_code': 400}
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    """
+    🔽🔽🔽 Pagination with cached count
+    """
+
+    def test_pagination_cached_count__get__count_is_reused(self):
+        cache.clear()
+
+        self.bc.database.create(cohort=10)
+
+        request = APIRequestFactory()
+        view = PaginateCachedCountTestView.as_view()
+
+        view(request.get('/the-beans-should-not-have-sugar?limit=5')).render()
+        self.bc.database.create(cohort=2)
+
+        response = view(request.get('/the-beans-should-not-have-sugar?limit=6')).render()
+        json_data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(json_data['count'], 10)
+        self.assertEqual(response['x-total-count'], '10')
+        self.assertEqual(len(json_data['results']), 6)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
 class ApiViewExtensionsGetIdTestSuite(UtilsTestCase):
     """
@@ -870,7 +1281,7 @@ class ApiViewExtensionsGetIdTestSuite(UtilsTestCase):
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
-        self.assertEqual(cohort_cache.keys(), [])
+        self.assertEqual(stored_keys(), set())
 
     def test_cache__get__without_cache__one_cohort(self):
         cache.clear()
@@ -888,17 +1299,18 @@ class ApiViewExtensionsGetIdTestSuite(UtilsTestCase):
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        self.assertEqual(cohort_cache.keys(), ['Cohort__id=1'])
-        self.assertEqual(cache.get('Cohort__id=1'), serialize_cache_value(expected))
+        self.assertEqual(stored_keys(), {'Cohort__id=1'})
+        self.assertEqual(get_cached('Cohort__id=1'), serialize_cache_value(expected))
 
     def test_cache__get__with_cache(self):
         cache.clear()
 
         cases = [[], [{'x': 1}], [{'x': 1}, {'x': 2}]]
         for expected in cases:
+            cohort_cache.clear()
+
             json_data = json.dumps(expected)
-            cache.set('Cohort__keys', '["Cohort__id=1"]')
-            cache.set('Cohort__id=1', json_data)
+            set_cached('Cohort__id=1', json_data)
 
             request = APIRequestFactory()
             request = request.get('/the-beans-should-not-have-sugar/1')
@@ -908,8 +1320,8 @@ class ApiViewExtensionsGetIdTestSuite(UtilsTestCase):
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), ['Cohort__id=1'])
-            self.assertEqual(cache.get('Cohort__id=1'), serialize_cache_value(expected))
+            self.assertEqual(stored_keys(), {'Cohort__id=1'})
+            self.assertEqual(get_cached('Cohort__id=1'), serialize_cache_value(expected))
 
     def test_cache__get__with_cache_but_other_case(self):
         cache.clear()
@@ -920,9 +1332,8 @@ class ApiViewExtensionsGetIdTestSuite(UtilsTestCase):
         model = self.bc.database.create(cohort={'slug': slug})
 
         json_data = json.dumps(case)
-        cache.set('Cohort__', json_data)
-        cache.set('Cohort__id=2', json_data)
-        cache.set('Cohort__keys', '["Cohort__", "Cohort__id=2"]')
+        set_cached('Cohort__', json_data)
+        set_cached('Cohort__id=2', json_data)
 
         request = APIRequestFactory()
         request = request.get(f'/the-beans-should-not-have-sugar/1')
@@ -933,16 +1344,18 @@ class ApiViewExtensionsGetIdTestSuite(UtilsTestCase):
 
         self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(cohort_cache.keys(), ['Cohort__', 'Cohort__id=2', 'Cohort__id=1'])
-        self.assertEqual(cache.get('Cohort__'), serialize_cache_value(case))
-        self.assertEqual(cache.get('Cohort__id=1'), serialize_cache_value(expected))
-        self.assertEqual(cache.get('Cohort__id=2'), serialize_cache_value(case))
+        self.assertEqual(stored_keys(), {'Cohort__', 'Cohort__id=2', 'Cohort__id=1'})
+        self.assertEqual(get_cached('Cohort__'), serialize_cache_value(case))
+        self.assertEqual(get_cached('Cohort__id=1'), serialize_cache_value(expected))
+        self.assertEqual(get_cached('Cohort__id=2'), serialize_cache_value(case))
 
     def test_cache__get__with_cache_case_of_root_and_current(self):
         cache.clear()
 
         cases = [({'x': 1}, {'y': 1}), ({'x': 2}, {'y': 2}), ({'x': 3}, {'y': 3})]
         for case in cases:
+            cohort_cache.clear()
+
             # keep before cache handling
             slug = self.bc.fake.slug()
             self.bc.database.delete('admissions.Cohort')
@@ -950,20 +1363,19 @@ class ApiViewExtensionsGetIdTestSuite(UtilsTestCase):
 
             json_data_root = json.dumps(case[0])
             json_data_query = json.dumps(case[1])
-            cache.set('Cohort__', json_data_root)
-            cache.set('Cohort__id=1', json_data_query)
-            cache.set('Cohort__keys', '["Cohort__", "Cohort__id=1"]')
+            set_cached('Cohort__', json_data_root)
+            set_cached('Cohort__id=1', json_data_query)
 
             request = APIRequestFactory()
             request = request.get(f'/the-beans-should-not-have-sugar/1')
 
             view = TestView.as_view()
             response = view(request, id=1).render()
-            self.assertEqual(cohort_cache.keys(), ['Cohort__', 'Cohort__id=1'])
+            self.assertEqual(stored_keys(), {'Cohort__', 'Cohort__id=1'})
             expected = case[1]
 
             self.assertEqual(json.loads(response.content.decode('utf-8')), expected)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(cohort_cache.keys(), ['Cohort__', 'Cohort__id=1'])
-            self.assertEqual(cache.get('Cohort__'), json_data_root)
-            self.assertEqual(cache.get('Cohort__id=1'), json_data_query)
+            self.assertEqual(stored_keys(), {'Cohort__', 'Cohort__id=1'})
+            self.assertEqual(get_cached('Cohort__'), json_data_root)
+            self.assertEqual(get_cached('Cohort__id=1'), json_data_query)
@@ -0,0 +1,62 @@
+"""
+Test BufferedCounter
+"""
+from unittest.mock import MagicMock, call
+
+from django.core.cache import cache
+
+from breathecode.utils import BufferedCounter
+
+
+def test_the_hits_are_saved_in_one_batch():
+    save = MagicMock()
+    counter = BufferedCounter('potato', save)
+
+    assert counter.add('a') is True
+    assert counter.add('a', ('b', 1)) is False
+    assert counter.add('a') is False
+
+    assert counter.pending() == 2
+    assert counter.flush() == {'a': 3, ('b', 1): 1}
+    assert save.call_args_list == [call({'a': 3, ('b', 1): 1})]
+    assert counter.pending() == 0
+
+    assert counter.flush() == {}
+    assert save.call_count == 1
+
+
+def test_the_hits_received_while_saving_are_kept():
+    counter = BufferedCounter('potato', MagicMock(side_effect=lambda hits: counter.add('a')))
+
+    counter.add('a')
+
+    assert counter.flush() == {'a': 1}
+    assert counter.pending() == 1
+
+    counter.save = MagicMock()
+
+    assert counter.flush() == {'a': 1}
+    assert counter.save.call_args_list == [call({'a': 1})]
+
+
+def test_the_batches_are_limited():
+    save = MagicMock()
+    counter = BufferedCounter('potato', save, batch_size=2)
+
+    counter.add('a', 'b', 'c')
+
+    assert counter.flush() == {'a': 1, 'b': 1}
+    assert counter.flush() == {'c': 1}
+    assert counter.pending() == 0
+
+
+def test_another_process_is_flushing():
+    save = MagicMock()
+    counter = BufferedCounter('potato', save)
+
+    counter.add('a')
+    cache.set('potato__lock', 1)
+
+    assert counter.flush() == {}
+    assert save.call_args_list == []
+    assert counter.pending() == 1
@@ -3,6 +3,7 @@ import pytest
 from breathecode.admissions.models import Country
 import breathecode.utils.decorators as decorators
 from breathecode.utils.decorators import AbortTask
+from breathecode.utils.exceptions import ProgrammingError
 from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
 
 # enable this file to use the database
@@ -43,7 +44,13 @@ def fallback(*args, exception=None, **kwargs):
 @pytest.fixture
 def setup(bc: Breathecode, fake, monkeypatch, get_args, get_kwargs):
 
-    def _arrange(*, task_manager, transaction=None, bind=False, with_fallback=False, with_reverse=False):
+    def _arrange(*,
+                 task_manager,
+                 transaction=None,
+                 bind=False,
+                 with_fallback=False,
+                 with_reverse=False,
+                 bookkeeping=None):
         c = MagicMock()
         name = fake.slug().replace('-', '_')
 
@@ -63,6 +70,9 @@ def setup(bc: Breathecode, fake, monkeypatch, get_args, get_kwargs):
         if with_reverse:
             params['reverse'] = reverse
 
+        if bookkeeping:
+            params['bookkeeping'] = bookkeeping
+
         task = decorators.task(**params)(inner_fn)
 
         setattr(c, name, MagicMock(side_effect=task))
@@ -445,3 +455,127 @@ def test_two_task_managers__it_must_be_killed(bc: Breathecode, setup, utc_now, s
 
     # this is used for testing the rollback
     assert bc.database.list_of('admissions.Country') == []
+
+
+# Given: 0 TaskManager's
+# When: bookkeeping is on_failure and the task finishes well
+# Then: it should call the task without create a TaskManager
+@pytest.mark.parametrize('transaction', [True, False])
+def test_on_failure__it_finished_well(bc: Breathecode, setup, transaction, django_assert_num_queries):
+    _, task, _, args, kwargs, city_code = setup(task_manager=0,
+                                                transaction=transaction,
+                                                bookkeeping='on_failure')
+
+    # the city created by the task, and the savepoints of the transaction
+    with django_assert_num_queries(4 if transaction else 1):
+        res = task(*args, **kwargs)
+
+    assert res == (args, kwargs)
+    assert bc.database.list_of('commons.TaskManager') == []
+    assert bc.database.list_of('admissions.Country') == [
+        {
+            'code': city_code[:3],
+            'name': str(kwargs[city_code]),
+        },
+    ]
+
+
+# Given: 0 TaskManager's
+# When: bookkeeping is on_failure and the task fails
+# Then: it should save a TaskManager with the error
+def test_on_failure__it_got_an_exception(bc: Breathecode, setup, utc_now):
+    _, task, task_name, args, kwargs, _ = setup(task_manager=0, transaction=True, bookkeeping='on_failure')
+
+    kwargs['MUST_RAISE_EXCEPTION'] = True
+
+    with pytest.raises(Exception, match='Unexpected error'):
+        task(*args, **kwargs)
+
+    assert bc.database.list_of('commons.TaskManager') == [
+        db_item({
+            'arguments': {
+                'args': list(args),
+                'kwargs': kwargs,
+            },
+            'status': 'ERROR',
+            'last_run': utc_now,
+            'task_name': task_name,
+            'current_page': 1,
+            'total_pages': 1,
+            'status_message': 'Unexpected error',
+        }),
+    ]
+    assert bc.database.list_of('admissions.Country') == []
+
+
+# Given: 0 TaskManager's
+# When: bookkeeping is on_failure and the task has more than one page
+# Then: it should save the TaskManager to be able to pause or resume it
+def test_on_failure__with_pages(bc: Breathecode, setup, utc_now):
+    _, task, task_name, args, kwargs, _ = setup(task_manager=0, bookkeeping='on_failure')
+
+    res = task(*args, **kwargs, total_pages=2)
+
+    assert res == (args, {**kwargs, 'total_pages': 2, 'task_manager_id': 1})
+    assert bc.database.list_of('commons.TaskManager') == [
+        db_item({
+            'arguments': {
+                'args': list(args),
+                'kwargs': {
+                    **kwargs,
+                    'total_pages': 2,
+                },
+            },
+            'status': 'PENDING',
+            'last_run': utc_now,
+            'task_name': task_name,
+            'current_page': 1,
+            'total_pages': 2,
+        }),
+    ]
+
+
+# When: bookkeeping is sampled
+# Then: it should just save the runs in the sample
+@pytest.mark.parametrize('random, saved', [(0.05, True), (0.5, False)])
+def test_sampled(bc: Breathecode, setup, monkeypatch, random, saved):
+    monkeypatch.setattr('random.random', lambda: random)
+    _, task, _, args, kwargs, _ = setup(task_manager=0, bookkeeping='sampled')
+
+    task(*args, **kwargs)
+
+    assert len(bc.database.list_of('commons.TaskManager')) == (1 if saved else 0)
+
+
+# Given: 0 TaskManager's
+# When: bookkeeping is sampled and the run is in the sample
+# Then: it should save the TaskManager with a single write when the run ends
+@pytest.mark.parametrize('transaction', [True, False])
+def test_sampled__saved_when_it_ends(bc: Breathecode, setup, monkeypatch, utc_now, transaction,
+                                     django_assert_num_queries):
+    monkeypatch.setattr('random.random', lambda: 0.05)
+    _, task, task_name, args, kwargs, _ = setup(task_manager=0, transaction=transaction, bookkeeping='sampled')
+
+    # the city created by the task and the TaskManager, and the savepoints of the transaction
+    with django_assert_num_queries(5 if transaction else 2):
+        res = task(*args, **kwargs)
+
+    assert res == (args, kwargs)
+    assert bc.database.list_of('commons.TaskManager') == [
+        db_item({
+            'arguments': {
+                'args': list(args),
+                'kwargs': kwargs,
+            },
+            'status': 'DONE',
+            'last_run': utc_now,
+            'task_name': task_name,
+        }),
+    ]
+
+
+# When: a task with reverse is not fully saved
+# Then: it should raise a ProgrammingError
+def test_reverse_with_on_failure():
+    with pytest.raises(ProgrammingError, match='A task with reverse must use the full bookkeeping'):
+        decorators.task(reverse=reverse, bookkeeping='on_failure')
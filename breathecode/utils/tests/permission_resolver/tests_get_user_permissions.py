@@ -0,0 +1,128 @@
+"""
+Test get_user_permissions
+"""
+import pytest
+from django.contrib.auth.models import AnonymousUser, User
+
+from breathecode.admissions.models import Academy
+from breathecode.authenticate.models import ProfileAcademy
+from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
+from breathecode.utils.permission_resolver import get_user_permissions
+
+
+@pytest.fixture(autouse=True)
+def setup(db):
+    yield
+
+
+def get_user(user_id):
+    return User.objects.get(id=user_id)
+
+
+def test_anonymous_user(bc: Breathecode, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        result = get_user_permissions(AnonymousUser())
+
+    assert result == {'academies': {}, 'permissions': frozenset(), 'group_permissions': frozenset()}
+
+
+def test_capabilities_and_permissions(bc: Breathecode):
+    model = bc.database.create(user=1,
+                               profile_academy=1,
+                               role=1,
+                               capability='read_member',
+                               permission=1,
+                               group=1)
+
+    result = get_user_permissions(get_user(model.user.id))
+
+    assert result == {
+        'academies': {
+            model.academy.id: {
+                'status': model.academy.status,
+                'capabilities': frozenset(['read_member']),
+            },
+        },
+        'permissions': frozenset([model.permission.codename]),
+        'group_permissions': frozenset([model.permission.codename]),
+    }
+
+
+def test_resolved_once(bc: Breathecode, django_assert_num_queries):
+    model = bc.database.create(user=1, profile_academy=1, role=1, capability='read_member')
+
+    user = get_user(model.user.id)
+    result = get_user_permissions(user)
+
+    # memoized in the instance
+    with django_assert_num_queries(0):
+        assert get_user_permissions(user) is result
+
+    # another request gets them from the cache
+    user = get_user(model.user.id)
+    with django_assert_num_queries(0):
+        assert get_user_permissions(user) == result
+
+
+def test_a_new_role_invalidates_the_user(bc: Breathecode, enable_signals):
+    enable_signals()
+
+    model = bc.database.create(user=1, profile_academy=1, role=1, capability='read_member')
+
+    assert get_user_permissions(get_user(model.user.id))['academies'][model.academy.id]['capabilities'] == \
+        frozenset(['read_member'])
+
+    academy = bc.database.create(academy=1, country=model.country, city=model.city).academy
+    ProfileAcademy.objects.create(user=model.user, academy=academy, role=model.role)
+
+    assert set(get_user_permissions(get_user(model.user.id))['academies']) == {model.academy.id, academy.id}
+
+
+def test_refresh(bc: Breathecode, django_assert_num_queries):
+    model = bc.database.create(user=1, profile_academy=1, role=1, capability='read_member')
+
+    user = get_user(model.user.id)
+    result = get_user_permissions(user)
+
+    # granted without emit any signal
+    academy = bc.database.create(academy=1, country=model.country, city=model.city).academy
+    ProfileAcademy.objects.create(user=model.user, academy=academy, role=model.role)
+
+    assert get_user_permissions(user) is result
+
+    with django_assert_num_queries(3):
+        assert set(get_user_permissions(user, refresh=True)['academies']) == {model.academy.id, academy.id}
+
+    assert set(get_user_permissions(get_user(model.user.id))['academies']) == {model.academy.id, academy.id}
+
+
+def test_a_new_capability_invalidates_everybody(bc: Breathecode, enable_signals):
+    enable_signals()
+
+    model = bc.database.create(user=1, profile_academy=1, role=1, capability='read_member')
+    assert get_user_permissions(get_user(model.user.id))['academies'][model.academy.id]['capabilities'] == \
+        frozenset(['read_member'])
+
+    capability = bc.database.create(capability='crud_member').capability
+    model.role.capabilities.add(capability)
+
+    assert get_user_permissions(get_user(model.user.id))['academies'][model.academy.id]['capabilities'] == \
+        frozenset(['read_member', 'crud_member'])
+
+
+def test_the_status_of_an_academy_invalidates_everybody(bc: Breathecode, enable_signals):
+    enable_signals()
+
+    model = bc.database.create(user=1, profile_academy=1, role=1, capability='read_member')
+    result = get_user_permissions(get_user(model.user.id))
+
+    academy = Academy.objects.get(id=model.academy.id)
+    academy.logo_url = bc.fake.url()
+    academy.save()
+
+    assert get_user_permissions(get_user(model.user.id)) == result
+
+    academy.status = 'INACTIVE'
+    academy.save()
+
+    assert get_user_permissions(get_user(model.user.id))['academies'][model.academy.id]['status'] == 'INACTIVE'
@@ -0,0 +1,102 @@
+"""
+Test Service
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, call
+
+import pytest
+
+from breathecode.tests.mixins.breathecode_mixin.breathecode import Breathecode
+from breathecode.utils import service
+from breathecode.utils.service import AsyncService, Service
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch):
+    monkeypatch.setattr(service, '_sessions', {})
+    monkeypatch.setattr(service, '_tokens', {})
+    monkeypatch.setattr('breathecode.authenticate.actions.get_jwt',
+                        MagicMock(side_effect=['token1', 'token2']))
+    yield
+
+
+def test_session_is_shared(bc: Breathecode, monkeypatch):
+    model = bc.database.create(app={'strategy': 'JWT', 'app_url': 'https://rigobot.com'})
+
+    session = service.get_session(model.app.slug)
+    monkeypatch.setattr(session, 'request', MagicMock())
+
+    Service(model.app.slug, 1).get('/v1/me', params={'a': 1})
+    Service(model.app.slug, 1).post('v1/me', json={'b': 2})
+
+    assert service.get_session(model.app.slug) is session
+    assert session.request.call_args_list == [
+        call('get',
+             'https://rigobot.com/v1/me',
+             params={'a': 1},
+             headers={'Authorization': 'Link App=4geeks,Token=token1'},
+             timeout=service.TIMEOUT),
+        call('post',
+             'https://rigobot.com/v1/me',
+             data=None,
+             json={'b': 2},
+             headers={'Authorization': 'Link App=4geeks,Token=token1'},
+             timeout=service.TIMEOUT),
+    ]
+
+
+def test_jwt_is_renewed_near_expiry(bc: Breathecode, monkeypatch):
+    from breathecode.authenticate.actions import JWT_LIFETIME
+
+    model = bc.database.create(app={'strategy': 'JWT'})
+    now = 1_000_000
+    monkeypatch.setattr('time.time', MagicMock(return_value=now))
+
+    assert Service(model.app.slug, 1)._get_jwt() == 'token1'
+    assert Service(model.app.slug, 1)._get_jwt() == 'token1'
+
+    monkeypatch.setattr('time.time', MagicMock(return_value=now + JWT_LIFETIME * 60 - service.JWT_MARGIN))
+
+    assert Service(model.app.slug, 1)._get_jwt() == 'token2'
+
+
+def test_streams_are_not_limited_nor_retried(bc: Breathecode, monkeypatch):
+    model = bc.database.create(app={'strategy': 'JWT', 'app_url': 'https://rigobot.com'})
+
+    session = service.get_session(model.app.slug, stream=True)
+    monkeypatch.setattr(session, 'request', MagicMock())
+
+    Service(model.app.slug, 1).get('/v1/finetuning/me/coderevision', stream=True)
+
+    assert service.get_session(model.app.slug) is not session
+    assert session.get_adapter('https://rigobot.com').max_retries.total == 0
+    assert session.request.call_args_list == [
+        call('get',
+             'https://rigobot.com/v1/finetuning/me/coderevision',
+             params=None,
+             stream=True,
+             headers={'Authorization': 'Link App=4geeks,Token=token1'}),
+    ]
+
+
+def test_async_service(bc: Breathecode, monkeypatch):
+    model = bc.database.create(app={'strategy': 'JWT', 'app_url': 'https://rigobot.com'})
+
+    # the app is loaded in a thread, that does not share the connection of the test
+    monkeypatch.setattr('breathecode.authenticate.actions.get_app', MagicMock(return_value=model.app))
+
+    session = MagicMock(request=AsyncMock(return_value='response'), close=AsyncMock())
+    monkeypatch.setattr('aiohttp.ClientSession', MagicMock(return_value=session))
+
+    async def run():
+        async with AsyncService(model.app.slug, 1) as s:
+            return await s.get('/v1/finetuning/me/coderevision')
+
+    assert asyncio.run(run()) == 'response'
+    assert session.request.call_args_list == [
+        call('get',
+             'https://rigobot.com/v1/finetuning/me/coderevision',
+             params=None,
+             headers={'Authorization': 'Link App=4geeks,Token=token1'}),
+    ]
+    assert session.close.call_args_list == [call()]
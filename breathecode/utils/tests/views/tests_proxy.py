@@ -0,0 +1,59 @@
+"""
+Test proxy
+"""
+from unittest.mock import MagicMock, call, patch
+
+from breathecode.utils.views import proxy
+
+
+class Raw:
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.close = MagicMock()
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+
+def upstream(chunks):
+    response = MagicMock()
+    response.status_code = 201
+    response.reason = 'Created'
+    response.headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive', 'X-Total': '2'}
+    response.raw = Raw(chunks)
+    return response
+
+
+def test_the_response_is_streamed():
+    response = upstream([b'{"a":', b' 1}'])
+
+    with patch.multiple('breathecode.utils.service.Service',
+                        __init__=MagicMock(return_value=None),
+                        get=MagicMock(return_value=response)):
+        from breathecode.utils.service import Service
+
+        resource = proxy('rigobot', 1, 'get', '/v1/me', params={'x': 1})
+
+        assert Service.get.call_args_list == [call('/v1/me', params={'x': 1}, stream=True)]
+
+    assert resource.status_code == 201
+    assert resource.reason_phrase == 'Created'
+    assert resource['Content-Type'] == 'application/json'
+    assert resource['X-Total'] == '2'
+    assert resource.has_header('Connection') is False
+    assert b''.join(resource.streaming_content) == b'{"a": 1}'
+
+
+def test_the_app_is_released_when_the_response_is_closed():
+    response = upstream([b'{"a": 1}'])
+
+    with patch.multiple('breathecode.utils.service.Service',
+                        __init__=MagicMock(return_value=None),
+                        post=MagicMock(return_value=response)):
+        resource = proxy('rigobot', 1, 'post', '/v1/me', data={})
+
+    # the client disconnected before reading the stream
+    resource.close()
+
+    assert response.raw.close.call_args_list == [call()]
@@ -19,6 +19,7 @@ class ValidationException(APIException):
     queryset: Optional[QuerySet]
     data: dict
     silent: bool
+    wait: Optional[int]
 
     def __init__(self,
                  details: str,
@@ -26,12 +27,15 @@ class ValidationException(APIException):
                  slug: Optional[str] = None,
                  data=None,
                  queryset=None,
-                 silent=False):
+                 silent=False,
+                 wait: Optional[int] = None):
         self.status_code = code
         self.detail = details
         self.data = data
         self.queryset = queryset
         self.silent = silent
+        # seconds to wait before retrying, it's sent in the Retry-After header
+        self.wait = wait
         self.slug = slug or 'undefined'
 
         if isinstance(details, list) and code == 207:
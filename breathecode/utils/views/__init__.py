@@ -1,2 +1,3 @@
 from .get_root_schema_view import *
 from .private_view import *
+from .proxy import *
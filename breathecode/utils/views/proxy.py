@@ -0,0 +1,37 @@
+from typing import Optional
+
+from django.http import StreamingHttpResponse
+
+__all__ = ['proxy']
+
+# these headers belong to the connection with the app, they must not be forwarded
+HOP_BY_HOP_HEADERS = {'transfer-encoding', 'content-encoding', 'keep-alive', 'connection'}
+
+
+def _forward_headers(headers, exclude=HOP_BY_HOP_HEADERS) -> list[str]:
+    return [x for x in headers.keys() if x.lower() not in exclude]
+
+
+def proxy(app_pk: str | int, user_pk: Optional[str | int], method: str, url: str,
+          **kwargs) -> StreamingHttpResponse:
+    """
+    Proxy a request to an app, its response is streamed while it's read.
+
+    The gevent workers switch to another request while they wait for the app, and the connection with the app
+    is closed when the response is closed, so a client that disconnects cancels the request to the app.
+    """
+
+    from breathecode.utils.service import Service
+
+    s = Service(app_pk, user_pk)
+    response = getattr(s, method)(url, **kwargs, stream=True)
+    resource = StreamingHttpResponse(
+        response.raw,
+        status=response.status_code,
+        reason=response.reason,
+    )
+
+    for header in _forward_headers(response.headers):
+        resource[header] = response.headers[header]
+
+    return resource
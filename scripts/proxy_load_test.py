@@ -0,0 +1,66 @@
+"""
+Load test of the proxied rigobot endpoints.
+
+It opens many code revision streams at once and meanwhile measures the latency of another endpoint, the gevent
+workers switch to other requests while the streams wait for rigobot, so the latency must be the same as if the
+streams were not there.
+
+`python -m scripts.proxy_load_test http://localhost:8000 TOKEN --concurrency 50`
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+async def stream(session: aiohttp.ClientSession, url: str) -> int:
+    async with session.get(url) as response:
+        async for _ in response.content.iter_any():
+            pass
+
+        return response.status
+
+
+async def measure(session: aiohttp.ClientSession, url: str, times: int) -> list[float]:
+    result = []
+    for _ in range(times):
+        start = time.monotonic()
+        async with session.get(url) as response:
+            await response.read()
+
+        result.append(time.monotonic() - start)
+
+    return result
+
+
+async def main(host: str, token: str, concurrency: int, path: str, other: str):
+    headers = {'Authorization': f'Token {token}'}
+    connector = aiohttp.TCPConnector(limit=concurrency + 1)
+
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        baseline = await measure(session, host + other, 10)
+
+        streams = [asyncio.ensure_future(stream(session, host + path)) for _ in range(concurrency)]
+        await asyncio.sleep(0.5)
+
+        under_load = await measure(session, host + other, 10)
+        statuses = await asyncio.gather(*streams)
+
+    print(f'{concurrency} streams finished with the statuses {sorted(set(statuses))}')
+    print(f'{other} median latency without streams: {statistics.median(baseline):.3f}s')
+    print(f'{other} median latency with streams: {statistics.median(under_load):.3f}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test of the proxied rigobot endpoints')
+    parser.add_argument('host', help='url of the API, like http://localhost:8000')
+    parser.add_argument('token', help='token of an user with its Github account connected')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--path', default='/v1/assignment/me/coderevision')
+    parser.add_argument('--other', default='/v1/auth/user/me')
+    args = parser.parse_args()
+
+    asyncio.run(main(args.host, args.token, args.concurrency, args.path, args.other))